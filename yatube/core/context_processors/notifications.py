@@ -0,0 +1,17 @@
+from django.utils.functional import SimpleLazyObject
+
+from notifications.utils import unread_count
+
+
+def notifications(request):
+    """Добавляет число непрочитанных уведомлений пользователя.
+
+    Считается, только если шаблон его выводит.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {
+        'unread_notifications': SimpleLazyObject(
+            lambda: unread_count(user.id)),
+    }
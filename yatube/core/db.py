@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.db import connections
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS к каждому новому соединению с SQLite.
+
+    Ключ PRAGMAS в настройках базы дополняет и переопределяет их.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = {
+        **settings.SQLITE_PRAGMAS,
+        **connection.settings_dict.get('PRAGMAS', {}),
+    }
+    with connection.cursor() as cursor:
+        for pragma, value in pragmas.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+    connection.health_checked_at = time.monotonic()
+
+
+def check_connections(**kwargs):
+    """Закрывает постоянные соединения, которые перестали отвечать.
+
+    Проверка выполняется не чаще раза в DB_HEALTH_CHECK_INTERVAL секунд
+    и идёт в обход курсоров Django, чтобы не попадать в статистику.
+    """
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is None:
+            continue
+        checked_at = getattr(connection, 'health_checked_at', 0)
+        if now - checked_at < settings.DB_HEALTH_CHECK_INTERVAL:
+            continue
+        try:
+            connection.connection.cursor().execute('SELECT 1').close()
+        except connection.Database.Error:
+            connection.close()
+        else:
+            connection.health_checked_at = now
@@ -0,0 +1,61 @@
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_state = threading.local()
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def reset_state(use_replica=False):
+    _state.use_replica = use_replica
+    _state.wrote = False
+
+
+def wrote():
+    """Была ли в текущем запросе запись в основную базу."""
+    return getattr(_state, 'wrote', False)
+
+
+def track_writes(execute, sql, params, many, context):
+    """execute_wrapper, отмечающий изменяющие данные запросы."""
+    if sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+        _state.wrote = True
+    return execute(sql, params, many, context)
+
+
+class ReadReplicaRouter:
+    """Направляет чтение на реплики, а запись — в основную базу.
+
+    Реплики используются, только если ReplicaRoutingMiddleware разрешила
+    это для текущего запроса и в нём ещё не было записи.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (not replicas or wrote()
+                or not getattr(_state, 'use_replica', False)):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # Объект, прочитанный с реплики, сохраняется в основную базу;
+        # в остальных случаях база выбирается по подсказке instance.
+        instance = hints.get('instance')
+        if (instance is not None
+                and instance._state.db in settings.DATABASE_REPLICAS):
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,14 @@
+def query_budget(max_queries):
+    """Объявляет максимальное число SQL-запросов, которое делает view."""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def memory_budget(max_bytes):
+    """Объявляет пиковый объём памяти, который view может выделить."""
+    def decorator(view):
+        view.memory_budget = max_bytes
+        return view
+    return decorator
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = ('Обслуживает базу SQLite без остановки сайта: обновляет '
+            'статистику планировщика, освобождает страницы и '
+            'сбрасывает WAL.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Псевдоним базы из settings.DATABASES.',
+        )
+        parser.add_argument(
+            '--vacuum-pages', type=int, default=0,
+            help='Сколько свободных страниц вернуть; 0 — все.',
+        )
+        parser.add_argument(
+            '--enable-incremental-vacuum', action='store_true',
+            help='Перевести базу в auto_vacuum=INCREMENTAL полным VACUUM. '
+                 'Блокирует запись на время работы.',
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite.')
+        with connection.cursor() as cursor:
+            if options['enable_incremental_vacuum']:
+                cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                cursor.execute('VACUUM')
+                self.stdout.write('VACUUM: база переведена в '
+                                  'auto_vacuum=INCREMENTAL')
+            cursor.execute('ANALYZE')
+            self.stdout.write('ANALYZE: статистика обновлена')
+            cursor.execute('PRAGMA optimize')
+            self.stdout.write('optimize: выполнено')
+            cursor.execute('PRAGMA freelist_count')
+            free_before = cursor.fetchone()[0]
+            cursor.execute('PRAGMA incremental_vacuum(%d)'
+                           % options['vacuum_pages'])
+            cursor.fetchall()
+            cursor.execute('PRAGMA freelist_count')
+            freed = free_before - cursor.fetchone()[0]
+            self.stdout.write(f'incremental_vacuum: освобождено страниц: '
+                              f'{freed}')
+            cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            _, log_pages, checkpointed = cursor.fetchone()
+            self.stdout.write(f'wal_checkpoint: перенесено страниц '
+                              f'{checkpointed} из {log_pages}')
@@ -0,0 +1,45 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в файлы реплик. С --interval '
+            'копирует периодически, имитируя отставание реплики.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=None,
+            help='Пауза между копированиями в секундах; без неё — '
+                 'одно копирование.',
+        )
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        replicas = [settings.DATABASES[alias]
+                    for alias in settings.DATABASE_REPLICAS]
+        if not replicas:
+            raise CommandError('В DATABASE_REPLICAS нет реплик.')
+        engines = {primary['ENGINE'], *(db['ENGINE'] for db in replicas)}
+        if engines != {'django.db.backends.sqlite3'}:
+            raise CommandError('Команда работает только с SQLite.')
+        while True:
+            for replica in replicas:
+                self.copy(primary['NAME'], replica['NAME'])
+            self.stdout.write(f'{time.strftime("%H:%M:%S")} реплики '
+                              f'обновлены')
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
+
+    def copy(self, source_name, target_name):
+        source = sqlite3.connect(source_name)
+        target = sqlite3.connect(target_name)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
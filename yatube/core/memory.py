@@ -0,0 +1,98 @@
+import contextlib
+import linecache
+import os
+import threading
+import tracemalloc
+
+from django.conf import settings
+
+_trace_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+class MemoryProfile:
+    """Пик выделенной памяти и крупнейшие места выделения."""
+
+    def __init__(self):
+        self.peak = 0
+        self.top = []
+
+    def __repr__(self):
+        return f'<MemoryProfile peak={self.peak}>'
+
+
+def allocation_site(statistic):
+    frame = statistic.traceback[0]
+    filename = frame.filename
+    if filename.startswith(settings.BASE_DIR):
+        filename = os.path.relpath(filename, settings.BASE_DIR)
+    return {
+        'site': f'{filename}:{frame.lineno}',
+        'line': linecache.getline(frame.filename, frame.lineno).strip(),
+        'size': statistic.size,
+        'count': statistic.count,
+    }
+
+
+@contextlib.contextmanager
+def trace_memory(limit=None):
+    """Измеряет память, выделенную внутри блока.
+
+    tracemalloc глобален для процесса, поэтому одновременно трассируется
+    только один блок; вложенные и параллельные вызовы получают None.
+    """
+    if tracemalloc.is_tracing() or not _trace_lock.acquire(blocking=False):
+        yield None
+        return
+    profile = MemoryProfile()
+    tracemalloc.start(settings.MEMORY_TRACKING_FRAMES)
+    try:
+        yield profile
+        profile.peak = tracemalloc.get_traced_memory()[1]
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        profile.top = [
+            allocation_site(statistic)
+            for statistic in snapshot.statistics('lineno')[
+                :limit or settings.MEMORY_TRACKING_TOP_SITES]
+        ]
+    finally:
+        tracemalloc.stop()
+        _trace_lock.release()
+
+
+def record(view_name, budget, profile):
+    """Запоминает замер памяти view в статистике процесса."""
+    with _stats_lock:
+        stats = _stats.setdefault(view_name, {
+            'samples': 0,
+            'peak': 0,
+            'top': [],
+            'budget': budget,
+        })
+        stats['samples'] += 1
+        if profile.peak >= stats['peak']:
+            stats['peak'] = profile.peak
+            stats['top'] = profile.top
+
+
+def report():
+    """Возвращает статистику памяти по view, накопленную процессом."""
+    with _stats_lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
+
+
+def over_budget():
+    """Возвращает view, пик памяти которых превысил объявленный бюджет."""
+    return {
+        name: stats for name, stats in report().items()
+        if stats['budget'] is not None and stats['peak'] > stats['budget']
+    }
+
+
+def reset():
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,38 @@
+import json
+import logging
+import random
+
+from django.conf import settings
+
+from core.memory import record, trace_memory
+
+logger = logging.getLogger('yatube.memory')
+
+
+class MemoryTrackingMiddleware:
+    """Замеряет память случайной доли запросов через tracemalloc.
+
+    Доля задаётся MEMORY_TRACKING_SAMPLE_RATE, результаты копятся
+    в core.memory и пишутся в логгер yatube.memory.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.MEMORY_TRACKING_SAMPLE_RATE:
+            return self.get_response(request)
+        with trace_memory() as profile:
+            response = self.get_response(request)
+        match = request.resolver_match
+        if profile is not None and match is not None:
+            budget = getattr(match.func, 'memory_budget', None)
+            record(match.view_name, budget, profile)
+            logger.info(json.dumps({
+                'url_name': match.view_name,
+                'path': request.path,
+                'peak': profile.peak,
+                'budget': budget,
+                'top': profile.top,
+            }, ensure_ascii=False))
+        return response
@@ -0,0 +1,127 @@
+import collections
+import functools
+import os
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.utils.text import slugify
+
+PROFILE_EXTENSION = '.folded'
+
+
+class StackSampler(threading.Thread):
+    """Периодически снимает стек потока, обрабатывающего запрос."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.finished = threading.Event()
+
+    def run(self):
+        while not self.finished.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+
+    def stop(self):
+        self.finished.set()
+        self.join()
+
+
+@functools.lru_cache(maxsize=None)
+def short_filename(filename):
+    for prefix in sorted(sys.path, key=len, reverse=True):
+        if prefix and filename.startswith(prefix):
+            return os.path.relpath(filename, prefix)
+    return filename
+
+
+def frame_label(frame):
+    code = frame.f_code
+    filename = short_filename(code.co_filename)
+    return f'{code.co_name} ({filename}:{frame.f_lineno})'
+
+
+def collapse_stack(frame):
+    """Сворачивает стек в строку формата flamegraph.pl: от корня к листу."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame).replace(';', ':'))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+def list_profiles():
+    """Возвращает сохранённые профили, начиная с самых свежих."""
+    directory = settings.PROFILER_DIR
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in os.listdir(directory):
+        if not name.endswith(PROFILE_EXTENSION):
+            continue
+        stat = os.stat(os.path.join(directory, name))
+        profiles.append({
+            'name': name,
+            'size': stat.st_size,
+            'created': stat.st_mtime,
+        })
+    return sorted(profiles, key=lambda item: item['created'], reverse=True)
+
+
+def prune_profiles():
+    for profile in list_profiles()[settings.PROFILER_KEEP:]:
+        os.remove(os.path.join(settings.PROFILER_DIR, profile['name']))
+
+
+class ProfilerMiddleware:
+    """Профилирует запрос сотрудника, если он этого попросил.
+
+    Профилирование включается параметром запроса или заголовком,
+    имена которых заданы в PROFILER_QUERY_PARAM и PROFILER_HEADER.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def wants_profile(self, request):
+        if not request.user.is_staff:
+            return False
+        return (settings.PROFILER_QUERY_PARAM in request.GET
+                or settings.PROFILER_HEADER in request.META)
+
+    def __call__(self, request):
+        if not self.wants_profile(request):
+            return self.get_response(request)
+        sampler = StackSampler(threading.get_ident(),
+                               settings.PROFILER_INTERVAL)
+        started = time.time()
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        name = self.save(request, sampler.stacks, started)
+        response['X-Profile'] = name
+        return response
+
+    def save(self, request, stacks, started):
+        os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+        timestamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime(started))
+        milliseconds = int(started * 1000) % 1000
+        match = request.resolver_match
+        label = match.view_name if match else request.path
+        name = '{}{:03d}-{}{}'.format(
+            timestamp, milliseconds,
+            slugify(label.replace(':', '-')) or 'root',
+            PROFILE_EXTENSION,
+        )
+        with open(os.path.join(settings.PROFILER_DIR, name), 'w') as file:
+            for stack, count in stacks.items():
+                file.write(f'{stack} {count}\n')
+        prune_profiles()
+        return name
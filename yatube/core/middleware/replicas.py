@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.db_router import reset_state, track_writes, wrote
+
+PIN_SESSION_KEY = 'pin_primary_until'
+
+
+class ReplicaRoutingMiddleware:
+    """Включает чтение с реплик для GET-запросов к posts.views.
+
+    После записи сессия пользователя на REPLICA_PIN_SECONDS закрепляется
+    за основной базой, чтобы он сразу видел свои изменения, даже если
+    реплика отстаёт.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        reset_state()
+        with connections[DEFAULT_DB_ALIAS].execute_wrapper(track_writes):
+            response = self.get_response(request)
+        if wrote() and hasattr(request, 'session'):
+            request.session[PIN_SESSION_KEY] = (
+                time.time() + settings.REPLICA_PIN_SECONDS)
+        reset_state()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.DATABASE_REPLICAS:
+            return None
+        pinned_until = request.session.get(PIN_SESSION_KEY, 0)
+        reset_state(use_replica=(
+            request.method in ('GET', 'HEAD')
+            and view_func.__module__ == 'posts.views'
+            and time.time() >= pinned_until
+        ))
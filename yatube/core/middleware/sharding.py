@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.shortcuts import render
+
+from core.sharding import ShardMoving
+
+
+class ShardMovingMiddleware:
+    """Отвечает 503 на запись в бакет, который сейчас переносится."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, ShardMoving):
+            return None
+        response = render(request, 'core/503.html', status=503)
+        response['Retry-After'] = settings.SHARD_DIRECTORY_TTL
+        return response
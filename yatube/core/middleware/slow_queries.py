@@ -0,0 +1,146 @@
+import atexit
+import contextlib
+import inspect
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('yatube.slow_queries')
+
+MIDDLEWARE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_listener = None
+_handler = None
+_listener_lock = threading.Lock()
+
+
+def start_listener():
+    """Подключает к логгеру очередь, которую пишет в файл отдельный поток."""
+    global _listener, _handler
+    with _listener_lock:
+        if _listener is not None:
+            return
+        os.makedirs(os.path.dirname(settings.SLOW_QUERY_LOG_FILE),
+                    exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            settings.SLOW_QUERY_LOG_FILE,
+            maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+            backupCount=settings.SLOW_QUERY_LOG_BACKUP_COUNT,
+            encoding='utf-8',
+        )
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        records = queue.Queue()
+        _listener = logging.handlers.QueueListener(records, handler)
+        _listener.start()
+        _handler = logging.handlers.QueueHandler(records)
+        logger.addHandler(_handler)
+        logger.setLevel(logging.WARNING)
+        logger.propagate = False
+
+
+@atexit.register
+def stop_listener():
+    """Дописывает накопленные записи в файл и останавливает поток."""
+    global _listener, _handler
+    with _listener_lock:
+        if _listener is None:
+            return
+        logger.removeHandler(_handler)
+        _listener.stop()
+        _listener.handlers[0].close()
+        _listener = _handler = None
+
+
+def template_frame(frame):
+    """Ищет ближайший узел шаблона, который рендерился во время запроса."""
+    while frame is not None:
+        node = frame.f_locals.get('self')
+        if (frame.f_code.co_name == 'render_annotated'
+                and getattr(node, 'token', None) is not None):
+            return f'{node.origin.template_name}:{node.token.lineno}'
+        frame = frame.f_back
+    return None
+
+
+def python_frame(frame):
+    """Ищет ближайший кадр кода проекта, не считая middleware."""
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(settings.BASE_DIR)
+                and not filename.startswith(MIDDLEWARE_DIR)):
+            return '{}:{} in {}'.format(
+                os.path.relpath(filename, settings.BASE_DIR),
+                frame.f_lineno, frame.f_code.co_name)
+        frame = frame.f_back
+    return None
+
+
+class SlowQueryLogger:
+    """Обёртка execute_wrapper, логирующая медленные запросы."""
+
+    def __init__(self, request, connection):
+        self.request = request
+        self.connection = connection
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.monotonic() - started) * 1000
+            if duration >= settings.SLOW_QUERY_THRESHOLD_MS:
+                self.log(sql, params, many, duration)
+
+    def explain(self, sql, params):
+        if (self.connection.vendor != 'sqlite'
+                or not sql.lstrip().upper().startswith('SELECT')):
+            return None
+        # Курсор драйвера не проходит через execute_wrapper и не попадает
+        # в connection.queries, поэтому план не искажает статистику.
+        cursor = self.connection.create_cursor()
+        try:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+        except self.connection.Database.Error:
+            return None
+        finally:
+            cursor.close()
+
+    def log(self, sql, params, many, duration):
+        start_listener()
+        frame = inspect.currentframe()
+        match = self.request.resolver_match
+        logger.warning(json.dumps({
+            'duration_ms': round(duration, 3),
+            'database': self.connection.alias,
+            'url_name': match.view_name if match else None,
+            'path': self.request.path,
+            'sql': sql,
+            'params': None if many else params,
+            'plan': None if many else self.explain(sql, params),
+            'template': template_frame(frame),
+            'python': python_frame(frame),
+        }, ensure_ascii=False, default=str))
+
+
+class SlowQueryLogMiddleware:
+    """Логирует запросы к БД дольше SLOW_QUERY_THRESHOLD_MS миллисекунд."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if settings.SLOW_QUERY_THRESHOLD_MS is None:
+            return self.get_response(request)
+        with contextlib.ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(
+                    SlowQueryLogger(request, connection)))
+            return self.get_response(request)
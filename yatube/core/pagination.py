@@ -0,0 +1,288 @@
+import datetime
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=timezone.utc)
+COUNT_GENERATION_KEY = 'paginator-count-generation'
+
+
+def encode_cursor(value, pk):
+    """Кодирует позицию (дата, id) в строку для адреса страницы."""
+    microseconds = (value - EPOCH) // datetime.timedelta(microseconds=1)
+    return f'{microseconds}-{pk}'
+
+
+def decode_cursor(cursor):
+    microseconds, pk = cursor.split('-')
+    value = EPOCH + datetime.timedelta(microseconds=int(microseconds))
+    return value, int(pk)
+
+
+class KeysetPage:
+    """Страница, следующая за курсором, без OFFSET и COUNT(*)."""
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def keyset_paginate(queryset, cursor, per_page, field='pub_date',
+                    descending=True):
+    """Возвращает per_page объектов после cursor в порядке (field, id).
+
+    Запрос идёт по индексу (..., field) и стоит одинаково для любой
+    страницы. Испорченный курсор считается началом списка.
+    """
+    lookup = 'lt' if descending else 'gt'
+    sign = '-' if descending else ''
+    queryset = queryset.order_by(f'{sign}{field}', f'{sign}pk')
+    try:
+        value, pk = decode_cursor(cursor) if cursor else (None, None)
+    except (ValueError, OverflowError):
+        value = None
+    if value is not None:
+        queryset = queryset.filter(
+            Q(**{f'{field}__{lookup}': value})
+            | Q(**{field: value, f'pk__{lookup}': pk})
+        )
+    objects = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(objects) > per_page:
+        last = objects[per_page - 1]
+        next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return KeysetPage(objects[:per_page], next_cursor)
+
+
+def count_generation():
+    return cache.get(COUNT_GENERATION_KEY, 0)
+
+
+def invalidate_counts():
+    """Помечает закешированные счётчики устаревшими."""
+    try:
+        cache.incr(COUNT_GENERATION_KEY)
+    except ValueError:
+        cache.set(COUNT_GENERATION_KEY, 1, None)
+
+
+def cached_count(queryset):
+    """COUNT(*) queryset из кеша; сбрасывается вместе с invalidate_counts."""
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.md5(repr((queryset.db, sql, params)).encode()).hexdigest()
+    key = f'queryset-count:{digest}:{count_generation()}'
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.PAGINATOR_COUNT_MAX_AGE)
+    return count
+
+
+class ChainedQuerySet:
+    """Последовательность querysets, идущих друг за другом без перекрытий.
+
+    Срез читает только те querysets, в которые попадает; пропущенные
+    целиком учитываются по кешированному числу строк.
+    """
+
+    def __init__(self, querysets):
+        self.querysets = querysets
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        wanted = None if stop is None else stop - start
+        objects = []
+        for queryset in self.querysets:
+            if wanted is not None and wanted <= 0:
+                break
+            if start:
+                count = cached_count(queryset)
+                if count <= start:
+                    start -= count
+                    continue
+            end = None if wanted is None else start + wanted
+            rows = list(queryset[start:end])
+            objects.extend(rows)
+            start = 0
+            if wanted is not None:
+                wanted -= len(rows)
+        return objects
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def count(self):
+        return sum(cached_count(queryset) for queryset in self.querysets)
+
+
+def queries_digest(object_list):
+    """Хеш SQL всех querysets object_list или None, если это не querysets."""
+    querysets = getattr(object_list, 'querysets', [object_list])
+    parts = []
+    for queryset in querysets:
+        query = getattr(queryset, 'query', None)
+        if query is None:
+            return None
+        parts.append((queryset.db, *query.sql_with_params()))
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+class WindowedPaginator(Paginator):
+    """Paginator без COUNT(*) на каждый запрос.
+
+    Объекты страницы выбираются с запасом в один элемент, поэтому
+    наличие следующей страницы известно без подсчёта. Общее число
+    объектов нужно только для навигации: оно берётся из кеша, а
+    устаревшее значение пересчитывается в фоновом потоке.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.current = None
+        self.has_more = False
+
+    def validate_number(self, number):
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_('That page number is not an integer'))
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        return number
+
+    def get_page(self, number):
+        try:
+            number = self.validate_number(number)
+        except (PageNotAnInteger, EmptyPage):
+            number = 1
+        page = self.page(number)
+        if number > 1 and not page.object_list:
+            self.current = None
+            page = self.page(min(number - 1, self.num_pages))
+            if not page.object_list:
+                page = self.page(1)
+        return page
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        objects = list(self.object_list[bottom:bottom + self.per_page + 1])
+        self.current = number
+        self.has_more = len(objects) > self.per_page
+        return self._get_page(objects[:self.per_page], number, self)
+
+    @property
+    def num_pages(self):
+        """Число страниц по кешированному счётчику.
+
+        Для последней выданной страницы оно уточняется тем, есть ли
+        объекты дальше, поэтому has_next() всегда точен.
+        """
+        if self.current is not None and not self.has_more:
+            return self.current
+        hits = max(1, self.count - self.orphans)
+        estimated = math.ceil(hits / self.per_page)
+        if self.current is None:
+            return estimated
+        return max(estimated, self.current + 1)
+
+    @property
+    def page_window(self):
+        """Номера страниц вокруг текущей: первая, соседние и последняя.
+
+        Пропуски между ними обозначены None.
+        """
+        number = self.current or 1
+        last = self.num_pages
+        neighbors = settings.PAGINATOR_WINDOW
+        numbers = sorted({
+            1, last,
+            *range(max(1, number - neighbors),
+                   min(last, number + neighbors) + 1),
+        })
+        window = []
+        previous = 0
+        for page in numbers:
+            if page - previous > 1:
+                window.append(None)
+            window.append(page)
+            previous = page
+        return window
+
+    def count_key(self):
+        """Ключ кеша счётчика по SQL всех запросов object_list."""
+        digest = queries_digest(self.object_list)
+        if digest is None:
+            return None
+        return f'paginator-count:{digest}'
+
+    def in_atomic_block(self):
+        querysets = getattr(self.object_list, 'querysets',
+                            [self.object_list])
+        return any(connections[queryset.db].in_atomic_block
+                   for queryset in querysets)
+
+    @cached_property
+    def count(self):
+        key = self.count_key()
+        if key is None:
+            return super().count
+        generation = count_generation()
+        cached = cache.get(key)
+        if cached is None:
+            return self.refresh_count(key, generation)
+        count, refreshed, cached_generation = cached
+        stale = (cached_generation != generation
+                 or time.time() - refreshed > settings.PAGINATOR_COUNT_TTL)
+        if not stale or not cache.add(f'{key}:refreshing', True,
+                                      settings.PAGINATOR_COUNT_TTL):
+            return count
+        # Фоновый поток не видит незакоммиченных изменений, поэтому
+        # внутри транзакции счётчик пересчитывается сразу.
+        if self.in_atomic_block():
+            return self.refresh_count(key, generation)
+        threading.Thread(
+            target=self.refresh_in_background, args=(key, generation),
+            daemon=True,
+        ).start()
+        return count
+
+    def refresh_count(self, key, generation):
+        count = self.object_list.count()
+        cache.set(key, (count, time.time(), generation),
+                  settings.PAGINATOR_COUNT_MAX_AGE)
+        cache.delete(f'{key}:refreshing')
+        return count
+
+    def refresh_in_background(self, key, generation):
+        try:
+            self.refresh_count(key, generation)
+        finally:
+            connections.close_all()
@@ -0,0 +1,161 @@
+import functools
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, router, transaction
+
+# Устройство id шардированной записи: миллисекунды с ID_EPOCH_MS,
+# логический шард (бакет), номер процесса и счётчик внутри
+# миллисекунды. Бакет занимает те же биты, что и в id без номера
+# процесса, поэтому bucket_from_id читает и старые id.
+BUCKET_BITS = 10
+WORKER_BITS = 5
+SEQUENCE_BITS = 7
+LOCAL_BITS = WORKER_BITS + SEQUENCE_BITS
+BUCKET_COUNT = 1 << BUCKET_BITS
+WORKER_COUNT = 1 << WORKER_BITS
+SEQUENCE_COUNT = 1 << SEQUENCE_BITS
+ID_EPOCH_MS = 1735689600000
+ID_INSERT_ATTEMPTS = 3
+
+_id_lock = threading.Lock()
+_last_ms = 0
+_sequence = 0
+_pid = None
+
+
+class ShardMoving(Exception):
+    """Бакет переносится в другую базу, запись в него временно закрыта."""
+
+
+def enabled():
+    return len(settings.POST_SHARDS) > 1
+
+
+def bucket_for(key):
+    return key % BUCKET_COUNT
+
+
+def make_id(bucket):
+    """Выдаёт уникальный id, из которого можно восстановить бакет.
+
+    id растут со временем, поэтому порядок по id совпадает с порядком
+    создания, а вставки в разные базы не конфликтуют. Номер процесса
+    берётся из pid заново после fork.
+    """
+    global _last_ms, _sequence, _pid
+    with _id_lock:
+        if _pid != os.getpid():
+            _pid = os.getpid()
+            _last_ms = 0
+        now = int(time.time() * 1000) - ID_EPOCH_MS
+        if now > _last_ms:
+            _last_ms = now
+            _sequence = 0
+        else:
+            _sequence = (_sequence + 1) % SEQUENCE_COUNT
+            if _sequence == 0:
+                _last_ms += 1
+        return ((_last_ms << (BUCKET_BITS + LOCAL_BITS))
+                | (bucket << LOCAL_BITS)
+                | (_pid % WORKER_COUNT << SEQUENCE_BITS) | _sequence)
+
+
+def insert_with_id(instance, bucket, save, *args, **kwargs):
+    """Сохраняет новую запись с id из make_id.
+
+    Процессы с одинаковым pid по модулю WORKER_COUNT изредка выдают
+    один id; тогда вставка повторяется с новым id.
+    """
+    kwargs['force_insert'] = True
+    using = kwargs.get('using') or router.db_for_write(
+        type(instance), instance=instance)
+    manager = type(instance)._base_manager.using(using)
+    for attempt in range(ID_INSERT_ATTEMPTS):
+        instance.pk = make_id(bucket)
+        try:
+            with transaction.atomic(using=using):
+                return save(*args, **kwargs)
+        except IntegrityError:
+            if (attempt == ID_INSERT_ATTEMPTS - 1
+                    or not manager.filter(pk=instance.pk).exists()):
+                raise
+
+
+def bucket_from_id(pk):
+    """Бакет из id, выданного make_id; для старых id — None."""
+    if pk >> (BUCKET_BITS + LOCAL_BITS) == 0:
+        return None
+    return (pk >> LOCAL_BITS) % BUCKET_COUNT
+
+
+def on_database(queryset, database):
+    """Направляет queryset в database.
+
+    В дополнительных шардах нет пользователей и групп, поэтому
+    select_related там заменяется на prefetch_related из основной базы.
+    None оставляет выбор базы роутерам.
+    """
+    if database is None:
+        return queryset
+    queryset = queryset.using(database)
+    related = queryset.query.select_related
+    if database == DEFAULT_DB_ALIAS or not isinstance(related, dict):
+        return queryset
+    return queryset.select_related(None).prefetch_related(*related)
+
+
+class MergedQuerySet:
+    """Объединяет querysets из разных баз в порядке ordering модели.
+
+    Срез [start:stop] берёт первые stop строк каждой базы и сливает их
+    k-way merge, поэтому годится как object_list для Paginator.
+    """
+
+    def __init__(self, querysets, ordering=None):
+        ordering = ordering or querysets[0].model._meta.ordering
+        self.ordering = [(name.lstrip('-'), name.startswith('-'))
+                         for name in ordering]
+        self.querysets = [queryset.order_by(*ordering)
+                          for queryset in querysets]
+        self.key = functools.cmp_to_key(self.compare)
+
+    def compare(self, first, second):
+        for field, descending in self.ordering:
+            first_value = getattr(first, field)
+            second_value = getattr(second, field)
+            if first_value != second_value:
+                before = ((first_value > second_value) if descending
+                          else (first_value < second_value))
+                return -1 if before else 1
+        return 0
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        sources = [queryset if stop is None else queryset[:stop]
+                   for queryset in self.querysets]
+        merged = heapq.merge(*sources, key=self.key)
+        return list(itertools.islice(merged, start, stop))
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def count(self):
+        return sum(queryset.count() for queryset in self.querysets)
+
+
+def scatter(queryset, databases=None):
+    """Выполняет queryset во всех шардах или в перечисленных базах."""
+    if not enabled():
+        return queryset
+    querysets = [on_database(queryset, database)
+                 for database in databases or settings.POST_SHARDS]
+    if len(querysets) == 1:
+        return querysets[0]
+    return MergedQuerySet(querysets)
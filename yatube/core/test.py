@@ -1,4 +1,35 @@
-from django.test import TestCase, Client
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test import (TestCase, TransactionTestCase, Client,
+                         RequestFactory, override_settings)
+from django.urls import reverse
+
+from posts import views as posts_views
+from posts.models import Comment, Post
+
+from .db_router import ReadReplicaRouter, reset_state, track_writes
+from .middleware.replicas import PIN_SESSION_KEY, ReplicaRoutingMiddleware
+from .middleware.slow_queries import SlowQueryLogger, stop_listener
+from .pagination import WindowedPaginator
+from .sharding import MergedQuerySet, bucket_for, bucket_from_id, make_id
+from .views import csrf_failure
+
+User = get_user_model()
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
 class Core404Tests(TestCase):
@@ -8,3 +39,260 @@ class Core404Tests(TestCase):
     def test_404_page_exist(self):
         response = self.guest_client.get('ugabuga')
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+@override_settings(PROFILER_DIR=TEMP_DIR)
+class ProfilerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_staff_request_is_profiled(self):
+        response = self.staff_client.get(reverse('posts:index') + '?profile')
+        name = response['X-Profile']
+        self.assertTrue(name.endswith('-posts-index.folded'))
+        self.assertTrue(os.path.isfile(os.path.join(TEMP_DIR, name)))
+
+    def test_header_enables_profiling(self):
+        response = self.staff_client.get(reverse('posts:index'),
+                                         HTTP_X_PROFILE='1')
+        self.assertIn('X-Profile', response)
+
+    def test_regular_user_is_not_profiled(self):
+        response = self.authorized_client.get(
+            reverse('posts:index') + '?profile')
+        self.assertNotIn('X-Profile', response)
+        self.assertFalse(os.path.exists(TEMP_DIR))
+
+    def test_profiles_page_lists_profiles(self):
+        name = self.staff_client.get('/?profile')['X-Profile']
+        response = self.staff_client.get(reverse('core:profiles'))
+        self.assertContains(response, name)
+        response = self.staff_client.get(
+            reverse('core:profile_download', kwargs={'name': name}))
+        self.assertEqual(response['Content-Type'], 'text/plain')
+
+    def test_profiles_page_is_staff_only(self):
+        response = self.authorized_client.get(reverse('core:profiles'))
+        self.assertEqual(response.status_code, 302)
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0,
+                   SLOW_QUERY_LOG_FILE=os.path.join(TEMP_DIR,
+                                                    'slow.log'))
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        stop_listener()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        stop_listener()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def read_log(self):
+        stop_listener()
+        with open(os.path.join(TEMP_DIR, 'slow.log')) as file:
+            return [json.loads(line.split(' ', 2)[2]) for line in file]
+
+    def test_slow_queries_are_attributed(self):
+        Client().get(reverse('posts:profile', kwargs={'username': 'auth'}))
+        entries = self.read_log()
+        self.assertTrue(all(entry['url_name'] == 'posts:profile'
+                            for entry in entries))
+        frames = {entry['python'].split(':')[0] for entry in entries}
+        self.assertIn(os.path.join('posts', 'views.py'), frames)
+        self.assertTrue(all(entry['plan'] for entry in entries
+                            if entry['sql'].startswith('SELECT')))
+
+    def test_template_queries_are_attributed(self):
+        request = RequestFactory().get('/')
+        request.resolver_match = None
+        with connection.execute_wrapper(SlowQueryLogger(request,
+                                                        connection)):
+            render_to_string('includes/comment_list.html', {
+                'comments': Comment.objects.select_related('author'),
+            })
+        entry, = self.read_log()
+        self.assertTrue(
+            entry['template'].startswith('includes/comment_list.html:'))
+
+
+@override_settings(PAGINATOR_WINDOW=2)
+class WindowedPaginatorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_page_window_is_bounded(self):
+        paginator = WindowedPaginator(list(range(500)), 10)
+        paginator.get_page(25)
+        self.assertEqual(paginator.page_window,
+                         [1, None, 23, 24, 25, 26, 27, None, 50])
+
+    def test_stale_count_does_not_break_pages(self):
+        user = User.objects.create_user(username='auth')
+        Post.objects.create(author=user, text='Тестовый пост')
+        posts = Post.objects.all()
+        WindowedPaginator(posts, 10).count
+        Post.objects.bulk_create(
+            Post(author=user, text='Тестовый пост') for _ in range(14))
+        paginator = WindowedPaginator(posts, 10)
+        self.assertEqual(paginator.count, 1)
+        page = paginator.get_page(2)
+        self.assertEqual(len(page), 5)
+        self.assertFalse(page.has_next())
+        self.assertEqual(paginator.num_pages, 2)
+
+    def test_page_past_the_end_falls_back(self):
+        paginator = WindowedPaginator(list(range(15)), 10)
+        page = paginator.get_page(7)
+        self.assertEqual(page.number, 2)
+        self.assertEqual(len(page), 5)
+
+
+class SQLiteSetupTests(TestCase):
+    def test_pragmas_applied_to_connection(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0],
+                             settings.SQLITE_PRAGMAS['busy_timeout'])
+
+
+class DbMaintainTests(TransactionTestCase):
+    def test_dbmaintain(self):
+        out = StringIO()
+        call_command('dbmaintain', stdout=out)
+        self.assertIn('ANALYZE', out.getvalue())
+        self.assertIn('incremental_vacuum', out.getvalue())
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def tearDown(self):
+        reset_state()
+
+    def route_view(self, view, method='get', session=None):
+        request = getattr(RequestFactory(), method)('/')
+        request.session = session or {}
+        ReplicaRoutingMiddleware(None).process_view(request, view, (), {})
+        return ReadReplicaRouter().db_for_read(Post)
+
+    def test_reads_of_posts_views_go_to_replica(self):
+        self.assertEqual(self.route_view(posts_views.index), 'replica')
+
+    def test_writes_and_other_views_use_primary(self):
+        self.assertEqual(self.route_view(posts_views.index, 'post'),
+                         'default')
+        self.assertEqual(self.route_view(csrf_failure), 'default')
+
+    def test_reads_after_write_use_primary(self):
+        self.route_view(posts_views.index)
+        with connection.execute_wrapper(track_writes):
+            Post.objects.create(author=self.user, text='Новый пост')
+        self.assertEqual(ReadReplicaRouter().db_for_read(Post), 'default')
+
+    def test_pinned_session_reads_from_primary(self):
+        session = {PIN_SESSION_KEY: time.time() + 10}
+        self.assertEqual(self.route_view(posts_views.index, session=session),
+                         'default')
+
+    def comment(self):
+        client = Client()
+        client.force_login(self.user)
+        client.post(reverse('posts:add_comment',
+                            kwargs={'post_id': self.post.id}),
+                    {'text': 'Комментарий'})
+        return client.session
+
+    def test_write_pins_session(self):
+        self.assertGreater(self.comment()[PIN_SESSION_KEY], time.time())
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_pin_without_replicas(self):
+        self.assertNotIn(PIN_SESSION_KEY, self.comment())
+
+
+class ShardingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.first = User.objects.create_user(username='first')
+        cls.second = User.objects.create_user(username='second')
+        for number in range(6):
+            Post.objects.create(
+                author=cls.first if number % 2 else cls.second,
+                text=f'Пост {number}')
+
+    def test_ids_keep_bucket_and_grow(self):
+        ids = [make_id(7) for _ in range(5000)]
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertEqual({bucket_from_id(pk) for pk in ids}, {7})
+
+    def test_merge_matches_single_query(self):
+        merged = MergedQuerySet([
+            Post.objects.filter(author=self.first),
+            Post.objects.filter(author=self.second),
+        ])
+        expected = list(Post.objects.all())
+        self.assertEqual(list(merged), expected)
+        self.assertEqual(merged[2:5], expected[2:5])
+        self.assertEqual(merged[1], expected[1])
+        self.assertEqual(merged.count(), len(expected))
+
+    def test_merge_breaks_ties_like_model_ordering(self):
+        Post.objects.update(pub_date=Post.objects.first().pub_date)
+        merged = MergedQuerySet([
+            Post.objects.filter(author=self.first),
+            Post.objects.filter(author=self.second),
+        ])
+        self.assertEqual(list(merged), list(Post.objects.all()))
+
+    @override_settings(POST_SHARDS=['default', 'default'])
+    def test_taken_id_is_replaced(self):
+        taken = Post.objects.first()
+        fresh = make_id(bucket_for(self.first.pk))
+        with mock.patch('core.sharding.make_id',
+                        side_effect=[taken.pk, fresh]):
+            post = Post.objects.create(author=self.first, text='Новый')
+        self.assertEqual(post.pk, fresh)
+        self.assertEqual(Post.objects.get(pk=taken.pk).text, taken.text)
+
+    def test_paginator_accepts_merged_querysets(self):
+        merged = MergedQuerySet([
+            Post.objects.filter(author=self.first),
+            Post.objects.filter(author=self.second),
+        ])
+        paginator = WindowedPaginator(merged, 4)
+        page = paginator.get_page(2)
+        self.assertEqual(len(page), 2)
+        self.assertEqual(paginator.count, 6)
+        self.assertFalse(page.has_next())
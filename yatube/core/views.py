@@ -1,5 +1,13 @@
+import datetime
+import os
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404
 from django.shortcuts import render
 
+from .middleware.profiler import PROFILE_EXTENSION, list_profiles
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -7,3 +15,26 @@ def page_not_found(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+@staff_member_required
+def profiles(request):
+    profiles = list_profiles()
+    for profile in profiles:
+        profile['created'] = datetime.datetime.fromtimestamp(
+            profile['created'], tz=datetime.timezone.utc)
+    context = {
+        'title': 'Профили запросов',
+        'profiles': profiles,
+        'request_param': settings.PROFILER_QUERY_PARAM,
+    }
+    return render(request, 'core/profiles.html', context)
+
+
+@staff_member_required
+def profile_download(request, name):
+    path = os.path.join(settings.PROFILER_DIR, os.path.basename(name))
+    if not name.endswith(PROFILE_EXTENSION) or not os.path.isfile(path):
+        raise Http404
+    return FileResponse(open(path, 'rb'), as_attachment=True,
+                        content_type='text/plain')
@@ -0,0 +1,34 @@
+from django.contrib import admin
+
+from .models import Job, OutboxEmail, PeriodicRun
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'attempts',
+        'run_at',
+        'locked_by',
+    )
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'dedup_key')
+
+
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'to',
+        'subject',
+        'status',
+        'attempts',
+        'send_after',
+    )
+    list_filter = ('status',)
+    search_fields = ('to', 'subject')
+
+
+admin.site.register(Job, JobAdmin)
+admin.site.register(OutboxEmail, OutboxEmailAdmin)
+admin.site.register(PeriodicRun)
@@ -0,0 +1,84 @@
+import datetime
+import functools
+
+from django.utils import timezone
+
+# Минуты, часы, дни месяца, месяцы, дни недели (0 — воскресенье).
+FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+
+def parse_field(field, low, high):
+    """Множество значений поля: *, */n, a, a-b, a-b/n и списки через
+    запятую."""
+    # В днях недели 7 — тоже воскресенье.
+    top = 7 if high == 6 else high
+    values = set()
+    for part in field.split(','):
+        step = 1
+        if '/' in part:
+            part, step = part.split('/')
+            step = int(step)
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = map(int, part.split('-'))
+        else:
+            start = end = int(part)
+            if step != 1:
+                end = high
+        if not low <= start <= end <= top or step < 1:
+            raise ValueError(f'Недопустимое поле расписания: {field}')
+        values.update(range(start, end + 1, step))
+    if 7 in values:
+        values.add(0)
+    return values
+
+
+class Cron:
+    """Расписание в формате cron: «минута час день месяц день_недели».
+
+    Время считается в часовом поясе TIME_ZONE.
+    """
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != len(FIELDS):
+            raise ValueError(f'Ожидалось пять полей: {expression}')
+        (self.minutes, self.hours, self.days, self.months,
+         self.weekdays) = (parse_field(field, *bounds)
+                           for field, bounds in zip(fields, FIELDS))
+        # Как в cron: если заданы и день месяца, и день недели,
+        # достаточно совпадения одного из них.
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    def day_matches(self, moment):
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, moment):
+        """Ближайшее время запуска строго позже moment."""
+        moment = timezone.localtime(moment).replace(second=0, microsecond=0)
+        moment += datetime.timedelta(minutes=1)
+        limit = moment + datetime.timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months or not self.day_matches(
+                    moment):
+                moment = (moment + datetime.timedelta(days=1)).replace(
+                    hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + datetime.timedelta(hours=1)).replace(
+                    minute=0)
+            elif moment.minute not in self.minutes:
+                moment += datetime.timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError('Расписание никогда не срабатывает.')
+
+
+@functools.lru_cache(maxsize=None)
+def parse(expression):
+    return Cron(expression)
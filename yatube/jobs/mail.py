@@ -0,0 +1,123 @@
+import datetime
+import json
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboxEmail
+from .queue import backoff, enqueue
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_FIELDS = ('subject', 'body', 'from_email', 'to', 'cc', 'bcc',
+                  'reply_to', 'extra_headers', 'alternatives')
+
+
+def outbox():
+    return OutboxEmail.objects.using(DEFAULT_DB_ALIAS)
+
+
+def dump_message(message):
+    if message.attachments:
+        raise ValueError('Письма с вложениями через outbox не отправляются.')
+    return json.dumps({name: getattr(message, name, [])
+                       for name in MESSAGE_FIELDS})
+
+
+def load_message(payload, connection):
+    fields = json.loads(payload)
+    fields['headers'] = fields.pop('extra_headers')
+    fields['alternatives'] = [tuple(part) for part in fields['alternatives']]
+    return EmailMultiAlternatives(connection=connection, **fields)
+
+
+class OutboxBackend(BaseEmailBackend):
+    """Почтовый бэкенд, который только записывает письма в outbox.
+
+    Отправляет их задача jobs.tasks.send_outbox через
+    OUTBOX_EMAIL_BACKEND, поэтому медленный SMTP не задерживает ответ
+    пользователю.
+    """
+
+    def send_messages(self, email_messages):
+        emails = [
+            OutboxEmail(to=', '.join(message.recipients()),
+                        subject=message.subject[:998],
+                        payload=dump_message(message))
+            for message in email_messages if message.recipients()
+        ]
+        if not emails:
+            return 0
+        outbox().bulk_create(emails)
+        transaction.on_commit(
+            lambda: enqueue('jobs.tasks.send_outbox', dedup_key='outbox'),
+            using=DEFAULT_DB_ALIAS)
+        return len(emails)
+
+
+def claim_emails(batch_size):
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    ready = (Q(status=OutboxEmail.PENDING, send_after__lte=now)
+             | Q(status=OutboxEmail.SENDING, locked_until__lt=now))
+    batch = outbox().filter(ready).order_by('send_after', 'id').values('id')
+    claimed = outbox().filter(id__in=batch[:batch_size]).update(
+        status=OutboxEmail.SENDING,
+        locked_by=token,
+        locked_until=now + datetime.timedelta(
+            seconds=settings.JOB_LEASE_SECONDS),
+    )
+    if not claimed:
+        return []
+    return list(outbox().filter(locked_by=token))
+
+
+def release(email, error):
+    """Возвращает письмо в очередь с отсрочкой или, когда попытки
+    кончились, помечает неотправленным."""
+    attempts = email.attempts + 1
+    owned = outbox().filter(pk=email.pk, locked_by=email.locked_by)
+    if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        owned.update(status=OutboxEmail.FAILED, attempts=attempts,
+                     locked_until=None, last_error=str(error))
+    else:
+        owned.update(status=OutboxEmail.PENDING, attempts=attempts,
+                     locked_until=None,
+                     send_after=timezone.now() + backoff(attempts),
+                     last_error=str(error))
+
+
+def send_batch(emails):
+    """Отправляет пачку писем через одно соединение с почтовым сервером.
+
+    Если соединение не открылось, попытка засчитывается всей пачке.
+    """
+    connection = get_connection(settings.OUTBOX_EMAIL_BACKEND)
+    try:
+        connection.open()
+    except Exception as error:
+        logger.warning('Почтовый сервер недоступен: %s', error)
+        for email in emails:
+            release(email, error)
+        return 0
+    sent = 0
+    try:
+        for email in emails:
+            try:
+                connection.send_messages(
+                    [load_message(email.payload, connection)])
+            except Exception as error:
+                logger.warning('Письмо %s не отправлено: %s', email.pk, error)
+                release(email, error)
+                continue
+            outbox().filter(pk=email.pk, locked_by=email.locked_by).delete()
+            sent += 1
+    finally:
+        connection.close()
+    return sent
@@ -0,0 +1,61 @@
+import multiprocessing
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from jobs.worker import work
+
+
+class Command(BaseCommand):
+    help = ('Запускает воркеры фоновых задач из очереди jobs и '
+            'периодические задачи из JOB_SCHEDULE.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Число процессов-воркеров.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.JOB_BATCH_SIZE,
+            help='Сколько задач воркер захватывает за раз.',
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выйти, когда очередь опустеет.',
+        )
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        if processes < 1 or options['batch_size'] < 1:
+            raise CommandError('Нужен хотя бы один процесс и одна задача.')
+        worker_args = (options['batch_size'], settings.JOB_POLL_INTERVAL)
+        stop = threading.Event() if processes == 1 else (
+            multiprocessing.Event())
+        handlers = {signum: signal.signal(signum, lambda *args: stop.set())
+                    for signum in (signal.SIGINT, signal.SIGTERM)}
+        try:
+            if processes == 1:
+                work(*worker_args, stop, options['burst'])
+            else:
+                self.run_processes(processes, worker_args, stop,
+                                   options['burst'])
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
+    def run_processes(self, processes, worker_args, stop, burst):
+        # Соединения SQLite нельзя делить между процессами.
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=work,
+                                    args=(*worker_args, stop, burst))
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'Запущено воркеров: {processes}')
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,97 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Фоновая задача в очереди.
+
+    Успешно выполненные задачи удаляются, окончательно упавшие остаются
+    со статусом FAILED и текстом последней ошибки.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=200)
+    payload = models.TextField('Аргументы в JSON', default='{}')
+    status = models.CharField('Статус', max_length=10, choices=STATUSES,
+                              default=QUEUED)
+    dedup_key = models.CharField(
+        'Ключ дедупликации', max_length=200, unique=True,
+        null=True, blank=True,
+        help_text='Пока задача не выполнена, вторая с тем же ключом '
+                  'не ставится.',
+    )
+    run_at = models.DateTimeField('Выполнить после', default=timezone.now)
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveIntegerField('Максимум попыток',
+                                               default=5)
+    locked_by = models.CharField('Захвачена', max_length=64, blank=True)
+    locked_until = models.DateTimeField('Захвачена до', null=True,
+                                        blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+
+    class Meta:
+        ordering = ['run_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_at'],
+                         name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
+
+
+class PeriodicRun(models.Model):
+    """Время последнего запуска периодической задачи из JOB_SCHEDULE."""
+    name = models.CharField('Расписание', max_length=100, primary_key=True)
+    last_run = models.DateTimeField('Последний запуск')
+
+    def __str__(self):
+        return self.name
+
+
+class OutboxEmail(models.Model):
+    """Письмо, ожидающее отправки фоновым воркером.
+
+    Отправленные письма удаляются, окончательно не отправленные
+    остаются со статусом FAILED.
+    """
+    PENDING = 'pending'
+    SENDING = 'sending'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ожидает'),
+        (SENDING, 'Отправляется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    to = models.TextField('Получатели')
+    subject = models.CharField('Тема', max_length=998)
+    payload = models.TextField('Письмо в JSON')
+    status = models.CharField('Статус', max_length=10, choices=STATUSES,
+                              default=PENDING)
+    send_after = models.DateTimeField('Отправить после',
+                                      default=timezone.now)
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    locked_by = models.CharField('Захвачено', max_length=64, blank=True)
+    locked_until = models.DateTimeField('Захвачено до', null=True,
+                                        blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+
+    class Meta:
+        ordering = ['send_after', 'id']
+        indexes = [
+            models.Index(fields=['status', 'send_after'],
+                         name='outbox_status_send_after_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} → {self.to}'
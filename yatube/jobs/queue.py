@@ -0,0 +1,122 @@
+import datetime
+import functools
+import json
+import logging
+import random
+import traceback
+import uuid
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(func=None, *, max_attempts=None):
+    """Регистрирует функцию как фоновую задачу.
+
+    У функции появляется delay(*args, **kwargs), который ставит вызов
+    в очередь. Аргументы должны сериализоваться в JSON.
+    """
+    def decorator(func):
+        func.job_name = f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts
+        func.delay = functools.partial(enqueue, func)
+        _registry[func.job_name] = func
+        return func
+    return decorator if func is None else decorator(func)
+
+
+def get_task(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f'Задача {name} не зарегистрирована.')
+
+
+def jobs():
+    # Очередь живёт только в основной базе, мимо реплик и шардов.
+    return Job.objects.using(DEFAULT_DB_ALIAS)
+
+
+def enqueue(func, *args, dedup_key=None, run_at=None, **kwargs):
+    """Ставит задачу в очередь и возвращает её Job.
+
+    Пока задача с тем же dedup_key не выполнена, вторая не создаётся:
+    возвращается уже стоящая в очереди.
+    """
+    if isinstance(func, str):
+        func = get_task(func)
+    job = Job(
+        name=func.job_name,
+        payload=json.dumps({'args': args, 'kwargs': kwargs}),
+        dedup_key=dedup_key,
+        max_attempts=func.max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_at=run_at or timezone.now(),
+    )
+    if dedup_key is None:
+        job.save(using=DEFAULT_DB_ALIAS)
+        return job
+    try:
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            job.save(using=DEFAULT_DB_ALIAS)
+    except IntegrityError:
+        return jobs().filter(dedup_key=dedup_key).first() or enqueue(
+            func, *args, dedup_key=dedup_key, run_at=run_at, **kwargs)
+    return job
+
+
+def claim(worker, batch_size):
+    """Захватывает до batch_size готовых задач одним UPDATE.
+
+    Задачи, чья аренда истекла (воркер упал), захватываются повторно.
+    """
+    now = timezone.now()
+    token = f'{worker}:{uuid.uuid4().hex[:8]}'
+    ready = (Q(status=Job.QUEUED, run_at__lte=now)
+             | Q(status=Job.RUNNING, locked_until__lt=now))
+    batch = jobs().filter(ready).order_by('run_at', 'id').values('id')
+    claimed = jobs().filter(id__in=batch[:batch_size]).update(
+        status=Job.RUNNING,
+        locked_by=token,
+        locked_until=now + datetime.timedelta(
+            seconds=settings.JOB_LEASE_SECONDS),
+        attempts=F('attempts') + 1,
+    )
+    if not claimed:
+        return []
+    return list(jobs().filter(locked_by=token))
+
+
+def backoff(attempts):
+    """Пауза перед повтором: экспонента с потолком и случайным разбросом."""
+    delay = min(settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+                settings.JOB_RETRY_MAX_SECONDS)
+    return datetime.timedelta(seconds=delay * random.uniform(1, 1.5))
+
+
+def run_job(job):
+    """Выполняет захваченную задачу; успешная удаляется из очереди."""
+    owned = jobs().filter(pk=job.pk, locked_by=job.locked_by)
+    try:
+        payload = json.loads(job.payload)
+        get_task(job.name)(*payload['args'], **payload['kwargs'])
+    except Exception:
+        logger.exception('Задача %s упала', job)
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            owned.update(status=Job.FAILED, dedup_key=None,
+                         locked_until=None, last_error=error)
+        else:
+            owned.update(status=Job.QUEUED, locked_until=None,
+                         run_at=timezone.now() + backoff(job.attempts),
+                         last_error=error)
+        return False
+    owned.delete()
+    return True
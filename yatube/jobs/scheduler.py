@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from .cron import parse
+from .models import PeriodicRun
+from .queue import enqueue
+
+# Время следующего запуска по каждому расписанию, известное процессу:
+# до него база не опрашивается.
+_next_run = {}
+
+
+def enqueue_due(now=None):
+    """Ставит в очередь периодические задачи из JOB_SCHEDULE, чьё время
+    пришло.
+
+    Запуск закрепляется условным UPDATE строки PeriodicRun, поэтому
+    из нескольких воркеров задачу ставит ровно один. Пропущенные
+    запуски схлопываются в один.
+    """
+    now = now or timezone.now()
+    runs = PeriodicRun.objects.using(DEFAULT_DB_ALIAS)
+    enqueued = []
+    for name, entry in settings.JOB_SCHEDULE.items():
+        if name in _next_run and _next_run[name] > now:
+            continue
+        cron = parse(entry['cron'])
+        run, created = runs.get_or_create(name=name,
+                                          defaults={'last_run': now})
+        if created or cron.next_after(run.last_run) > now:
+            _next_run[name] = cron.next_after(run.last_run)
+            continue
+        _next_run[name] = cron.next_after(now)
+        if runs.filter(name=name, last_run=run.last_run).update(
+                last_run=now):
+            enqueued.append(enqueue(
+                entry['task'], *entry.get('args', ()),
+                dedup_key=f'periodic:{name}', **entry.get('kwargs', {})))
+    return enqueued
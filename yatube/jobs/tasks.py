@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management import call_command
+
+from .mail import claim_emails, send_batch
+from .queue import task
+
+
+@task(max_attempts=1)
+def run_command(name, *args):
+    """Запускает команду manage.py; используется в JOB_SCHEDULE."""
+    call_command(name, *args)
+
+
+@task
+def send_outbox():
+    """Разбирает outbox пачками, пока в нём есть готовые письма.
+
+    Письма, записанные уже после последней пачки, подберёт запуск
+    по расписанию из JOB_SCHEDULE.
+    """
+    sent = 0
+    while True:
+        emails = claim_emails(settings.OUTBOX_BATCH_SIZE)
+        if not emails:
+            return sent
+        sent += send_batch(emails)
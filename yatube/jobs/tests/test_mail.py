@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail import EmailMessage, send_mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import OutboxEmail
+from ..tasks import send_outbox
+
+User = get_user_model()
+
+opened = []
+
+
+class CountingBackend(EmailBackend):
+    def open(self):
+        opened.append(self)
+        return super().open()
+
+
+class UnreachableBackend(EmailBackend):
+    def open(self):
+        raise ConnectionRefusedError('SMTP не отвечает')
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+@override_settings(
+    EMAIL_BACKEND='jobs.mail.OutboxBackend',
+    OUTBOX_EMAIL_BACKEND='jobs.tests.test_mail.CountingBackend',
+)
+class OutboxTests(TestCase):
+    def setUp(self):
+        opened.clear()
+
+    def test_password_reset_writes_to_outbox(self):
+        User.objects.create_user(username='auth', email='auth@example.com',
+                                 password='secret-password')
+        self.client.post(reverse('users:password_reset'),
+                         {'email': 'auth@example.com'})
+        self.assertEqual(mail.outbox, [])
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.to, 'auth@example.com')
+        self.assertEqual(send_outbox(), 1)
+        self.assertEqual(mail.outbox[0].to, ['auth@example.com'])
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    @override_settings(OUTBOX_BATCH_SIZE=2)
+    def test_batch_reuses_one_connection(self):
+        for number in range(4):
+            send_mail(f'Письмо {number}', 'Текст', 'site@example.com',
+                      [f'user{number}@example.com'])
+        self.assertEqual(send_outbox(), 4)
+        self.assertEqual(len(opened), 2)
+        self.assertEqual([message.subject for message in mail.outbox],
+                         [f'Письмо {number}' for number in range(4)])
+
+    def test_message_fields_survive_outbox(self):
+        message = EmailMessage('Тема', 'Текст', 'site@example.com',
+                               ['to@example.com'], cc=['cc@example.com'],
+                               headers={'X-Tag': 'reset'})
+        message.send()
+        send_outbox()
+        [sent] = mail.outbox
+        self.assertEqual(sent.cc, ['cc@example.com'])
+        self.assertEqual(sent.extra_headers, {'X-Tag': 'reset'})
+        self.assertEqual(sent.body, 'Текст')
+
+    @override_settings(
+        OUTBOX_EMAIL_BACKEND='jobs.tests.test_mail.FailingBackend',
+        OUTBOX_MAX_ATTEMPTS=2,
+    )
+    def test_failed_email_is_retried_then_kept(self):
+        send_mail('Тема', 'Текст', 'site@example.com', ['to@example.com'])
+        with self.assertLogs('jobs.mail', 'WARNING'):
+            self.assertEqual(send_outbox(), 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.status, OutboxEmail.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.send_after, timezone.now())
+        OutboxEmail.objects.update(send_after=timezone.now())
+        with self.assertLogs('jobs.mail', 'WARNING'):
+            send_outbox()
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.FAILED)
+        self.assertIn('SMTP недоступен', email.last_error)
+
+    @override_settings(
+        OUTBOX_EMAIL_BACKEND='jobs.tests.test_mail.UnreachableBackend',
+        OUTBOX_MAX_ATTEMPTS=2,
+    )
+    def test_unreachable_server_counts_attempt_for_batch(self):
+        for number in range(2):
+            send_mail(f'Письмо {number}', 'Текст', 'site@example.com',
+                      [f'user{number}@example.com'])
+        with self.assertLogs('jobs.mail', 'WARNING'):
+            self.assertEqual(send_outbox(), 0)
+        for email in OutboxEmail.objects.all():
+            self.assertEqual(email.status, OutboxEmail.PENDING)
+            self.assertEqual(email.attempts, 1)
+            self.assertIsNone(email.locked_until)
+        OutboxEmail.objects.update(send_after=timezone.now())
+        with self.assertLogs('jobs.mail', 'WARNING'):
+            send_outbox()
+        self.assertEqual(
+            set(OutboxEmail.objects.values_list('status', flat=True)),
+            {OutboxEmail.FAILED})
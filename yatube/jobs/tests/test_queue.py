@@ -0,0 +1,124 @@
+import datetime
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import scheduler
+from ..cron import Cron
+from ..models import Job, PeriodicRun
+from ..queue import claim, enqueue, run_job, task
+
+calls = []
+
+
+@task
+def record(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def explode():
+    raise RuntimeError('Сбой задачи')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def run_workers(self):
+        call_command('run_workers', '--burst', stdout=StringIO())
+
+    def test_worker_runs_and_removes_job(self):
+        record.delay('раз')
+        enqueue(record, value='два')
+        self.run_workers()
+        self.assertEqual(calls, ['раз', 'два'])
+        self.assertFalse(Job.objects.exists())
+
+    def test_dedup_key_keeps_single_pending_job(self):
+        first = record.delay(1, dedup_key='record')
+        second = record.delay(2, dedup_key='record')
+        self.assertEqual(first.pk, second.pk)
+        self.run_workers()
+        self.assertEqual(calls, [1])
+        record.delay(3, dedup_key='record')
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_claim_takes_batch_of_ready_jobs(self):
+        for value in range(3):
+            record.delay(value)
+        record.delay(
+            'позже', run_at=timezone.now() + datetime.timedelta(hours=1))
+        claimed = claim('test', batch_size=2)
+        self.assertEqual(len(claimed), 2)
+        self.assertEqual({job.status for job in claimed}, {Job.RUNNING})
+        self.assertEqual(len(claim('test', batch_size=10)), 1)
+
+    def test_expired_lease_is_claimed_again(self):
+        record.delay('потерянная')
+        [job] = claim('dead', batch_size=1)
+        self.assertEqual(claim('alive', batch_size=1), [])
+        Job.objects.update(locked_until=timezone.now()
+                           - datetime.timedelta(seconds=1))
+        [job] = claim('alive', batch_size=1)
+        self.assertEqual(job.attempts, 2)
+
+    def test_failed_job_retries_with_backoff_then_fails(self):
+        explode.delay(dedup_key='explode')
+        [job] = claim('test', batch_size=1)
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertFalse(run_job(job))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('Сбой задачи', job.last_error)
+        Job.objects.update(run_at=timezone.now())
+        [job] = claim('test', batch_size=1)
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIsNone(job.dedup_key)
+
+
+@override_settings(JOB_SCHEDULE={
+    'record': {'cron': '*/15 * * * *',
+               'task': 'jobs.tests.test_queue.record', 'args': ['cron']},
+})
+class SchedulerTests(TestCase):
+    def setUp(self):
+        scheduler._next_run.clear()
+        self.start = timezone.make_aware(datetime.datetime(2026, 1, 5, 10, 7))
+
+    def test_due_job_is_enqueued_once(self):
+        self.assertEqual(scheduler.enqueue_due(self.start), [])
+        self.assertEqual(scheduler.enqueue_due(
+            self.start + datetime.timedelta(minutes=5)), [])
+        later = self.start + datetime.timedelta(minutes=9)
+        [job] = scheduler.enqueue_due(later)
+        self.assertEqual(job.dedup_key, 'periodic:record')
+        scheduler._next_run.clear()
+        self.assertEqual(scheduler.enqueue_due(later), [])
+        self.assertEqual(PeriodicRun.objects.get().last_run, later)
+
+    def test_cron_next_after(self):
+        cases = (
+            ('*/15 * * * *', datetime.datetime(2026, 1, 5, 10, 15)),
+            ('30 3 * * *', datetime.datetime(2026, 1, 6, 3, 30)),
+            ('0 4 * * 0', datetime.datetime(2026, 1, 11, 4, 0)),
+            ('0 0 1,15 * 1', datetime.datetime(2026, 1, 12, 0, 0)),
+            ('0 9-17/4 * 2 *', datetime.datetime(2026, 2, 1, 9, 0)),
+        )
+        for expression, expected in cases:
+            with self.subTest(expression=expression):
+                self.assertEqual(Cron(expression).next_after(self.start),
+                                 timezone.make_aware(expected))
+
+    def test_invalid_cron(self):
+        for expression in ('* * * *', '60 * * * *', '*/0 * * * *'):
+            with self.subTest(expression=expression):
+                with self.assertRaises(ValueError):
+                    Cron(expression)
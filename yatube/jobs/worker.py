@@ -0,0 +1,36 @@
+import logging
+import os
+import socket
+
+from django.db import close_old_connections
+
+from core.db_router import reset_state
+
+from .queue import claim, run_job
+from .scheduler import enqueue_due
+
+logger = logging.getLogger(__name__)
+
+
+def work(batch_size, poll_interval, stop, burst=False):
+    """Цикл воркера: расписание, захват пачки задач, выполнение.
+
+    stop — threading.Event или multiprocessing.Event. С burst=True
+    воркер выходит, как только очередь опустеет.
+    """
+    worker = f'{socket.gethostname()}:{os.getpid()}'
+    reset_state()
+    while not stop.is_set():
+        close_old_connections()
+        try:
+            enqueue_due()
+            claimed = claim(worker, batch_size)
+            for job in claimed:
+                run_job(job)
+        except Exception:
+            logger.exception('Сбой воркера %s', worker)
+            claimed = []
+        if not claimed:
+            if burst:
+                return
+            stop.wait(poll_interval)
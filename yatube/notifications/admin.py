@@ -0,0 +1,18 @@
+from django.contrib import admin
+
+from .models import Notification
+
+
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'recipient',
+        'kind',
+        'count',
+        'read',
+        'updated',
+    )
+    list_filter = ('kind', 'read')
+
+
+admin.site.register(Notification, NotificationAdmin)
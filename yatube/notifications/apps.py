@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+from django.core.signals import request_finished
+
+
+class NotificationsConfig(AppConfig):
+    name = 'notifications'
+
+    def ready(self):
+        from .buffer import flush
+        request_finished.connect(flush, dispatch_uid='notifications.flush')
@@ -0,0 +1,57 @@
+import threading
+import time
+
+from django.conf import settings
+
+from jobs.queue import enqueue
+
+_lock = threading.Lock()
+# (получатель, вид, объект) -> [число событий, последний автор].
+_events = {}
+_since = None
+
+
+def notify(recipient_id, kind, target_id=None, actor=''):
+    """Добавляет событие в буфер процесса.
+
+    Буфер уходит в очередь одной задачей deliver, когда копится
+    дольше NOTIFICATION_FLUSH_SECONDS или набирает
+    NOTIFICATION_BUFFER_SIZE получателей и объектов. При остановке
+    процесса несброшенные события теряются.
+    """
+    global _since
+    with _lock:
+        event = _events.setdefault((recipient_id, kind, target_id), [0, ''])
+        event[0] += 1
+        event[1] = actor
+        if _since is None:
+            _since = time.monotonic()
+    flush()
+
+
+def due():
+    return bool(_events) and (
+        len(_events) >= settings.NOTIFICATION_BUFFER_SIZE
+        or time.monotonic() - _since >= settings.NOTIFICATION_FLUSH_SECONDS
+    )
+
+
+def take():
+    """Забирает накопленные события, очищая буфер."""
+    global _events, _since
+    with _lock:
+        events, _events, _since = _events, {}, None
+    return [[*key, count, actor] for key, (count, actor) in events.items()]
+
+
+def flush(force=False, **kwargs):
+    """Ставит задачу deliver, если буфер пора сбросить.
+
+    Вызывается и по сигналу request_finished.
+    """
+    if not (force or due()):
+        return None
+    events = take()
+    if not events:
+        return None
+    return enqueue('notifications.tasks.deliver', events)
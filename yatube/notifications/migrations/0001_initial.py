@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('comment', 'Комментарии к посту'), ('follow', 'Новые подписчики')], max_length=10, verbose_name='Вид')),
+                ('target_id', models.BigIntegerField(blank=True, null=True, verbose_name='id объекта')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Событий')),
+                ('last_actor', models.CharField(blank=True, max_length=150, verbose_name='Последний автор события')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('read', models.BooleanField(default=False, verbose_name='Прочитано')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL, verbose_name='Получатель')),
+            ],
+            options={
+                'ordering': ['-updated', '-id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'read', 'kind', 'target_id'], name='notification_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'updated'], name='notification_recipient_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+def plural(number, one, few, many):
+    """Форма слова для числа: 1 комментарий, 2 комментария, 5 комментариев.
+    """
+    if number % 10 == 1 and number % 100 != 11:
+        return one
+    if 2 <= number % 10 <= 4 and not 12 <= number % 100 <= 14:
+        return few
+    return many
+
+
+class Notification(models.Model):
+    """Уведомление, в которое сворачиваются однотипные события.
+
+    События одного вида для одного получателя и объекта за
+    NOTIFICATION_WINDOW складываются в count одного непрочитанного
+    уведомления.
+    """
+    COMMENT = 'comment'
+    FOLLOW = 'follow'
+    KINDS = (
+        (COMMENT, 'Комментарии к посту'),
+        (FOLLOW, 'Новые подписчики'),
+    )
+
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель',
+    )
+    kind = models.CharField('Вид', max_length=10, choices=KINDS)
+    # id поста без внешнего ключа: посты могут лежать в другом шарде.
+    target_id = models.BigIntegerField('id объекта', null=True, blank=True)
+    count = models.PositiveIntegerField('Событий', default=0)
+    last_actor = models.CharField('Последний автор события', max_length=150,
+                                  blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+    read = models.BooleanField('Прочитано', default=False)
+
+    class Meta:
+        ordering = ['-updated', '-id']
+        indexes = [
+            models.Index(fields=['recipient', 'read', 'kind', 'target_id'],
+                         name='notification_unread_idx'),
+            models.Index(fields=['recipient', 'updated'],
+                         name='notification_recipient_idx'),
+        ]
+
+    def __str__(self):
+        return self.message()
+
+    def message(self):
+        if self.kind == self.COMMENT:
+            words = ('новый комментарий', 'новых комментария',
+                     'новых комментариев')
+            return (f'{self.count} {plural(self.count, *words)} '
+                    f'к вашему посту')
+        words = ('новый подписчик', 'новых подписчика', 'новых подписчиков')
+        return f'{self.count} {plural(self.count, *words)}'
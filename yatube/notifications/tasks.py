@@ -0,0 +1,40 @@
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from jobs.queue import task
+
+from .models import Notification
+from .utils import unread_key
+
+
+@task
+def deliver(events):
+    """Сворачивает пачку событий в уведомления.
+
+    events — список [получатель, вид, объект, число событий, автор].
+    Событие добавляется к непрочитанному уведомлению того же вида,
+    начатому не раньше NOTIFICATION_WINDOW секунд назад, иначе
+    создаётся новое.
+    """
+    now = timezone.now()
+    since = now - datetime.timedelta(seconds=settings.NOTIFICATION_WINDOW)
+    notifications = Notification.objects.using(DEFAULT_DB_ALIAS)
+    created = []
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        for recipient_id, kind, target_id, count, actor in events:
+            if notifications.filter(
+                recipient_id=recipient_id, kind=kind, target_id=target_id,
+                read=False, created__gte=since,
+            ).update(count=F('count') + count, last_actor=actor,
+                     updated=now):
+                continue
+            created.append(Notification(
+                recipient_id=recipient_id, kind=kind, target_id=target_id,
+                count=count, last_actor=actor))
+        notifications.bulk_create(created)
+    cache.delete_many([unread_key(event[0]) for event in events])
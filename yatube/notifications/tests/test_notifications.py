@@ -0,0 +1,103 @@
+import datetime
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs.models import Job
+from posts.models import Post
+
+from .. import buffer
+from ..models import Notification
+from ..tasks import deliver
+
+User = get_user_model()
+
+
+@override_settings(NOTIFICATION_FLUSH_SECONDS=60)
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.other = User.objects.create_user(username='other')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        buffer.take()
+        self.clients = {}
+        for user in (self.author, self.reader, self.other):
+            self.clients[user.username] = Client()
+            self.clients[user.username].force_login(user)
+
+    def comment(self, username):
+        self.clients[username].post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            {'text': 'Комментарий'})
+
+    def deliver(self):
+        buffer.flush(force=True)
+        call_command('run_workers', '--burst', stdout=StringIO())
+
+    def test_comments_coalesce_into_one_notification(self):
+        for username in ('reader', 'other', 'reader', 'author'):
+            self.comment(username)
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(buffer.flush(force=True).name,
+                         'notifications.tasks.deliver')
+        self.assertEqual(Job.objects.count(), 1)
+        call_command('run_workers', '--burst', stdout=StringIO())
+        notification = Notification.objects.get()
+        self.assertEqual(notification.recipient, self.author)
+        self.assertEqual(notification.target_id, self.post.id)
+        self.assertEqual(notification.count, 3)
+        self.assertEqual(notification.last_actor, 'reader')
+        self.assertEqual(notification.message(),
+                         '3 новых комментария к вашему посту')
+
+    def test_later_batches_join_unread_notification(self):
+        self.comment('reader')
+        self.deliver()
+        self.comment('other')
+        self.deliver()
+        self.assertEqual(Notification.objects.get().count, 2)
+
+    def test_read_or_old_notification_is_not_extended(self):
+        self.comment('reader')
+        self.deliver()
+        Notification.objects.update(read=True)
+        self.comment('reader')
+        self.deliver()
+        Notification.objects.filter(read=False).update(
+            created=timezone.now() - datetime.timedelta(days=1))
+        self.comment('reader')
+        self.deliver()
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_follow_notifies_author_once(self):
+        url = reverse('posts:profile_follow', kwargs={'username': 'author'})
+        self.clients['reader'].get(url)
+        self.clients['reader'].get(url)
+        self.deliver()
+        notification = Notification.objects.get()
+        self.assertEqual(notification.kind, Notification.FOLLOW)
+        self.assertEqual(notification.message(), '1 новый подписчик')
+
+    def test_header_shows_unread_count_until_page_is_opened(self):
+        deliver([[self.author.id, Notification.FOLLOW, None, 5, 'reader'],
+                 [self.author.id, Notification.COMMENT, self.post.id, 2,
+                  'other']])
+        client = self.clients['author']
+        response = client.get(reverse('posts:index'))
+        self.assertEqual(response.context['unread_notifications'], 2)
+        response = client.get(reverse('notifications:index'))
+        self.assertContains(response, '5 новых подписчиков')
+        self.assertFalse(Notification.objects.filter(read=False).exists())
+        response = client.get(reverse('posts:index'))
+        self.assertEqual(response.context['unread_notifications'], 0)
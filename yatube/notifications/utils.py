@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Notification
+
+
+def unread_key(user_id):
+    return f'unread-notifications:{user_id}'
+
+
+def unread_count(user_id):
+    """Число непрочитанных уведомлений из кеша, а при промахе — COUNT
+    по индексу.
+
+    Воркер может работать в другом процессе со своим кешем, поэтому
+    значение живёт не дольше NOTIFICATION_UNREAD_TTL.
+    """
+    key = unread_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user_id,
+                                            read=False).count()
+        cache.set(key, count, settings.NOTIFICATION_UNREAD_TTL)
+    return count
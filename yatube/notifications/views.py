@@ -0,0 +1,26 @@
+from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.shortcuts import render
+
+from core.decorators import memory_budget, query_budget
+
+from .utils import unread_key
+
+NOTIFICATIONS_COUNT = 50
+PAGE_MEMORY_BUDGET = 2 * 1024 * 1024
+
+
+@query_budget(5)
+@memory_budget(PAGE_MEMORY_BUDGET)
+@login_required
+def index(request):
+    notifications = list(
+        request.user.notifications.all()[:NOTIFICATIONS_COUNT])
+    unread = [item.id for item in notifications if not item.read]
+    if unread:
+        request.user.notifications.filter(id__in=unread).update(read=True)
+        cache.delete(unread_key(request.user.id))
+    context = {
+        'notifications': notifications,
+    }
+    return render(request, 'notifications/index.html', context)
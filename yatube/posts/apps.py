@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.core.signals import request_finished
+from django.db.models.signals import post_migrate
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import follow_graph, post_views, signals  # noqa: F401
+        request_finished.connect(post_views.flush,
+                                 dispatch_uid='posts.post_views.flush')
+        # flush в тестах очищает подписки без сигналов удаления.
+        post_migrate.connect(follow_graph.reset,
+                             dispatch_uid='posts.follow_graph.reset')
@@ -0,0 +1,243 @@
+import datetime
+import threading
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import connections, models, router, transaction
+from django.http import Http404
+from django.utils import timezone
+
+from core.pagination import count_generation, invalidate_counts
+from core.sharding import MergedQuerySet, on_database
+
+from .models import ArchivedPost, Comment, Post
+
+_partitions = {}
+_partitions_lock = threading.Lock()
+
+
+def month_start(value):
+    return datetime.date(value.year, value.month, 1)
+
+
+def month_bounds(month):
+    """Начало месяца и начало следующего в текущем часовом поясе."""
+    start = timezone.make_aware(
+        datetime.datetime(month.year, month.month, 1))
+    end = timezone.make_aware(datetime.datetime(
+        month.year + month.month // 12, month.month % 12 + 1, 1))
+    return start, end
+
+
+def clone_model(model, name, db_table, relations):
+    """Неуправляемая копия model с теми же столбцами в таблице db_table."""
+    meta = type('Meta', (), {
+        'app_label': model._meta.app_label,
+        'db_table': db_table,
+        'managed': False,
+        'ordering': model._meta.ordering,
+    })
+    attrs = {'__module__': __name__, 'Meta': meta, '__str__': model.__str__}
+    for field in model._meta.local_fields:
+        _, _, args, kwargs = field.deconstruct()
+        if field.is_relation:
+            kwargs.update(
+                to=relations.get(field.name, kwargs['to']),
+                related_name='+',
+                db_constraint=False,
+            )
+        attrs[field.name] = field.__class__(*args, **kwargs)
+    return type(name, (models.Model,), attrs)
+
+
+def partition_models(month):
+    """Модели архивных таблиц постов и комментариев за месяц.
+
+    У модели поста есть атрибут comment_model с моделью комментариев
+    той же партиции.
+    """
+    suffix = month.strftime('%Y_%m')
+    with _partitions_lock:
+        if suffix not in _partitions:
+            post_model = clone_model(
+                Post, f'PostArchive{suffix}',
+                f'{Post._meta.db_table}_{suffix}', {})
+            post_model.comment_model = clone_model(
+                Comment, f'CommentArchive{suffix}',
+                f'{Comment._meta.db_table}_{suffix}', {'post': post_model})
+            _partitions[suffix] = post_model
+        return _partitions[suffix]
+
+
+def create_partition(month, database):
+    """Создаёт таблицы партиции, если их ещё нет.
+
+    SQL берётся у редактора схемы в режиме collect_sql и выполняется
+    напрямую: на выходе редактор SQLite проверяет внешние ключи всей
+    базы, а строки шардов ссылаются на пользователей основной базы.
+    """
+    post_model = partition_models(month)
+    connection = connections[database]
+    tables = connection.introspection.table_names()
+    editor = connection.schema_editor(collect_sql=True)
+    editor.deferred_sql = []
+    for model in (post_model, post_model.comment_model):
+        if model._meta.db_table not in tables:
+            editor.create_model(model)
+    statements = [*editor.collected_sql, *map(str, editor.deferred_sql)]
+    if statements:
+        with transaction.atomic(using=database):
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+    return post_model
+
+
+def archive_month(month, database):
+    """Переносит посты месяца с комментариями из горячих таблиц в архив.
+
+    Строки копируются одним INSERT ... SELECT на таблицу и удаляются
+    из горячих таблиц в той же транзакции.
+    """
+    post_model = create_partition(month, database)
+    connection = connections[database]
+    quote = connection.ops.quote_name
+    start, end = month_bounds(month)
+    ids_sql, params = (
+        Post.objects.using(database)
+        .filter(pub_date__gte=start, pub_date__lt=end)
+        .values('id').query.sql_with_params()
+    )
+    statements = []
+    for source, target, key in (
+        (Post, post_model, 'id'),
+        (Comment, post_model.comment_model, 'post_id'),
+    ):
+        columns = ', '.join(quote(field.column)
+                            for field in source._meta.local_fields)
+        statements.append((
+            f'INSERT INTO {quote(target._meta.db_table)} ({columns}) '
+            f'SELECT {columns} FROM {quote(source._meta.db_table)} '
+            f'WHERE {quote(key)} IN ({ids_sql})',
+            params,
+        ))
+    statements.append((
+        f'INSERT INTO {quote(ArchivedPost._meta.db_table)} '
+        f'(post_id, author_id, month) '
+        f'SELECT id, author_id, %s FROM {quote(Post._meta.db_table)} '
+        f'WHERE id IN ({ids_sql})',
+        (connection.ops.adapt_datefield_value(month), *params),
+    ))
+    for model, key in ((Comment, 'post_id'), (Post, 'id')):
+        statements.append((
+            f'DELETE FROM {quote(model._meta.db_table)} '
+            f'WHERE {quote(key)} IN ({ids_sql})',
+            params,
+        ))
+    with transaction.atomic(using=database), connection.cursor() as cursor:
+        for sql, sql_params in statements:
+            cursor.execute(sql, sql_params)
+        archived = cursor.rowcount
+    invalidate_counts()
+    return archived
+
+
+def same_related(archive, queryset):
+    """Переносит на архивный queryset связи, подгружаемые queryset."""
+    related = queryset.query.select_related
+    if isinstance(related, dict):
+        archive = archive.select_related(*related)
+    return archive.prefetch_related(*queryset._prefetch_related_lookups)
+
+
+def archived_month(post_id, database=None):
+    """Месяц архива, в котором лежит пост, или None."""
+    database = database or router.db_for_read(ArchivedPost)
+    key = f'archived-month:{database}:{post_id}:{count_generation()}'
+    month = cache.get(key)
+    if month is None:
+        month = (ArchivedPost.objects.using(database)
+                 .filter(post_id=post_id)
+                 .values_list('month', flat=True).first()) or False
+        cache.set(key, month)
+    return month or None
+
+
+def archived_post(queryset, post_id):
+    """Пост из архива той же базы и с теми же связями, что у queryset."""
+    month = archived_month(post_id, queryset.db)
+    if month is None:
+        return None
+    archive = partition_models(month).objects.using(queryset.db)
+    return same_related(archive, queryset).filter(id=post_id).first()
+
+
+def archived_posts(queryset, post_ids):
+    """Архивные посты базы queryset с теми же связями: {id: пост}.
+
+    Один запрос находит месяцы постов, и ещё по запросу на месяц.
+    """
+    months = defaultdict(list)
+    pointers = (ArchivedPost.objects.using(queryset.db)
+                .filter(post_id__in=post_ids)
+                .values_list('post_id', 'month'))
+    for post_id, month in pointers:
+        months[month].append(post_id)
+    posts = {}
+    for month, ids in months.items():
+        archive = partition_models(month).objects.using(queryset.db)
+        posts.update(same_related(archive, queryset).in_bulk(ids))
+    return posts
+
+
+def get_post_or_404(queryset, post_id):
+    """Пост из горячей таблицы, а если его там нет — из архива."""
+    post = (queryset.filter(id=post_id).first()
+            or archived_post(queryset, post_id))
+    if post is None:
+        raise Http404('Пост не найден.')
+    return post
+
+
+def author_archive(queryset, author_id):
+    """Архивные querysets автора по убыванию месяца, с кешем списка."""
+    database = queryset.db
+    key = f'archive-months:{database}:{author_id}:{count_generation()}'
+    months = cache.get(key)
+    if months is None:
+        months = list(
+            ArchivedPost.objects.using(database).filter(author_id=author_id)
+            .order_by('-month').values_list('month', flat=True).distinct()
+        )
+        cache.set(key, months)
+    querysets = []
+    for month in months:
+        archive = partition_models(month).objects.using(database).filter(
+            author_id=author_id)
+        querysets.append(same_related(archive, queryset))
+    return querysets
+
+
+def month_posts(year, month, database=None):
+    """Посты за месяц: из партиции, если месяц уже в архиве."""
+    month = datetime.date(year, month, 1)
+    database = database or router.db_for_read(Post)
+    if ArchivedPost.objects.using(database).filter(month=month).exists():
+        return partition_models(month).objects.using(database).all()
+    start, end = month_bounds(month)
+    return Post.objects.using(database).filter(
+        pub_date__gte=start, pub_date__lt=end)
+
+
+def month_archive(month, databases=None, **filters):
+    """Посты месяца из перечисленных баз, слитые по убыванию даты."""
+    querysets = [
+        on_database(
+            month_posts(month.year, month.month, database)
+            .filter(**filters).select_related('author', 'group'),
+            database)
+        for database in databases or [None]
+    ]
+    if len(querysets) == 1:
+        return querysets[0]
+    return MergedQuerySet(querysets)
@@ -0,0 +1,38 @@
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+
+from .models import Bookmark
+
+
+def toggle(user_id, post_id, check=None):
+    """Добавляет пост в закладки или убирает его оттуда.
+
+    check вызывается только перед добавлением, поэтому закладку на
+    пропавший пост всё равно можно убрать. Возвращает, лежит ли пост
+    в закладках после изменения.
+    """
+    bookmarks = Bookmark.objects.using(DEFAULT_DB_ALIAS)
+    if bookmarks.filter(user_id=user_id, post_id=post_id).delete()[0]:
+        return False
+    if check is not None:
+        check()
+    try:
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            bookmarks.create(user_id=user_id, post_id=post_id)
+    except IntegrityError:
+        # Параллельный запрос того же пользователя успел первым.
+        pass
+    return True
+
+
+def prefetch_bookmarks(posts, user):
+    """Отмечает у постов bookmarked одним запросом на всю страницу."""
+    posts = list(posts)
+    saved = set()
+    if posts and user.is_authenticated:
+        saved = set(
+            Bookmark.objects.using(DEFAULT_DB_ALIAS)
+            .filter(user=user, post_id__in=[post.id for post in posts])
+            .values_list('post_id', flat=True))
+    for post in posts:
+        post.bookmarked = post.id in saved
+    return posts
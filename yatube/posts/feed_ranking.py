@@ -0,0 +1,109 @@
+import math
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+
+from core.sharding import on_database
+
+from .models import Comment
+
+
+def ranked_key(user_id):
+    return f'ranked-feed:{user_id}'
+
+
+def candidates(posts, databases, since):
+    """Свежие посты ленты, не больше FEED_RANKING_CANDIDATES с базы:
+    id, автор, время в секундах, есть ли картинка и число комментариев.
+    """
+    limit = settings.FEED_RANKING_CANDIDATES
+    rows = []
+    for database in databases:
+        rows.extend(on_database(
+            posts.filter(pub_date__gte=since)
+            .order_by('-pub_date', '-id')
+            .annotate(comments_total=Count('comments'))
+            .values_list('id', 'author_id', 'pub_date', 'image',
+                         'comments_total'),
+            database,
+        )[:limit])
+    rows.sort(key=lambda row: row[2], reverse=True)
+    rows = rows[:limit]
+    return (
+        np.array([row[0] for row in rows], dtype=np.int64),
+        np.array([row[1] for row in rows], dtype=np.int64),
+        np.array([row[2].timestamp() for row in rows]),
+        np.array([bool(row[3]) for row in rows], dtype=bool),
+        np.array([row[4] for row in rows], dtype=np.int64),
+    )
+
+
+def affinity(user_id, databases):
+    """Авторы последних FEED_RANKING_HISTORY комментариев пользователя:
+    отсортированные id авторов и число комментариев к каждому."""
+    limit = settings.FEED_RANKING_HISTORY
+    authors = []
+    for database in databases:
+        authors.extend(on_database(
+            Comment.objects.filter(author_id=user_id, post__isnull=False)
+            .order_by('-pub_date').values_list('post__author_id', flat=True),
+            database,
+        )[:limit])
+    return np.unique(np.array(authors, dtype=np.int64), return_counts=True)
+
+
+def lookup(keys, values, queries):
+    """values для queries по отсортированным keys; 0 для отсутствующих."""
+    found = np.searchsorted(keys, queries)
+    inside = found < len(keys)
+    hit = np.zeros(len(queries), dtype=bool)
+    hit[inside] = keys[found[inside]] == queries[inside]
+    result = np.zeros(len(queries), dtype=values.dtype)
+    result[hit] = values[found[hit]]
+    return result
+
+
+def score(authors, times, images, comments, history, now):
+    """Оценки постов одним проходом по массивам.
+
+    Признаки: свежесть с полураспадом FEED_RANKING_HALF_LIFE,
+    близость к автору по истории комментариев пользователя, обсуждаемость
+    поста и наличие картинки; веса берутся из FEED_RANKING_WEIGHTS.
+    """
+    weights = settings.FEED_RANKING_WEIGHTS
+    recency = np.exp(-math.log(2) / settings.FEED_RANKING_HALF_LIFE
+                     * (now - times))
+    hits = lookup(*history, authors)
+    return (weights['recency'] * recency
+            + weights['affinity'] * np.log1p(hits)
+            + weights['comments'] * np.log1p(comments)
+            + weights['image'] * images)
+
+
+def rank(user_id, posts, databases=None, now=None):
+    """id постов ленты подписок posts по убыванию оценки; databases —
+    базы ленты, None — база по умолчанию."""
+    now = now or timezone.now()
+    databases = databases or [None]
+    since = now - timezone.timedelta(seconds=settings.FEED_RANKING_WINDOW)
+    ids, post_authors, times, images, comments = candidates(
+        posts, databases, since)
+    if not len(ids):
+        return []
+    scores = score(post_authors, times, images, comments,
+                   affinity(user_id, databases), now.timestamp())
+    return ids[np.lexsort((-times, -scores))].tolist()
+
+
+def ranked_feed(user_id, posts, databases=None):
+    """Ранжированная лента из кеша пользователя на FEED_RANKING_TTL
+    секунд."""
+    key = ranked_key(user_id)
+    post_ids = cache.get(key)
+    if post_ids is None:
+        post_ids = rank(user_id, posts, databases)
+        cache.set(key, post_ids, settings.FEED_RANKING_TTL)
+    return post_ids
@@ -0,0 +1,333 @@
+import array
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .models import Follow
+
+VERSION_KEY = 'follow-graph-version'
+
+_lock = threading.Lock()
+_local = threading.local()
+_graph = None
+
+
+class CSR:
+    """Список смежности в формате CSR: рёбра узла n лежат в
+    targets[offsets[n]:offsets[n + 1]] по возрастанию.
+
+    На ребро уходит 4 байта, на узел — 8.
+    """
+    __slots__ = ('offsets', 'targets')
+
+    def __init__(self, offsets, targets):
+        self.offsets = offsets
+        self.targets = targets
+
+    @classmethod
+    def from_pairs(cls, pairs, nodes):
+        """CSR из пар (узел, сосед), отсортированных по узлу и соседу."""
+        offsets = array.array('q', bytes(8 * (nodes + 1)))
+        targets = array.array('I')
+        for node, target in pairs:
+            offsets[node + 1] += 1
+            targets.append(target)
+        for node in range(nodes):
+            offsets[node + 1] += offsets[node]
+        return cls(offsets, targets)
+
+    def bounds(self, node):
+        if not 0 <= node < len(self.offsets) - 1:
+            return 0, 0
+        return self.offsets[node], self.offsets[node + 1]
+
+    def degree(self, node):
+        start, end = self.bounds(node)
+        return end - start
+
+    def neighbors(self, node):
+        start, end = self.bounds(node)
+        return self.targets[start:end]
+
+    def has(self, node, target):
+        start, end = self.bounds(node)
+        index = bisect.bisect_left(self.targets, target, start, end)
+        return index < end and self.targets[index] == target
+
+    def nbytes(self):
+        return (self.offsets.itemsize * len(self.offsets)
+                + self.targets.itemsize * len(self.targets))
+
+
+def transpose(csr, nodes):
+    """Обратный CSR подсчётом: соседи каждого узла остаются
+    отсортированными, потому что исходные узлы обходятся по порядку."""
+    offsets = array.array('q', bytes(8 * (nodes + 1)))
+    for target in csr.targets:
+        offsets[target + 1] += 1
+    for node in range(nodes):
+        offsets[node + 1] += offsets[node]
+    fill = array.array('q', offsets)
+    targets = array.array('I', bytes(4 * len(csr.targets)))
+    for node in range(len(csr.offsets) - 1):
+        for target in csr.neighbors(node):
+            targets[fill[target]] = node
+            fill[target] += 1
+    return CSR(offsets, targets)
+
+
+class FollowGraph:
+    """Граф подписок: CSR подписок и подписчиков плюс небольшая дельта
+    изменений после загрузки, которая сворачивается в CSR, когда
+    вырастает больше FOLLOW_GRAPH_MAX_DELTA рёбер.
+    """
+
+    def __init__(self, pairs, version=None):
+        pairs = sorted(pairs)
+        nodes = max((max(pair) for pair in pairs), default=0) + 1
+        self.following = CSR.from_pairs(pairs, nodes)
+        self.followers = transpose(self.following, nodes)
+        self.version = version
+        self.loaded = time.monotonic()
+        # Дельта относительно CSR: для каждой стороны пары (0 — подписчик,
+        # 1 — автор) узел -> множество соседей.
+        self.added = ({}, {})
+        self.removed = ({}, {})
+        self.delta = 0
+
+    @classmethod
+    def load(cls, version=None):
+        pairs = (Follow.objects.using(DEFAULT_DB_ALIAS)
+                 .values_list('user_id', 'author_id').iterator())
+        return cls(pairs, version)
+
+    def edges(self):
+        removed = self.removed[0]
+        for user in range(len(self.following.offsets) - 1):
+            for author in self.following.neighbors(user):
+                if author not in removed.get(user, ()):
+                    yield user, author
+        for user, authors in self.added[0].items():
+            for author in authors:
+                yield user, author
+
+    def csr(self, side):
+        return self.following if side == 0 else self.followers
+
+    def follows(self, user_id, author_id):
+        if author_id in self.added[0].get(user_id, ()):
+            return True
+        return (author_id not in self.removed[0].get(user_id, ())
+                and self.following.has(user_id, author_id))
+
+    def neighbors(self, node, side):
+        """Соседи узла с учётом дельты; side — позиция узла в паре."""
+        result = list(self.csr(side).neighbors(node))
+        removed = self.removed[side].get(node)
+        if removed:
+            result = [other for other in result if other not in removed]
+        result.extend(self.added[side].get(node, ()))
+        return result
+
+    def degree(self, node, side):
+        return (self.csr(side).degree(node)
+                + len(self.added[side].get(node, ()))
+                - len(self.removed[side].get(node, ())))
+
+    def set(self, user_id, author_id, present):
+        pair = (user_id, author_id)
+        for delta in (self.added, self.removed):
+            for side in (0, 1):
+                others = delta[side].get(pair[side])
+                if others and pair[1 - side] in others:
+                    others.discard(pair[1 - side])
+                    self.delta -= side == 0
+        if present == self.following.has(user_id, author_id):
+            return
+        delta = self.added if present else self.removed
+        for side in (0, 1):
+            delta[side].setdefault(pair[side], set()).add(pair[1 - side])
+        self.delta += 1
+
+    def nbytes(self):
+        return self.following.nbytes() + self.followers.nbytes()
+
+
+def waiting():
+    """Обработчики on_commit, ждущие коммита текущей транзакции."""
+    return {func for _, func in connections[DEFAULT_DB_ALIAS].run_on_commit}
+
+
+def pending_changes():
+    """Изменения подписок из ещё не закоммиченных транзакций потока.
+
+    Запись остаётся, пока её обработчик on_commit ждёт коммита; после
+    коммита она уже в графе, после отката — отброшена.
+    """
+    pending = getattr(_local, 'pending', [])
+    if not pending:
+        return []
+    funcs = waiting()
+    _local.pending = [change for change in pending if change[3] in funcs]
+    return _local.pending
+
+
+def transient(version):
+    """Граф, загруженный в текущей транзакции, если она ещё не
+    завершилась."""
+    loaded = getattr(_local, 'transient', None)
+    if (loaded is not None and loaded[0].version == version
+            and loaded[1] in waiting()):
+        return loaded[0]
+    return None
+
+
+def graph():
+    """Граф подписок процесса; перезагружается, если другой процесс
+    изменил подписки или прошло FOLLOW_GRAPH_TTL секунд.
+
+    Граф, прочитанный внутри транзакции, может содержать строки, которые
+    ещё откатятся, поэтому он живёт только до конца этой транзакции.
+    """
+    global _graph
+    version = cache.get(VERSION_KEY)
+    current = _graph
+    if (current is not None and version is not None
+            and current.version == version
+            and time.monotonic() - current.loaded
+            <= settings.FOLLOW_GRAPH_TTL):
+        return current
+    if version is None:
+        cache.add(VERSION_KEY, 0)
+        version = cache.get(VERSION_KEY)
+    current = transient(version)
+    if current is not None:
+        return current
+    current = FollowGraph.load(version)
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        def forget():
+            _local.transient = None
+        transaction.on_commit(forget, using=DEFAULT_DB_ALIAS)
+        _local.transient = (current, forget)
+    else:
+        with _lock:
+            _graph = current
+    return current
+
+
+def reset(**kwargs):
+    """Забывает граф; вызывается и после flush и migrate."""
+    global _graph
+    with _lock:
+        _graph = None
+
+
+def apply(user_id, author_id, present):
+    """Вносит закоммиченное изменение в граф процесса."""
+    global _graph
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:
+        version = None
+    with _lock:
+        current = _graph
+        if current is None:
+            return
+        if version is None or version != current.version + 1:
+            # Подписки менял и другой процесс: граф перечитается.
+            _graph = None
+            return
+        current.set(user_id, author_id, present)
+        current.version = version
+        if current.delta > settings.FOLLOW_GRAPH_MAX_DELTA:
+            compacted = FollowGraph(current.edges(), version)
+            compacted.loaded = current.loaded
+            _graph = compacted
+
+
+def changed(user_id, author_id, present, using=DEFAULT_DB_ALIAS):
+    """Регистрирует подписку или отписку; граф меняется после коммита."""
+    def on_commit():
+        apply(user_id, author_id, present)
+    if connections[using].in_atomic_block:
+        if not hasattr(_local, 'pending'):
+            _local.pending = []
+        _local.pending.append((user_id, author_id, present, on_commit))
+    transaction.on_commit(on_commit, using=using)
+
+
+def state(user_id, author_id):
+    """Подписка с учётом незакоммиченных изменений потока или None."""
+    for user, author, present, _ in reversed(pending_changes()):
+        if (user, author) == (user_id, author_id):
+            return present
+    return None
+
+
+def is_following(user_id, author_id):
+    present = state(user_id, author_id)
+    if present is None:
+        return graph().follows(user_id, author_id)
+    return present
+
+
+def final_pending(node, side):
+    """Итоговые незакоммиченные состояния пар с узлом: {пара: есть ли}."""
+    final = {}
+    for user, author, present, _ in pending_changes():
+        if (user, author)[side] == node:
+            final[user, author] = present
+    return final
+
+
+def neighbors(node, side):
+    current = graph()
+    result = dict.fromkeys(current.neighbors(node, side))
+    for pair, present in final_pending(node, side).items():
+        if present:
+            result[pair[1 - side]] = None
+        else:
+            result.pop(pair[1 - side], None)
+    return list(result)
+
+
+def degree(node, side):
+    current = graph()
+    total = current.degree(node, side)
+    for pair, present in final_pending(node, side).items():
+        total += present - current.follows(*pair)
+    return total
+
+
+def following(user_id):
+    """id авторов, на которых подписан пользователь."""
+    return neighbors(user_id, 0)
+
+
+def own_following(user_id):
+    """Подписки пользователя одним запросом к базе.
+
+    Версия графа лежит в кеше процесса, и граф может отставать от
+    соседних процессов до FOLLOW_GRAPH_TTL; свои подписки пользователь
+    должен видеть сразу, поэтому страницы берут их отсюда.
+    """
+    return set(Follow.objects.using(DEFAULT_DB_ALIAS)
+               .filter(user_id=user_id)
+               .values_list('author_id', flat=True))
+
+
+def followers(author_id):
+    """id подписчиков автора."""
+    return neighbors(author_id, 1)
+
+
+def following_count(user_id):
+    return degree(user_id, 0)
+
+
+def followers_count(author_id):
+    return degree(author_id, 1)
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Q
+
+from .models import GroupFollow, Post
+
+
+def groups_key(user_id):
+    return f'group-follows:{user_id}'
+
+
+def followed_groups(user_id):
+    """id групп, на которые подписан пользователь."""
+    key = groups_key(user_id)
+    groups = cache.get(key)
+    if groups is None:
+        groups = list(GroupFollow.objects.using(DEFAULT_DB_ALIAS)
+                      .filter(user_id=user_id)
+                      .values_list('group_id', flat=True))
+        cache.set(key, groups, settings.GROUP_FOLLOWS_TTL)
+    return groups
+
+
+def follow(user_id, group_id):
+    GroupFollow.objects.using(DEFAULT_DB_ALIAS).get_or_create(
+        user_id=user_id, group_id=group_id)
+    cache.delete(groups_key(user_id))
+
+
+def unfollow(user_id, group_id):
+    GroupFollow.objects.using(DEFAULT_DB_ALIAS).filter(
+        user_id=user_id, group_id=group_id).delete()
+    cache.delete(groups_key(user_id))
+
+
+def follow_feed(authors, groups, excluded=()):
+    """Посты подписок пользователя: авторов и групп, без скрытых авторов.
+
+    Условие OR по двум индексам (author, pub_date) и (group, pub_date)
+    SQLite выполняет как MULTI-INDEX OR: пост, подходящий под обе ветки,
+    выбирается один раз, а порядок (pub_date, id) годится и для
+    keyset-пагинации.
+    """
+    posts = Post.objects.filter(Q(author__in=authors) | Q(group__in=groups))
+    if excluded:
+        posts = posts.exclude(author__in=excluded)
+    return posts
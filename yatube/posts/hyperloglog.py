@@ -0,0 +1,56 @@
+import hashlib
+import math
+
+import numpy as np
+
+
+class HyperLogLog:
+    """Оценка числа различных значений по 2 ** precision регистрам.
+
+    Каждый регистр занимает байт, относительная ошибка около
+    1.04 / sqrt(2 ** precision). Скетчи одной точности сливаются
+    поэлементным максимумом.
+    """
+
+    def __init__(self, precision, registers=None):
+        self.precision = precision
+        size = 1 << precision
+        if registers is None:
+            self.registers = bytearray(size)
+        elif len(registers) == size:
+            self.registers = bytearray(registers)
+        else:
+            raise ValueError('Размер скетча не совпадает с точностью.')
+
+    def add(self, value):
+        digest = hashlib.blake2b(str(value).encode(), digest_size=8).digest()
+        hashed = int.from_bytes(digest, 'big')
+        rest_bits = 64 - self.precision
+        index = hashed >> rest_bits
+        rest = hashed & ((1 << rest_bits) - 1)
+        rank = rest_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError('Сливаются только скетчи одной точности.')
+        self.registers = bytearray(np.maximum(
+            np.frombuffer(self.registers, dtype=np.uint8),
+            np.frombuffer(other.registers, dtype=np.uint8),
+        ).tobytes())
+
+    def count(self):
+        registers = np.frombuffer(self.registers, dtype=np.uint8)
+        size = len(registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / np.sum(
+            np.ldexp(1.0, -registers.astype(np.int64)))
+        empty = int(np.count_nonzero(registers == 0))
+        # На малых числах точнее линейный подсчёт пустых регистров.
+        if estimate <= 2.5 * size and empty:
+            estimate = size * math.log(size / empty)
+        return round(estimate)
+
+    def __bytes__(self):
+        return bytes(self.registers)
@@ -0,0 +1,42 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from posts.archive import archive_month, month_bounds, month_start
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Переносит старые посты с комментариями в месячные архивные '
+            'таблицы. Месяц переносится целиком, когда он полностью '
+            'старше --days дней.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.POST_ARCHIVE_AFTER_DAYS,
+            help='Возраст постов, после которого они уходят в архив.',
+        )
+        parser.add_argument(
+            '--database', action='append', dest='databases',
+            help='База из POST_SHARDS; по умолчанию все.',
+        )
+
+    def handle(self, *args, **options):
+        databases = options['databases'] or settings.POST_SHARDS
+        unknown = set(databases) - set(settings.POST_SHARDS)
+        if unknown:
+            raise CommandError(f'Баз {", ".join(sorted(unknown))} нет '
+                               f'в POST_SHARDS.')
+        cutoff = month_start(timezone.localtime()
+                             - datetime.timedelta(days=options['days']))
+        before, _ = month_bounds(cutoff)
+        for database in databases:
+            months = (Post.objects.using(database)
+                      .filter(pub_date__lt=before)
+                      .dates('pub_date', 'month'))
+            for month in months:
+                archived = archive_month(month, database)
+                self.stdout.write(f'{database} {month:%Y-%m}: в архив '
+                                  f'перенесено постов: {archived}')
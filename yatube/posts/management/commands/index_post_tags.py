@@ -0,0 +1,29 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.tags import backfill
+
+
+class Command(BaseCommand):
+    help = ('Перестраивает индекс тегов и упоминаний по текстам всех '
+            'постов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help=f'Размер пула процессов; ядер здесь: {os.cpu_count()}.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Сколько постов разбирает один процесс за раз.',
+        )
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('Число процессов и размер куска — '
+                               'положительные.')
+        indexed = backfill(settings.POST_SHARDS, options['processes'],
+                           options['chunk_size'])
+        self.stdout.write(f'Проиндексировано постов: {indexed}')
@@ -0,0 +1,143 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.functions import Mod
+
+from core.sharding import BUCKET_COUNT, bucket_for
+from posts.archive import create_partition, partition_models
+from posts.models import ArchivedPost, Comment, Post, ShardBucket, User
+from posts.sharding import SHARD_DIRECTORY_KEY, shard_for_bucket
+
+
+class Command(BaseCommand):
+    help = ('Переносит бакет автора с постами и комментариями в другую '
+            'базу. Чтение не останавливается, запись в бакет закрыта '
+            'только на время копирования.')
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument(
+            '--author', help='Имя автора, чей бакет нужно перенести.',
+        )
+        source.add_argument(
+            '--bucket', type=int, help=f'Номер бакета от 0 до '
+                                       f'{BUCKET_COUNT - 1}.',
+        )
+        parser.add_argument(
+            '--to', required=True, dest='database',
+            help='Псевдоним базы из POST_SHARDS.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько строк копировать за один запрос.',
+        )
+
+    def handle(self, *args, **options):
+        database = options['database']
+        if database not in settings.POST_SHARDS:
+            raise CommandError(f'Базы {database} нет в POST_SHARDS.')
+        bucket = self.get_bucket(options)
+        cache.delete(SHARD_DIRECTORY_KEY)
+        source = shard_for_bucket(bucket)[0]
+        if source == database:
+            self.stdout.write(f'Бакет {bucket} уже в базе {database}.')
+            return
+        authors = list(
+            User.objects.annotate(bucket=Mod('id', BUCKET_COUNT))
+            .filter(bucket=bucket).values_list('id', flat=True)
+        )
+        months = list(
+            ArchivedPost.objects.using(source).filter(author_id__in=authors)
+            .order_by('month').values_list('month', flat=True).distinct()
+        )
+        for month in months:
+            create_partition(month, database)
+        self.set_bucket(bucket, source, locked=True)
+        try:
+            copied = self.copy(authors, months, source, database,
+                               options['batch_size'])
+        except Exception:
+            self.set_bucket(bucket, source, locked=False)
+            raise
+        self.set_bucket(bucket, database, locked=False)
+        for queryset in self.querysets(authors, months):
+            queryset.using(source).delete()
+        self.stdout.write(f'Бакет {bucket}: {source} → {database}, '
+                          f'перенесено строк: {copied}.')
+
+    def get_bucket(self, options):
+        if options['author'] is None:
+            if not 0 <= options['bucket'] < BUCKET_COUNT:
+                raise CommandError('Номер бакета вне диапазона.')
+            return options['bucket']
+        try:
+            author = User.objects.get(username=options['author'])
+        except User.DoesNotExist:
+            raise CommandError(f'Автор {options["author"]} не найден.')
+        return bucket_for(author.id)
+
+    def set_bucket(self, bucket, database, locked):
+        """Меняет справочник и ждёт, пока его кеш устареет везде."""
+        ShardBucket.objects.using(DEFAULT_DB_ALIAS).update_or_create(
+            bucket=bucket,
+            defaults={'database': database, 'locked': locked},
+        )
+        cache.delete(SHARD_DIRECTORY_KEY)
+        time.sleep(settings.SHARD_DIRECTORY_TTL)
+
+    def querysets(self, authors, months):
+        """Строки бакета: горячие, архивные и указатели на архив."""
+        querysets = [
+            Post.objects.filter(author_id__in=authors),
+            Comment.objects.filter(post__author_id__in=authors),
+            ArchivedPost.objects.filter(author_id__in=authors),
+        ]
+        for month in months:
+            post_model = partition_models(month)
+            querysets.append(
+                post_model.objects.filter(author_id__in=authors))
+            querysets.append(post_model.comment_model.objects.filter(
+                post__author_id__in=authors))
+        return querysets
+
+    def copy(self, authors, months, source, database, batch_size):
+        """Копирует строки бакета с прежними id.
+
+        Остатки прерванного переноса в целевой базе удаляются заранее,
+        поэтому команду можно просто запустить повторно.
+        """
+        querysets = self.querysets(authors, months)
+        with transaction.atomic(using=database):
+            for queryset in querysets:
+                queryset.using(database).delete()
+            copied = 0
+            for queryset in querysets:
+                copied += self.copy_rows(queryset.using(source), database,
+                                         batch_size)
+        return copied
+
+    def copy_rows(self, queryset, database, batch_size):
+        queryset = queryset.order_by('pk')
+        copied = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                return copied
+            manager = queryset.model.objects.using(database)
+            # auto_now_add перезаписывает даты при вставке, поэтому
+            # исходные значения возвращаются отдельным запросом.
+            dated = [field.attname for field in queryset.model._meta.fields
+                     if getattr(field, 'auto_now_add', False)]
+            dates = [[getattr(obj, name) for name in dated] for obj in batch]
+            manager.bulk_create(batch)
+            if dated:
+                for obj, values in zip(batch, dates):
+                    for name, value in zip(dated, values):
+                        setattr(obj, name, value)
+                manager.bulk_update(batch, dated)
+            copied += len(batch)
+            last_pk = batch[-1].pk
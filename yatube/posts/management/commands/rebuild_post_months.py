@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.rollup import rebuild
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает число постов по месяцам для навигации по архиву '
+            'заново по горячим и архивным таблицам всех баз.')
+
+    def handle(self, *args, **options):
+        rows = rebuild(settings.POST_SHARDS)
+        self.stdout.write(f'Счётчиков месяцев: {rows}')
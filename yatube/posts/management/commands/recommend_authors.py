@@ -0,0 +1,30 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.recommendations import compute, save
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рекомендации авторов: друзья друзей и '
+            'сокомментаторы по подпискам и комментариям.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help=f'Размер пула процессов; ядер здесь: {os.cpu_count()}.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=10000,
+            help='Сколько id пользователей считает один процесс за раз.',
+        )
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('Число процессов и размер куска — '
+                               'положительные.')
+        chunks = compute(settings.POST_SHARDS, options['processes'],
+                         options['chunk_size'])
+        saved = save(chunks)
+        self.stdout.write(f'Рекомендаций: {saved}')
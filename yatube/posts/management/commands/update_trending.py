@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.trending import rank, save
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинги популярных постов и групп по свежим '
+            'постам и комментариям.')
+
+    def handle(self, *args, **options):
+        rankings = rank(settings.POST_SHARDS)
+        save(rankings)
+        for kind, (ids, _) in rankings.items():
+            self.stdout.write(f'{kind}: {len(ids)}')
@@ -0,0 +1,22 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_auto_20261019_0735'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShardBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.PositiveSmallIntegerField(unique=True, verbose_name='Бакет')),
+                ('database', models.CharField(max_length=100, verbose_name='База')),
+                ('locked', models.BooleanField(default=False, verbose_name='Переносится')),
+            ],
+        ),
+    ]
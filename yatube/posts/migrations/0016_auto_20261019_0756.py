@@ -0,0 +1,63 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:56
+
+import collections
+
+from django.db import DEFAULT_DB_ALIAS, migrations, models
+from django.utils import timezone
+
+
+def count_posts(apps, schema_editor):
+    """Заполняет счётчики месяцев по уже опубликованным постам."""
+    if schema_editor.connection.alias != DEFAULT_DB_ALIAS:
+        return
+    Post = apps.get_model('posts', 'Post')
+    PostMonth = apps.get_model('posts', 'PostMonth')
+    totals = collections.Counter()
+    rows = Post.objects.values_list('pub_date', 'group_id', 'author_id')
+    for pub_date, group_id, author_id in rows.iterator():
+        month = timezone.localtime(pub_date).date().replace(day=1)
+        totals['site', 0, month] += 1
+        totals['author', author_id, month] += 1
+        if group_id is not None:
+            totals['group', group_id, month] += 1
+    PostMonth.objects.bulk_create(
+        PostMonth(scope=scope, key=key, month=month, posts=posts)
+        for (scope, key, month), posts in totals.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_auto_20261019_0753'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostMonth',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('site', 'Сайт'), ('group', 'Группа'), ('author', 'Автор')], max_length=10, verbose_name='Область')),
+                ('key', models.PositiveIntegerField(default=0, verbose_name='id группы или автора')),
+                ('month', models.DateField(verbose_name='Месяц')),
+                ('posts', models.IntegerField(default=0, verbose_name='Постов')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['pub_date'], name='post_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', 'pub_date'], name='post_group_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', 'pub_date'], name='post_author_pub_date_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='postmonth',
+            unique_together={('scope', 'key', 'month')},
+        ),
+        migrations.RunPython(count_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_recommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Trending',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('group', 'Группа')], max_length=10, verbose_name='Вид')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Место')),
+                ('object_id', models.BigIntegerField(verbose_name='id поста или группы')),
+                ('score', models.FloatField(verbose_name='Оценка')),
+            ],
+            options={
+                'ordering': ['kind', 'rank'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['pub_date'], name='comment_pub_date_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='trending',
+            unique_together={('kind', 'rank')},
+        ),
+    ]
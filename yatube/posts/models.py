@@ -1,6 +1,9 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from core.sharding import (bucket_for, bucket_from_id, enabled,
+                           insert_with_id)
+
 User = get_user_model()
 
 
@@ -43,10 +46,31 @@ class Post(models.Model):
 
     class Meta:
         ordering = ['-pub_date', 'id']
+        indexes = [
+            models.Index(fields=['pub_date'], name='post_pub_date_idx'),
+            models.Index(fields=['group', 'pub_date'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', 'pub_date'],
+                         name='post_author_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:NUMBER_OF_CHARACTERS_IN_POST]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        # Группа при загрузке: по ней сигнал поправит счётчики месяцев.
+        post.loaded_group_id = post.__dict__.get('group_id')
+        return post
+
+    def save(self, *args, **kwargs):
+        if self.pk is None and enabled():
+            insert_with_id(self, bucket_for(self.author_id), super().save,
+                           *args, **kwargs)
+            return
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -67,6 +91,30 @@ class Comment(models.Model):
     pub_date = models.DateTimeField('Дата публикации',
                                     auto_now_add=True,)
 
+    class Meta:
+        ordering = ['-pub_date', '-id']
+        indexes = [
+            models.Index(fields=['post', 'pub_date'],
+                         name='comment_post_pub_date_idx'),
+            models.Index(fields=['pub_date'], name='comment_pub_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is None and enabled():
+            insert_with_id(self, self.bucket(), super().save,
+                           *args, **kwargs)
+            return
+        super().save(*args, **kwargs)
+
+    def bucket(self):
+        """Комментарий хранится в том же бакете, что и его пост."""
+        if self.post_id is None:
+            return 0
+        bucket = bucket_from_id(self.post_id)
+        if bucket is None:
+            bucket = bucket_for(self.post.author_id)
+        return bucket
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -84,3 +132,282 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ('user', 'author')
+
+
+class ShardBucket(models.Model):
+    """База, в которой лежат посты и комментарии бакета.
+
+    Бакеты без записи живут в основной базе.
+    """
+    bucket = models.PositiveSmallIntegerField('Бакет', unique=True)
+    database = models.CharField('База', max_length=100)
+    locked = models.BooleanField('Переносится', default=False)
+
+    def __str__(self):
+        return f'{self.bucket} → {self.database}'
+
+
+class ArchivedPost(models.Model):
+    """Указатель на пост, перенесённый в месячный архив.
+
+    Строка лежит в той же базе, что и архивная таблица поста.
+    """
+    post_id = models.BigIntegerField('Пост', primary_key=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    month = models.DateField('Месяц')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['author', 'month'],
+                         name='archived_author_month_idx'),
+            models.Index(fields=['month'], name='archived_month_idx'),
+        ]
+
+
+class PostMonth(models.Model):
+    """Число постов за месяц: по всему сайту, группе или автору.
+
+    Обновляется сигналами при сохранении и удалении постов и служит
+    навигацией по архиву без GROUP BY по всей таблице постов.
+    """
+    SITE = 'site'
+    GROUP = 'group'
+    AUTHOR = 'author'
+    SCOPES = (
+        (SITE, 'Сайт'),
+        (GROUP, 'Группа'),
+        (AUTHOR, 'Автор'),
+    )
+
+    scope = models.CharField('Область', max_length=10, choices=SCOPES)
+    key = models.PositiveIntegerField('id группы или автора', default=0)
+    month = models.DateField('Месяц')
+    posts = models.IntegerField('Постов', default=0)
+
+    class Meta:
+        unique_together = ('scope', 'key', 'month')
+
+
+class Recommendation(models.Model):
+    """Автор, которого стоит почитать пользователю.
+
+    Пересчитывается целиком командой recommend_authors.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Пользователь',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рекомендуемый автор',
+    )
+    score = models.FloatField('Оценка')
+    rank = models.PositiveSmallIntegerField('Место')
+
+    class Meta:
+        ordering = ['user', 'rank']
+        unique_together = ('user', 'rank')
+
+
+class Trending(models.Model):
+    """Место поста или группы в рейтинге популярного.
+
+    Таблицу целиком пересчитывает команда update_trending.
+    """
+    POST = 'post'
+    GROUP = 'group'
+    KINDS = (
+        (POST, 'Пост'),
+        (GROUP, 'Группа'),
+    )
+
+    kind = models.CharField('Вид', max_length=10, choices=KINDS)
+    rank = models.PositiveSmallIntegerField('Место')
+    # id поста без внешнего ключа: посты могут лежать в другом шарде.
+    object_id = models.BigIntegerField('id поста или группы')
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        ordering = ['kind', 'rank']
+        unique_together = ('kind', 'rank')
+
+
+class PostViews(models.Model):
+    """Просмотры поста и скетч HyperLogLog его зрителей.
+
+    Пишется пачками из буфера процесса (posts.post_views), а не на каждый
+    просмотр.
+    """
+    # id поста без внешнего ключа: посты могут лежать в другом шарде
+    # или в архиве.
+    post_id = models.BigIntegerField('id поста', primary_key=True)
+    views = models.BigIntegerField('Просмотров', default=0)
+    sketch = models.BinaryField('Скетч зрителей')
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+
+
+class Reaction(models.Model):
+    """Реакция пользователя на пост или комментарий: одна на объект."""
+    POST = 'post'
+    COMMENT = 'comment'
+    TARGETS = (
+        (POST, 'Пост'),
+        (COMMENT, 'Комментарий'),
+    )
+    LIKE = 'like'
+    HEART = 'heart'
+    LAUGH = 'laugh'
+    KINDS = (
+        (LIKE, '👍'),
+        (HEART, '❤️'),
+        (LAUGH, '😂'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='reactions',
+        verbose_name='Пользователь'
+    )
+    target = models.CharField('Объект', max_length=10, choices=TARGETS)
+    # id без внешнего ключа: посты и комментарии лежат в шардах.
+    target_id = models.BigIntegerField('id объекта')
+    kind = models.CharField('Реакция', max_length=10, choices=KINDS)
+    created = models.DateTimeField('Дата', auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'target', 'target_id')
+
+
+class ReactionCounter(models.Model):
+    """Часть счётчика реакций одного вида на объект.
+
+    Счётчик разложен на REACTION_COUNTER_SHARDS строк, чтобы частые
+    реакции на один пост не упирались в блокировку одной строки;
+    итог — сумма строк.
+    """
+    target = models.CharField('Объект', max_length=10,
+                              choices=Reaction.TARGETS)
+    target_id = models.BigIntegerField('id объекта')
+    kind = models.CharField('Реакция', max_length=10,
+                            choices=Reaction.KINDS)
+    shard = models.PositiveSmallIntegerField('Часть')
+    count = models.IntegerField('Реакций', default=0)
+
+    class Meta:
+        unique_together = ('target', 'target_id', 'kind', 'shard')
+
+
+class Bookmark(models.Model):
+    """Пост в закладках пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='bookmarks',
+        verbose_name='Пользователь'
+    )
+    # id поста без внешнего ключа: посты могут лежать в другом шарде.
+    post_id = models.BigIntegerField('id поста')
+    created = models.DateTimeField('Дата', auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'post_id')
+        indexes = [
+            models.Index(fields=['user', 'created'],
+                         name='bookmark_user_created_idx'),
+        ]
+
+
+class Mute(models.Model):
+    """Скрытый или заблокированный пользователем автор.
+
+    Посты обоих не попадают в ленты пользователя; заблокированный
+    автор к тому же не может на него подписаться.
+    """
+    MUTE = 'mute'
+    BLOCK = 'block'
+    KINDS = (
+        (MUTE, 'Скрыт'),
+        (BLOCK, 'Заблокирован'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mutes',
+        verbose_name='Пользователь'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    kind = models.CharField('Вид', max_length=10, choices=KINDS)
+    created = models.DateTimeField('Дата', auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'author')
+
+
+class GroupFollow(models.Model):
+    """Подписка пользователя на группу."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='group_follows',
+        verbose_name='Подписчик'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='followers',
+        verbose_name='Группа'
+    )
+
+    class Meta:
+        unique_together = ('user', 'group')
+
+
+class PostTag(models.Model):
+    """Хештег поста: строка обратного индекса тег → посты."""
+    tag = models.CharField('Тег', max_length=50)
+    # id поста без внешнего ключа: посты могут лежать в другом шарде.
+    post_id = models.BigIntegerField('id поста')
+    pub_date = models.DateTimeField('Дата публикации поста')
+
+    class Meta:
+        unique_together = ('tag', 'post_id')
+        indexes = [
+            models.Index(fields=['tag', 'pub_date'],
+                         name='posttag_tag_pub_date_idx'),
+        ]
+
+
+class PostMention(models.Model):
+    """Упоминание пользователя в посте: индекс пользователь → посты."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Упомянутый'
+    )
+    post_id = models.BigIntegerField('id поста')
+    pub_date = models.DateTimeField('Дата публикации поста')
+
+    class Meta:
+        unique_together = ('user', 'post_id')
+        indexes = [
+            models.Index(fields=['user', 'pub_date'],
+                         name='postmention_user_pub_date_idx'),
+        ]
@@ -0,0 +1,165 @@
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+
+from core.pagination import count_generation, queries_digest
+
+from .models import Follow, Mute
+
+
+def mutes_key(user_id):
+    return f'mutes:{user_id}'
+
+
+def mutes(user_id):
+    """Скрытые и заблокированные пользователем авторы: {id автора: вид}."""
+    key = mutes_key(user_id)
+    result = cache.get(key)
+    if result is None:
+        result = dict(Mute.objects.using(DEFAULT_DB_ALIAS)
+                      .filter(user_id=user_id)
+                      .values_list('author_id', 'kind'))
+        cache.set(key, result, settings.MUTES_TTL)
+    return result
+
+
+def excluded_authors(user):
+    """id авторов, чьи посты не показываются пользователю."""
+    if not user.is_authenticated:
+        return frozenset()
+    return frozenset(mutes(user.id))
+
+
+def is_blocked(author_id, user_id):
+    """Заблокировал ли автор пользователя.
+
+    Читается из базы: кеш другого процесса может ещё не знать
+    о свежей блокировке.
+    """
+    return Mute.objects.using(DEFAULT_DB_ALIAS).filter(
+        user_id=author_id, author_id=user_id, kind=Mute.BLOCK).exists()
+
+
+def ordered_before(post, ordering):
+    """Условие на посты, стоящие в ordering раньше post."""
+    condition = Q()
+    equal = {}
+    for name in ordering:
+        field = name.lstrip('-')
+        lookup = 'gt' if name.startswith('-') else 'lt'
+        value = getattr(post, field)
+        condition |= Q(**equal, **{f'{field}__{lookup}': value})
+        equal[field] = value
+    return condition
+
+
+def toggle(user_id, author_id, kind):
+    """Скрывает или блокирует автора, меняет вид или снимает тот же.
+
+    Блокировка удаляет подписки в обе стороны. Возвращает вид после
+    изменения или None.
+    """
+    rows = Mute.objects.using(DEFAULT_DB_ALIAS).filter(
+        user_id=user_id, author_id=author_id)
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        current = rows.values_list('kind', flat=True).first()
+        if current == kind:
+            rows.delete()
+            kind = None
+        elif current is None:
+            rows.create(user_id=user_id, author_id=author_id, kind=kind)
+        else:
+            rows.update(kind=kind)
+        if kind == Mute.BLOCK:
+            Follow.objects.using(DEFAULT_DB_ALIAS).filter(
+                Q(user_id=user_id, author_id=author_id)
+                | Q(user_id=author_id, author_id=user_id)
+            ).delete()
+    cache.delete(mutes_key(user_id))
+    return kind
+
+
+class MutedFeed:
+    """object_list ленты без постов исключённых авторов.
+
+    Лента читается кусками по MUTE_CHUNK_SIZE постов: куски общие для
+    всех пользователей и лежат в кеше MUTE_CHUNK_TTL секунд, а
+    исключения применяются к ним в памяти. Срез начинается с куска,
+    в котором лежит start: исключённые посты перед ним считаются
+    запросом COUNT на базу, а не чтением ранних кусков. Страница
+    добирается следующими кусками, но не дальше MUTE_BACKFILL_CHUNKS
+    лишних.
+    """
+
+    def __init__(self, posts, excluded):
+        self.posts = posts
+        self.excluded = excluded
+        # По querysets WindowedPaginator берёт общий счётчик ленты.
+        self.querysets = getattr(posts, 'querysets', [posts])
+        self.digest = queries_digest(posts)
+
+    def chunk(self, number):
+        size = settings.MUTE_CHUNK_SIZE
+        key = f'feed-chunk:{self.digest}:{count_generation()}:{number}'
+        posts = cache.get(key)
+        if posts is None:
+            posts = list(self.posts[number * size:(number + 1) * size])
+            cache.set(key, posts, settings.MUTE_CHUNK_TTL)
+        return posts
+
+    def excluded_before(self, post):
+        """Число постов исключённых авторов, стоящих в ленте до post."""
+        total = 0
+        for queryset in self.querysets:
+            ordering = (queryset.query.order_by
+                        or queryset.model._meta.ordering)
+            total += queryset.filter(
+                ordered_before(post, ordering),
+                author_id__in=self.excluded,
+            ).count()
+        return total
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        size = settings.MUTE_CHUNK_SIZE
+        # В куске не больше size оставленных постов, поэтому до куска
+        # start // size их не больше start, и пропуск короче куска
+        # находится за несколько шагов.
+        number = start // size
+        while True:
+            chunk = self.chunk(number)
+            if not chunk:
+                return []
+            skip = start - number * size
+            if number:
+                skip += self.excluded_before(chunk[0])
+            if skip < size:
+                break
+            number += skip // size
+        wanted = last = None
+        if stop is not None:
+            wanted = skip + stop - start
+            last = (number + math.ceil(wanted / size)
+                    + settings.MUTE_BACKFILL_CHUNKS)
+        kept = []
+        while True:
+            kept.extend(post for post in chunk
+                        if post.author_id not in self.excluded)
+            number += 1
+            if (len(chunk) < size or number == last
+                    or (wanted is not None and len(kept) >= wanted)):
+                break
+            chunk = self.chunk(number)
+        return kept[skip:wanted]
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def count(self):
+        """Число постов без исключений: для навигации хватает оценки."""
+        return sum(queryset.count() for queryset in self.querysets)
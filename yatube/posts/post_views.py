@@ -0,0 +1,116 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from .hyperloglog import HyperLogLog
+from .models import PostViews
+
+UPSERT_SQL = '''
+    INSERT INTO {table} (post_id, views, sketch, updated)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (post_id) DO UPDATE
+    SET views = {table}.views + excluded.views, updated = excluded.updated
+'''
+
+_lock = threading.Lock()
+# id поста -> [число просмотров, скетч зрителей].
+_views = {}
+_since = None
+
+
+def sketch(registers=None):
+    return HyperLogLog(settings.POST_VIEWS_PRECISION, registers)
+
+
+def record(post_id, viewer):
+    """Учитывает просмотр в буфере процесса.
+
+    Буфер пишется в базу, когда копится дольше POST_VIEWS_FLUSH_SECONDS
+    или набирает POST_VIEWS_BUFFER_SIZE постов, поэтому памяти уходит
+    не больше байта на регистр скетча каждого поста буфера.
+    """
+    global _since
+    with _lock:
+        views = _views.get(post_id)
+        if views is None:
+            views = _views[post_id] = [0, sketch()]
+        views[0] += 1
+        views[1].add(viewer)
+        if _since is None:
+            _since = time.monotonic()
+    flush()
+
+
+def due():
+    return bool(_views) and (
+        len(_views) >= settings.POST_VIEWS_BUFFER_SIZE
+        or time.monotonic() - _since >= settings.POST_VIEWS_FLUSH_SECONDS
+    )
+
+
+def take():
+    """Забирает накопленные просмотры, очищая буфер."""
+    global _views, _since
+    with _lock:
+        views, _views, _since = _views, {}, None
+    return views
+
+
+def save(views):
+    """Пишет просмотры пачкой: счётчики — upsert с прибавлением,
+    скетчи сливаются с сохранёнными.
+
+    Upsert первым берёт блокировку записи, поэтому чтение и запись
+    скетчей в той же транзакции не перемешиваются с другими процессами.
+    """
+    table = PostViews._meta.db_table
+    now = timezone.now()
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.executemany(UPSERT_SQL.format(table=table), [
+                (post_id, count, bytes(viewers), now)
+                for post_id, (count, viewers) in views.items()
+            ])
+            stored = (PostViews.objects.using(DEFAULT_DB_ALIAS)
+                      .filter(post_id__in=list(views))
+                      .values_list('post_id', 'sketch'))
+            changed = []
+            for post_id, registers in stored:
+                merged = sketch(registers)
+                merged.merge(views[post_id][1])
+                if bytes(merged) != bytes(registers):
+                    changed.append((bytes(merged), post_id))
+            if changed:
+                cursor.executemany(
+                    f'UPDATE {table} SET sketch = %s WHERE post_id = %s',
+                    changed)
+
+
+def flush(force=False, **kwargs):
+    """Пишет буфер в базу, если его пора сбросить.
+
+    Вызывается и по сигналу request_finished. При остановке процесса
+    несброшенные просмотры теряются.
+    """
+    if not (force or due()):
+        return
+    views = take()
+    if views:
+        save(views)
+
+
+def counts(post_id):
+    """Просмотры и оценка числа зрителей поста вместе с буфером
+    процесса."""
+    row = (PostViews.objects.using(DEFAULT_DB_ALIAS)
+           .filter(post_id=post_id).values_list('views', 'sketch').first())
+    views, viewers = (row[0], sketch(row[1])) if row else (0, sketch())
+    with _lock:
+        pending = _views.get(post_id)
+        if pending is not None:
+            views += pending[0]
+            viewers.merge(pending[1])
+    return views, viewers.count()
@@ -0,0 +1,83 @@
+import random
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import (DEFAULT_DB_ALIAS, IntegrityError, connections,
+                       transaction)
+from django.db.models import Sum
+
+from .models import Reaction, ReactionCounter
+
+UPSERT_SQL = '''
+    INSERT INTO {table} (target, target_id, kind, shard, count)
+    VALUES (%s, %s, %s, %s, %s)
+    ON CONFLICT (target, target_id, kind, shard) DO UPDATE
+    SET count = {table}.count + excluded.count
+'''
+
+
+def add_count(target, target_id, kind, delta):
+    """Прибавляет delta к случайной части счётчика одним upsert."""
+    table = ReactionCounter._meta.db_table
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(UPSERT_SQL.format(table=table), [
+            target, target_id, kind,
+            random.randrange(settings.REACTION_COUNTER_SHARDS), delta,
+        ])
+
+
+def react(user_id, target, target_id, kind):
+    """Ставит реакцию, меняет её вид или снимает повторную.
+
+    Возвращает вид реакции пользователя после изменения или None.
+    """
+    lookup = {'user_id': user_id, 'target': target, 'target_id': target_id}
+    reactions = Reaction.objects.using(DEFAULT_DB_ALIAS).filter(**lookup)
+    try:
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            current = reactions.values_list('kind', flat=True).first()
+            if current == kind:
+                reactions.delete()
+                add_count(target, target_id, kind, -1)
+                return None
+            if current is None:
+                reactions.create(kind=kind, **lookup)
+            else:
+                reactions.update(kind=kind)
+                add_count(target, target_id, current, -1)
+            add_count(target, target_id, kind, 1)
+    except IntegrityError:
+        # Параллельный запрос того же пользователя успел первым.
+        return reactions.values_list('kind', flat=True).first()
+    return kind
+
+
+def prefetch_reactions(objects, user, target=Reaction.POST):
+    """Подгружает к объектам reactions — [(вид, значок, число, моя ли)].
+
+    Суммы частей счётчиков приходят одним запросом, реакции
+    пользователя на все объекты — другим.
+    """
+    objects = list(objects)
+    ids = [obj.id for obj in objects]
+    totals = defaultdict(dict)
+    mine = {}
+    if ids:
+        rows = (ReactionCounter.objects.using(DEFAULT_DB_ALIAS)
+                .filter(target=target, target_id__in=ids)
+                .values_list('target_id', 'kind')
+                .annotate(total=Sum('count')).order_by())
+        for target_id, kind, total in rows:
+            totals[target_id][kind] = total
+        if user.is_authenticated:
+            mine = dict(
+                Reaction.objects.using(DEFAULT_DB_ALIAS)
+                .filter(user=user, target=target, target_id__in=ids)
+                .values_list('target_id', 'kind'))
+    for obj in objects:
+        obj.reactions = [
+            (kind, label, totals[obj.id].get(kind, 0),
+             mine.get(obj.id) == kind)
+            for kind, label in Reaction.KINDS
+        ]
+    return objects
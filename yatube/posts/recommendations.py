@@ -0,0 +1,158 @@
+import multiprocessing
+
+import numpy as np
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .models import ArchivedPost, Comment, Follow, Post, Recommendation
+
+# Данные для пула процессов: воркеры получают их при fork и к базе
+# не обращаются.
+_data = {}
+
+
+def pairs(queryset, *fields):
+    """Значения двух полей queryset двумя массивами int64."""
+    rows = queryset.values_list(*fields).order_by().iterator()
+    flat = np.fromiter((value for row in rows for value in row),
+                       dtype=np.int64)
+    return flat[0::2], flat[1::2]
+
+
+def to_csr(rows, cols, size):
+    """CSR (offsets, targets) из рёбер без повторов; size — число узлов
+    rows."""
+    width = int(cols.max(initial=0)) + 1
+    rows, cols = np.divmod(np.unique(rows * width + cols), width)
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(rows, minlength=size))
+    return offsets, cols
+
+
+def hop(sources, middles, offsets, targets):
+    """Все пути source → middle → target для рёбер (source, middle)."""
+    starts = offsets[middles]
+    counts = offsets[middles + 1] - starts
+    # Путь номер j ребра i лежит в targets[starts[i] + j].
+    shifts = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    index = np.arange(counts.sum()) + shifts
+    return np.repeat(sources, counts), targets[index]
+
+
+def chunk_edges(offsets, targets, low, high):
+    """Рёбра узлов из [low, high) двумя массивами."""
+    sources = np.repeat(np.arange(low, high), np.diff(offsets[low:high + 1]))
+    return sources, targets[offsets[low]:offsets[high]]
+
+
+def top_k(users, authors, scores, k):
+    """Не больше k лучших авторов каждого пользователя и их места."""
+    order = np.lexsort((authors, -scores, users))
+    users, authors, scores = users[order], authors[order], scores[order]
+    starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+    lengths = np.diff(np.r_[starts, len(users)])
+    ranks = np.arange(len(users)) - np.repeat(starts, lengths)
+    keep = ranks < k
+    return users[keep], authors[keep], scores[keep], ranks[keep]
+
+
+def prepare(databases):
+    """Загружает подписки, комментарии и авторов во _data."""
+    follow_users, follow_authors = pairs(
+        Follow.objects.using(DEFAULT_DB_ALIAS), 'user_id', 'author_id')
+    commenters, posts = [], []
+    authors = [np.empty(0, dtype=np.int64)]
+    for database in databases:
+        users, post_ids = pairs(Comment.objects.using(database),
+                                'author_id', 'post_id')
+        commenters.append(users)
+        posts.append(post_ids)
+        for model in (Post, ArchivedPost):
+            authors.append(np.fromiter(
+                model.objects.using(database).order_by()
+                .values_list('author_id', flat=True).distinct(),
+                dtype=np.int64))
+    commenters = np.concatenate(commenters or [np.empty(0, np.int64)])
+    # id постов — snowflake, поэтому сжимаются в плотные номера.
+    post_ids, posts = np.unique(
+        np.concatenate(posts or [np.empty(0, np.int64)]),
+        return_inverse=True)
+    authors = np.concatenate(authors)
+    size = int(max(follow_users.max(initial=0),
+                   follow_authors.max(initial=0),
+                   commenters.max(initial=0),
+                   authors.max(initial=0))) + 1
+    is_author = np.zeros(size, dtype=bool)
+    is_author[authors] = True
+    _data.update(
+        size=size,
+        follows=to_csr(follow_users, follow_authors, size),
+        follow_keys=np.unique(follow_users * size + follow_authors),
+        comments=to_csr(commenters, posts, size),
+        commenters=to_csr(posts, commenters, max(len(post_ids), 1)),
+        is_author=is_author,
+    )
+    return size
+
+
+def score_chunk(low, high):
+    """Оценки авторов для пользователей с id из [low, high).
+
+    Друг друга — путь по подпискам u → x → a, сокомментатор — u и a
+    комментировали один пост; вес каждого пути берётся из
+    RECOMMENDATION_WEIGHTS.
+    """
+    size = _data['size']
+    weights = settings.RECOMMENDATION_WEIGHTS
+    keys, scores = [], []
+    for kind, first, second in (
+        ('friends', 'follows', 'follows'),
+        ('co_commenters', 'comments', 'commenters'),
+    ):
+        users, authors = hop(*chunk_edges(*_data[first], low, high),
+                             *_data[second])
+        keys.append(users * size + authors)
+        scores.append(np.full(len(users), weights[kind]))
+    keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+    scores = np.bincount(inverse, weights=np.concatenate(scores))
+    users, authors = np.divmod(keys, size)
+    followed = np.isin(keys, _data['follow_keys'], assume_unique=True)
+    keep = (users != authors) & _data['is_author'][authors] & ~followed
+    return top_k(users[keep], authors[keep], scores[keep],
+                 settings.RECOMMENDATIONS_COUNT)
+
+
+def compute(databases, processes=1, chunk_size=10000):
+    """Рекомендации всех пользователей кусками по диапазону id.
+
+    Возвращает список кусков (users, authors, scores, ranks).
+    """
+    size = prepare(databases)
+    chunks = [(low, min(low + chunk_size, size))
+              for low in range(0, size, chunk_size)]
+    try:
+        if processes == 1:
+            return [score_chunk(*chunk) for chunk in chunks]
+        with multiprocessing.Pool(processes) as pool:
+            return pool.starmap(score_chunk, chunks)
+    finally:
+        _data.clear()
+
+
+def save(chunks, batch_size=1000):
+    """Заменяет все рекомендации новыми в одной транзакции."""
+    recommendations = Recommendation.objects.using(DEFAULT_DB_ALIAS)
+    saved = 0
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        recommendations.all().delete()
+        for users, authors, scores, ranks in chunks:
+            recommendations.bulk_create(
+                (Recommendation(user_id=user, author_id=author,
+                                score=score, rank=rank)
+                 for user, author, score, rank in zip(
+                     users.tolist(), authors.tolist(), scores.tolist(),
+                     ranks.tolist())),
+                batch_size=batch_size,
+            )
+            saved += len(users)
+    return saved
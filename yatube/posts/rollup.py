@@ -0,0 +1,85 @@
+import collections
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .archive import month_start, partition_models
+from .models import ArchivedPost, Post, PostMonth
+
+
+def post_scopes(month, group_id, author_id):
+    scopes = [(PostMonth.SITE, 0, month), (PostMonth.AUTHOR, author_id, month)]
+    if group_id is not None:
+        scopes.append((PostMonth.GROUP, group_id, month))
+    return scopes
+
+
+def add_posts(scopes, delta):
+    """Прибавляет delta к счётчикам месяцев, создавая недостающие."""
+    rows = PostMonth.objects.using(DEFAULT_DB_ALIAS)
+    for scope, key, month in scopes:
+        lookup = {'scope': scope, 'key': key, 'month': month}
+        if rows.filter(**lookup).update(posts=F('posts') + delta):
+            continue
+        try:
+            with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                rows.create(posts=delta, **lookup)
+        except IntegrityError:
+            rows.filter(**lookup).update(posts=F('posts') + delta)
+
+
+def post_month(post):
+    return month_start(timezone.localtime(post.pub_date))
+
+
+def count_post(post, delta):
+    add_posts(post_scopes(post_month(post), post.group_id, post.author_id),
+              delta)
+
+
+def move_post(post, old_group_id):
+    """Переносит пост в счётчиках из старой группы в текущую."""
+    month = post_month(post)
+    for group_id, delta in ((old_group_id, -1), (post.group_id, 1)):
+        if group_id is not None:
+            add_posts([(PostMonth.GROUP, group_id, month)], delta)
+
+
+def months(scope, key=0):
+    """Месяцы с постами по убыванию: [(месяц, число постов)]."""
+    return list(
+        PostMonth.objects.filter(scope=scope, key=key, posts__gt=0)
+        .order_by('-month').values_list('month', 'posts')
+    )
+
+
+def month_totals(queryset):
+    """Число постов queryset по (месяц, группа, автор)."""
+    return (queryset.annotate(month=TruncMonth('pub_date'))
+            .values_list('month', 'group_id', 'author_id')
+            .annotate(posts=Count('id')).order_by())
+
+
+def rebuild(databases):
+    """Пересчитывает PostMonth по горячим и архивным постам баз."""
+    totals = collections.Counter()
+    for database in databases:
+        querysets = [Post.objects.using(database)]
+        archived = (ArchivedPost.objects.using(database)
+                    .values_list('month', flat=True).distinct())
+        querysets.extend(partition_models(month).objects.using(database)
+                         for month in archived)
+        for queryset in querysets:
+            for month, group_id, author_id, posts in month_totals(queryset):
+                month = month_start(month)
+                for scope in post_scopes(month, group_id, author_id):
+                    totals[scope] += posts
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        PostMonth.objects.using(DEFAULT_DB_ALIAS).all().delete()
+        PostMonth.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+            PostMonth(scope=scope, key=key, month=month, posts=posts)
+            for (scope, key, month), posts in totals.items()
+        )
+    return len(totals)
@@ -0,0 +1,138 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from core.sharding import (ShardMoving, bucket_for, bucket_from_id, enabled,
+                           on_database)
+
+from .archive import archived_posts
+from .models import Comment, Post, ShardBucket, User
+
+SHARD_DIRECTORY_KEY = 'post-shard-directory'
+
+
+def directory():
+    """Переопределения баз по бакетам: {бакет: (база, переносится)}.
+
+    Кеш локален для процесса, поэтому rebalance_shards после каждого
+    изменения ждёт SHARD_DIRECTORY_TTL секунд.
+    """
+    buckets = cache.get(SHARD_DIRECTORY_KEY)
+    if buckets is None:
+        buckets = {
+            row.bucket: (row.database, row.locked)
+            for row in ShardBucket.objects.using(DEFAULT_DB_ALIAS)
+        }
+        cache.set(SHARD_DIRECTORY_KEY, buckets,
+                  settings.SHARD_DIRECTORY_TTL)
+    return buckets
+
+
+def shard_for_bucket(bucket):
+    return directory().get(bucket, (DEFAULT_DB_ALIAS, False))
+
+
+def shard_for_author(author_id):
+    """База с постами автора; None, если шард всего один."""
+    if not enabled():
+        return None
+    return shard_for_bucket(bucket_for(author_id))[0]
+
+
+def shard_for_write(bucket):
+    database, locked = shard_for_bucket(bucket)
+    if locked:
+        raise ShardMoving(bucket)
+    return database
+
+
+def shards_for_authors(author_ids):
+    """Базы, в которых лежат посты перечисленных авторов."""
+    if not enabled():
+        return None
+    return sorted({shard_for_author(author_id) for author_id in author_ids})
+
+
+def shards_for_feed(author_ids, group_ids):
+    """Базы ленты авторов и групп: посты группы бывают в любом шарде."""
+    if not enabled():
+        return None
+    if group_ids:
+        return list(settings.POST_SHARDS)
+    return shards_for_authors(author_ids)
+
+
+def shard_for_post(post_id):
+    """База поста по его id.
+
+    Бакет зашит в id; посты, созданные до шардирования, ищутся
+    по очереди во всех базах.
+    """
+    if not enabled():
+        return None
+    bucket = bucket_from_id(post_id)
+    if bucket is not None:
+        return shard_for_bucket(bucket)[0]
+    for database in settings.POST_SHARDS:
+        if Post.objects.using(database).filter(pk=post_id).exists():
+            return database
+    return DEFAULT_DB_ALIAS
+
+
+def post_queryset(queryset, post_id):
+    return on_database(queryset, shard_for_post(post_id))
+
+
+def posts_in_order(post_ids):
+    """Посты с автором и группой в порядке post_ids, по запросу на базу;
+    не найденные в горячей таблице ищутся в архиве, удалённые
+    пропускаются."""
+    by_database = defaultdict(list)
+    for post_id in post_ids:
+        by_database[shard_for_post(post_id)].append(post_id)
+    posts = {}
+    for database, ids in by_database.items():
+        queryset = on_database(
+            Post.objects.select_related('author', 'group'), database)
+        found = queryset.in_bulk(ids)
+        missing = [post_id for post_id in ids if post_id not in found]
+        if missing:
+            found.update(archived_posts(queryset, missing))
+        posts.update(found)
+    return [posts[post_id] for post_id in post_ids if post_id in posts]
+
+
+class PostShardRouter:
+    """Направляет посты и комментарии в базу бакета их автора.
+
+    Комментарий живёт рядом со своим постом. Пока шард один,
+    роутер ничего не решает и оставляет выбор следующим роутерам.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if not enabled() or model not in (Post, Comment):
+            return None
+        if isinstance(instance, (Post, Comment)):
+            return instance._state.db
+        if model is Post and isinstance(instance, User):
+            return shard_for_author(instance.pk)
+        return None
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+        if not enabled():
+            return None
+        if model is Post and isinstance(instance, Post):
+            if instance.author_id is not None:
+                return shard_for_write(bucket_for(instance.author_id))
+        if model is Comment and isinstance(instance, Comment):
+            return shard_for_write(instance.bucket())
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if enabled() and {type(obj1), type(obj2)} & {Post, Comment}:
+            return True
+        return None
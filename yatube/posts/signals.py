@@ -0,0 +1,62 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.pagination import invalidate_counts
+
+from . import follow_graph
+from .models import Follow, Post
+from .rollup import count_post, move_post
+from .sharding import shard_for_author
+from .tags import index_post, unindex_post
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    invalidate_counts()
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        count_post(instance, 1)
+        return
+    loaded_group_id = getattr(instance, 'loaded_group_id', instance.group_id)
+    if loaded_group_id != instance.group_id:
+        move_post(instance, loaded_group_id)
+        instance.loaded_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, using, **kwargs):
+    # Удаление копии из старой базы после rebalance_shards не считается.
+    home = shard_for_author(instance.author_id)
+    if home is None or home == using:
+        count_post(instance, -1)
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, created, raw, **kwargs):
+    if not raw:
+        index_post(instance, created)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, using, **kwargs):
+    home = shard_for_author(instance.author_id)
+    if home is None or home == using:
+        unindex_post(instance.id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, using, **kwargs):
+    if created:
+        follow_graph.changed(instance.user_id, instance.author_id, True,
+                             using)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, using, **kwargs):
+    follow_graph.changed(instance.user_id, instance.author_id, False, using)
@@ -0,0 +1,175 @@
+import multiprocessing
+import re
+from collections import defaultdict
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.urls import reverse
+
+from .models import Post, PostMention, PostTag, User
+
+TAG_LENGTH = PostTag._meta.get_field('tag').max_length
+TAG_RE = re.compile(r'(?<![\w&])#(\w+)')
+# Имя пользователя Django — буквы, цифры и .@+-_; точка или дефис
+# в конце — уже пунктуация.
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.@+-]*\w)')
+
+
+def extract(text):
+    """Теги в нижнем регистре и имена упомянутых пользователей."""
+    tags = {tag.lower() for tag in TAG_RE.findall(text)
+            if len(tag) <= TAG_LENGTH}
+    return tags, set(MENTION_RE.findall(text))
+
+
+def linkify(text, mentioned=()):
+    """Экранированный текст со ссылками на теги и профили.
+
+    Ссылками становятся теги, которые попадают в индекс, и упоминания
+    из mentioned — имён, для которых нашёлся пользователь.
+    """
+    def link(match):
+        value = match.group(1)
+        if match.group(0)[0] == '#':
+            url = reverse('posts:tag_posts', kwargs={'name': value.lower()})
+        else:
+            url = reverse('posts:profile', kwargs={'username': value})
+        return f'<a href="{escape(url)}">{escape(match.group(0))}</a>'
+    parts = []
+    position = 0
+    matches = sorted(
+        [*(match for match in TAG_RE.finditer(text)
+           if len(match.group(1)) <= TAG_LENGTH),
+         *(match for match in MENTION_RE.finditer(text)
+           if match.group(1) in mentioned)],
+        key=lambda match: match.start())
+    for match in matches:
+        if match.start() < position:
+            continue
+        parts.append(escape(text[position:match.start()]))
+        parts.append(link(match))
+        position = match.end()
+    parts.append(escape(text[position:]))
+    return mark_safe(''.join(parts))
+
+
+def prefetch_mentions(objects):
+    """Подгружает к постам mentioned — имена упомянутых пользователей
+    из индекса, одним запросом на страницу."""
+    objects = list(objects)
+    ids = [obj.id for obj in objects if '@' in obj.text]
+    mentioned = defaultdict(set)
+    if ids:
+        rows = (PostMention.objects.using(DEFAULT_DB_ALIAS)
+                .filter(post_id__in=ids)
+                .values_list('post_id', 'user__username'))
+        for post_id, username in rows:
+            mentioned[post_id].add(username)
+    for obj in objects:
+        obj.mentioned = mentioned[obj.id]
+    return objects
+
+
+def save_index(entries, replace=True):
+    """Пишет теги и упоминания постов.
+
+    entries — [(id поста, дата, теги, имена)]; с replace прежние строки
+    этих постов удаляются. Имена без пользователя пропускаются.
+    """
+    post_ids = [entry[0] for entry in entries]
+    names = set().union(*(entry[3] for entry in entries))
+    users = dict(User.objects.using(DEFAULT_DB_ALIAS)
+                 .filter(username__in=names)
+                 .values_list('username', 'id')) if names else {}
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        if replace:
+            for model in (PostTag, PostMention):
+                model.objects.using(DEFAULT_DB_ALIAS).filter(
+                    post_id__in=post_ids).delete()
+        tags = [PostTag(tag=tag, post_id=post_id, pub_date=pub_date)
+                for post_id, pub_date, tags, _ in entries for tag in tags]
+        mentions = [
+            PostMention(user_id=users[name], post_id=post_id,
+                        pub_date=pub_date)
+            for post_id, pub_date, _, names in entries
+            for name in names if name in users
+        ]
+        # Пост мог успеть проиндексироваться сигналом параллельно.
+        if tags:
+            PostTag.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+                tags, ignore_conflicts=True)
+        if mentions:
+            PostMention.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+                mentions, ignore_conflicts=True)
+
+
+def index_post(post, created=False):
+    """Обновляет индекс по тексту сохранённого поста."""
+    tags, names = extract(post.text)
+    if created and not (tags or names):
+        return
+    save_index([(post.id, post.pub_date, tags, names)],
+               replace=not created)
+
+
+def unindex_post(post_id):
+    for model in (PostTag, PostMention):
+        model.objects.using(DEFAULT_DB_ALIAS).filter(
+            post_id=post_id).delete()
+
+
+def parse_chunk(rows):
+    """Разбирает тексты куска постов; выполняется в процессе пула."""
+    return [(post_id, pub_date, *extract(text))
+            for post_id, pub_date, text in rows]
+
+
+def chunks(databases, chunk_size):
+    """Посты баз кусками по chunk_size строк (id, дата, текст)."""
+    for database in databases:
+        rows = (Post.objects.using(database).order_by()
+                .values_list('id', 'pub_date', 'text').iterator())
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def backfill(databases, processes=1, chunk_size=1000):
+    """Перестраивает индекс по всем постам баз.
+
+    Тексты разбираются в пуле процессов волнами по куску на процесс,
+    поэтому в памяти не больше processes кусков; запись идёт из
+    основного процесса. Строки каждой волны заменяются в одной
+    транзакции, так что страницы тегов не пустеют на время пересчёта.
+    Возвращает число разобранных постов.
+    """
+    indexed = 0
+    pool = multiprocessing.Pool(processes) if processes > 1 else None
+    try:
+        wave = []
+        for chunk in chunks(databases, chunk_size):
+            wave.append(chunk)
+            if len(wave) < processes:
+                continue
+            indexed += save_wave(wave, pool)
+            wave = []
+        if wave:
+            indexed += save_wave(wave, pool)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return indexed
+
+
+def save_wave(wave, pool):
+    parsed = pool.map(parse_chunk, wave) if pool else map(parse_chunk, wave)
+    entries = [entry for chunk in parsed for entry in chunk]
+    save_index(entries)
+    return len(entries)
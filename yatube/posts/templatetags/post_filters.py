@@ -0,0 +1,12 @@
+from django import template
+
+from posts.tags import linkify as linkify_text
+
+register = template.Library()
+
+
+@register.filter
+def linkify(post):
+    """Текст поста со ссылками на #теги и @пользователей; упоминания
+    берутся из prefetch_mentions."""
+    return linkify_text(post.text, getattr(post, 'mentioned', ()))
@@ -0,0 +1,119 @@
+import datetime
+
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import month_posts, month_start, partition_models
+from ..models import ArchivedPost, Bookmark, Comment, Post, Reaction
+
+User = get_user_model()
+
+
+# Архив меняет схему базы, а SQLite не позволяет этого внутри
+# транзакции TestCase.
+class PostArchiveTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.old_date = timezone.now() - datetime.timedelta(days=400)
+        self.old_post = Post.objects.create(author=self.user,
+                                            text='Старый пост')
+        Comment.objects.create(post=self.old_post, author=self.user,
+                               text='Старый комментарий')
+        Post.objects.filter(pk=self.old_post.pk).update(
+            pub_date=self.old_date)
+        self.new_post = Post.objects.create(author=self.user,
+                                            text='Новый пост')
+        call_command('archive_posts', stdout=StringIO())
+        self.month = month_start(self.old_date)
+
+    def tearDown(self):
+        post_model = partition_models(self.month)
+        with connection.schema_editor() as editor:
+            editor.delete_model(post_model.comment_model)
+            editor.delete_model(post_model)
+
+    def test_old_posts_leave_hot_tables(self):
+        self.assertEqual(list(Post.objects.all()), [self.new_post])
+        self.assertFalse(Comment.objects.exists())
+        self.assertTrue(ArchivedPost.objects.filter(
+            post_id=self.old_post.id, month=self.month).exists())
+
+    def test_post_detail_falls_back_to_archive(self):
+        response = self.authorized_client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.old_post.id}))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Старый пост')
+        self.assertContains(response, 'Старый комментарий')
+        self.assertEqual(response.context['posts'], 2)
+        self.assertTrue(response.context['archived'])
+
+    def test_profile_lists_archive_after_hot_posts(self):
+        response = self.authorized_client.get(
+            reverse('posts:profile', kwargs={'username': 'auth'}))
+        posts = [post.text for post in response.context['page_obj']]
+        self.assertEqual(posts, ['Новый пост', 'Старый пост'])
+        self.assertEqual(response.context['count'], 2)
+
+    def test_index_reads_only_hot_posts(self):
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertEqual(list(response.context['page_obj']),
+                         [self.new_post])
+
+    def test_saved_lists_archived_posts(self):
+        for post in (self.old_post, self.new_post):
+            Bookmark.objects.create(user=self.user, post_id=post.id)
+        response = self.authorized_client.get(reverse('posts:saved'))
+        posts = [post.text for post in response.context['page_obj']]
+        self.assertEqual(posts, ['Новый пост', 'Старый пост'])
+        self.assertContains(response, 'Старый комментарий')
+
+    def test_archived_post_takes_reactions(self):
+        url = reverse('posts:post_react',
+                      kwargs={'post_id': self.old_post.id})
+        response = self.authorized_client.post(url, {'kind': Reaction.HEART})
+        self.assertRedirects(response, reverse(
+            'posts:post_detail', kwargs={'post_id': self.old_post.id}))
+        self.assertTrue(Reaction.objects.filter(
+            target_id=self.old_post.id, kind=Reaction.HEART).exists())
+
+    def test_archived_post_bookmark_toggles(self):
+        url = reverse('posts:post_bookmark',
+                      kwargs={'post_id': self.old_post.id})
+        self.authorized_client.post(url)
+        self.assertTrue(Bookmark.objects.filter(
+            post_id=self.old_post.id).exists())
+        self.authorized_client.post(url)
+        self.assertFalse(Bookmark.objects.exists())
+
+    def test_archived_posts_are_read_only(self):
+        response = self.authorized_client.post(
+            reverse('posts:add_comment',
+                    kwargs={'post_id': self.old_post.id}),
+            {'text': 'Комментарий'})
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_month_posts_reads_partition(self):
+        archived = month_posts(self.month.year, self.month.month)
+        self.assertEqual(archived.model, partition_models(self.month))
+        self.assertEqual([post.id for post in archived], [self.old_post.id])
+        today = timezone.localdate()
+        self.assertEqual(list(month_posts(today.year, today.month)),
+                         [self.new_post])
+
+    def test_month_page_reads_partition(self):
+        response = self.authorized_client.get(reverse(
+            'posts:month_posts',
+            kwargs={'year': self.month.year, 'month': self.month.month}))
+        self.assertEqual([post.text for post in response.context['page_obj']],
+                         ['Старый пост'])
@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..bookmarks import prefetch_bookmarks, toggle
+from ..models import Bookmark, Post
+from ..views import POSTS_COUNT
+
+User = get_user_model()
+
+
+class BookmarkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.posts = [Post.objects.create(author=cls.user, text=f'Пост {i}')
+                     for i in range(POSTS_COUNT + 3)]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_toggle_adds_and_removes(self):
+        post_id = self.posts[0].id
+        self.assertTrue(toggle(self.user.id, post_id))
+        self.assertTrue(Bookmark.objects.filter(post_id=post_id).exists())
+        self.assertFalse(toggle(self.user.id, post_id))
+        self.assertFalse(Bookmark.objects.exists())
+
+    def test_prefetch_marks_page_in_one_query(self):
+        toggle(self.user.id, self.posts[1].id)
+        with self.assertNumQueries(1):
+            posts = prefetch_bookmarks(self.posts, self.user)
+        self.assertEqual([post.id for post in posts if post.bookmarked],
+                         [self.posts[1].id])
+
+    def test_saved_feed_pages_by_cursor(self):
+        for post in self.posts:
+            toggle(self.user.id, post.id)
+        url = reverse('posts:saved')
+        response = self.client.get(url)
+        page_obj = response.context['page_obj']
+        # Последние сохранённые — первыми.
+        self.assertEqual([post.id for post in page_obj],
+                         [post.id for post in self.posts[::-1][:POSTS_COUNT]])
+        self.assertTrue(all(post.bookmarked for post in page_obj))
+        response = self.client.get(url, {'after': page_obj.next_cursor})
+        self.assertEqual([post.id for post in response.context['page_obj']],
+                         [post.id for post in self.posts[2::-1]])
+        self.assertFalse(response.context['page_obj'].has_next)
+
+    def test_bookmark_view_redirects_back(self):
+        url = reverse('posts:profile', kwargs={'username': 'auth'})
+        response = self.client.post(
+            reverse('posts:post_bookmark',
+                    kwargs={'post_id': self.posts[-1].id}),
+            {'next': url})
+        self.assertRedirects(response, url)
+        response = self.client.get(url)
+        marked = [post.id for post in response.context['page_obj']
+                  if post.bookmarked]
+        self.assertEqual(marked, [self.posts[-1].id])
+
+    def test_bookmark_of_deleted_post_can_be_removed(self):
+        post = Post.objects.create(author=self.user, text='Удалится')
+        toggle(self.user.id, post.id)
+        Post.objects.filter(pk=post.pk).delete()
+        url = reverse('posts:post_bookmark', kwargs={'post_id': post.id})
+        self.client.post(url)
+        self.assertFalse(Bookmark.objects.exists())
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Bookmark.objects.exists())
+
+    def test_bookmark_view_requires_post(self):
+        response = self.client.get(reverse(
+            'posts:post_bookmark', kwargs={'post_id': self.posts[-1].id}))
+        self.assertEqual(response.status_code, 405)
+        self.assertFalse(Bookmark.objects.exists())
+
+    def test_saved_requires_login(self):
+        response = Client().get(reverse('posts:saved'))
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,91 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import post_views
+from ..feed_ranking import rank, ranked_key
+from ..group_follows import follow_feed
+from ..models import Comment, Follow, Post
+from ..views import follow_index
+
+User = get_user_model()
+
+
+class FeedRankingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.friend = User.objects.create_user(username='friend')
+        cls.other = User.objects.create_user(username='other')
+        cls.stranger = User.objects.create_user(username='stranger')
+        for author in (cls.friend, cls.other):
+            Follow.objects.create(user=cls.reader, author=author)
+        now = timezone.now()
+        cls.newest = cls.create_post(cls.other, 'Новый', now)
+        cls.friendly = cls.create_post(cls.friend, 'От друга', now, hours=3)
+        cls.old = cls.create_post(cls.other, 'Вчерашний', now, hours=24)
+        cls.ancient = cls.create_post(cls.other, 'Древний', now,
+                                      hours=24 * 30)
+        cls.unfollowed = cls.create_post(cls.stranger, 'Чужой', now)
+        # Читатель часто комментирует друга.
+        commented = cls.create_post(cls.friend, 'Обсуждённый', now,
+                                    hours=24 * 30)
+        for _ in range(20):
+            Comment.objects.create(post=commented, author=cls.reader,
+                                   text='Комментарий')
+
+    @classmethod
+    def create_post(cls, author, text, now, hours=0):
+        post = Post.objects.create(author=author, text=text)
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=now - datetime.timedelta(hours=hours))
+        return post
+
+    def setUp(self):
+        cache.clear()
+        post_views.take()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_affinity_lifts_frequent_authors(self):
+        # Посты вне окна и чужие посты в ленту не попадают.
+        self.assertEqual(
+            rank(self.reader.id,
+                 follow_feed([self.friend.id, self.other.id], [])),
+            [self.friendly.id, self.newest.id, self.old.id])
+
+    def test_no_follows_no_posts(self):
+        self.assertEqual(rank(self.reader.id, follow_feed([], [])), [])
+
+    def test_ranked_page_is_cached_per_user(self):
+        url = reverse('posts:follow_index') + '?order=ranked'
+        response = self.client.get(url)
+        self.assertTrue(response.context['ranked'])
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']],
+            ['От друга', 'Новый', 'Вчерашний'])
+        self.assertEqual(cache.get(ranked_key(self.reader.id)),
+                         [self.friendly.id, self.newest.id, self.old.id])
+        Post.objects.filter(pk=self.newest.pk).delete()
+        response = self.client.get(url)
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']],
+            ['От друга', 'Вчерашний'])
+
+    def test_ranked_page_fits_budget(self):
+        url = reverse('posts:follow_index') + '?order=ranked'
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+            self.assertLessEqual(len(queries), follow_index.query_budget)
+
+    def test_chronological_mode_is_default(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertFalse(response.context['ranked'])
+        self.assertEqual(response.context['page_obj'][0], self.newest)
@@ -0,0 +1,125 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from .. import follow_graph
+from ..follow_graph import FollowGraph
+from ..models import Follow, Post
+
+User = get_user_model()
+
+PAIRS = [(1, 2), (1, 3), (2, 3), (4, 1), (4, 3)]
+
+
+class FollowGraphTests(TestCase):
+    def test_csr_answers_from_arrays(self):
+        graph = FollowGraph(PAIRS)
+        self.assertTrue(graph.follows(1, 3))
+        self.assertFalse(graph.follows(3, 1))
+        self.assertFalse(graph.follows(100, 1))
+        self.assertEqual(graph.neighbors(1, 0), [2, 3])
+        self.assertEqual(graph.neighbors(3, 1), [1, 2, 4])
+        self.assertEqual(graph.degree(3, 1), 3)
+        self.assertEqual(graph.degree(100, 0), 0)
+
+    def test_delta_and_compaction_keep_edges(self):
+        graph = FollowGraph(PAIRS)
+        graph.set(1, 2, False)
+        graph.set(3, 1, True)
+        graph.set(3, 1, True)
+        self.assertEqual(graph.delta, 2)
+        self.assertEqual(graph.neighbors(1, 0), [3])
+        self.assertEqual(graph.degree(1, 1), 2)
+        compacted = FollowGraph(graph.edges())
+        self.assertEqual(sorted(compacted.edges()),
+                         sorted({*PAIRS, (3, 1)} - {(1, 2)}))
+
+    def test_memory_per_edge(self):
+        pairs = [(user, author) for user in range(1, 201)
+                 for author in range(1, 51) if user != author]
+        graph = FollowGraph(pairs)
+        self.assertLess(graph.nbytes() / len(pairs), 20)
+
+    def test_uncommitted_follows_are_visible_to_transaction(self):
+        reader = User.objects.create_user(username='reader')
+        author = User.objects.create_user(username='author')
+        Follow.objects.create(user=reader, author=author)
+        self.assertTrue(follow_graph.is_following(reader.id, author.id))
+        self.assertEqual(follow_graph.following(reader.id), [author.id])
+        self.assertEqual(follow_graph.followers_count(author.id), 1)
+        Follow.objects.filter(user=reader).delete()
+        self.assertFalse(follow_graph.is_following(reader.id, author.id))
+        self.assertEqual(follow_graph.followers_count(author.id), 0)
+
+
+class FollowGraphCommitTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        follow_graph.reset()
+        self.reader = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+
+    def test_committed_changes_update_loaded_graph(self):
+        self.assertEqual(follow_graph.following(self.reader.id), [])
+        Follow.objects.create(user=self.reader, author=self.author)
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                follow_graph.is_following(self.reader.id, self.author.id))
+            self.assertEqual(follow_graph.following_count(self.reader.id),
+                             1)
+
+    def test_rolled_back_follow_is_forgotten(self):
+        with transaction.atomic():
+            Follow.objects.create(user=self.reader, author=self.author)
+            self.assertTrue(
+                follow_graph.is_following(self.reader.id, self.author.id))
+            transaction.set_rollback(True)
+        self.assertFalse(
+            follow_graph.is_following(self.reader.id, self.author.id))
+
+    @override_settings(FOLLOW_GRAPH_MAX_DELTA=1)
+    def test_graph_compacts_delta(self):
+        follow_graph.graph()
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=other)
+        self.assertEqual(follow_graph.graph().delta, 0)
+        self.assertEqual(follow_graph.following(self.reader.id),
+                         [self.author.id, other.id])
+
+    def test_change_from_another_process_reloads_graph(self):
+        follow_graph.graph()
+        cache.incr(follow_graph.VERSION_KEY)
+        Follow.objects.bulk_create([Follow(user=self.reader,
+                                           author=self.author)])
+        self.assertTrue(
+            follow_graph.is_following(self.reader.id, self.author.id))
+
+    def test_unfollow_with_stale_graph(self):
+        follow_graph.graph()
+        # Подписка из другого процесса, о которой граф ещё не знает.
+        Follow.objects.bulk_create([Follow(user=self.reader,
+                                           author=self.author)])
+        client = Client()
+        client.force_login(self.reader)
+        client.get(reverse('posts:profile_unfollow',
+                           kwargs={'username': 'author'}))
+        self.assertFalse(Follow.objects.exists())
+
+    def test_pages_see_follow_from_another_process(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        follow_graph.graph()
+        # Другой процесс подписался: граф и версия в кеше этого
+        # процесса об этом не знают.
+        Follow.objects.bulk_create([Follow(user=self.reader,
+                                           author=self.author)])
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['page_obj']), [post])
+        response = client.get(reverse('posts:profile',
+                                      kwargs={'username': 'author'}))
+        self.assertTrue(response.context['following'])
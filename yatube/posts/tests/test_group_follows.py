@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import follow_graph
+from ..group_follows import follow_feed, followed_groups
+from ..models import Follow, Group, GroupFollow, Post
+
+User = get_user_model()
+
+
+class GroupFollowTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.elsewhere = Group.objects.create(title='Другая', slug='other')
+        cls.in_group = Post.objects.create(author=cls.other, text='В группе',
+                                           group=cls.group)
+        cls.both = Post.objects.create(author=cls.author, text='Оба',
+                                       group=cls.group)
+        cls.by_author = Post.objects.create(author=cls.author, text='Автор')
+        Post.objects.create(author=cls.other, text='Мимо',
+                            group=cls.elsewhere)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        follow_graph.reset()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_follow_and_unfollow_group(self):
+        url = reverse('posts:group_follow', kwargs={'slug': 'group'})
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertFalse(GroupFollow.objects.exists())
+        response = self.client.post(url)
+        self.assertRedirects(response, reverse(
+            'posts:group_posts', kwargs={'slug': 'group'}))
+        self.assertEqual(followed_groups(self.reader.id), [self.group.id])
+        response = self.client.get(reverse('posts:group_posts',
+                                           kwargs={'slug': 'group'}))
+        self.assertTrue(response.context['subscribed'])
+        self.client.post(reverse('posts:group_unfollow',
+                                 kwargs={'slug': 'group'}))
+        self.assertFalse(GroupFollow.objects.exists())
+        self.assertEqual(followed_groups(self.reader.id), [])
+
+    def test_feed_merges_authors_and_groups_once(self):
+        self.client.post(reverse('posts:group_follow',
+                                 kwargs={'slug': 'group'}))
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['page_obj']),
+                         [self.by_author, self.both, self.in_group])
+
+    def test_feed_uses_both_indexes(self):
+        posts = follow_feed([self.author.id], [self.group.id])
+        sql, params = posts.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('MULTI-INDEX OR', plan)
+        self.assertIn('post_author_pub_date_idx', plan)
+        self.assertIn('post_group_pub_date_idx', plan)
+
+    def test_ranked_feed_includes_groups(self):
+        self.client.post(reverse('posts:group_follow',
+                                 kwargs={'slug': 'group'}))
+        response = self.client.get(reverse('posts:follow_index'),
+                                   {'order': 'ranked'})
+        self.assertEqual(
+            {post.id for post in response.context['page_obj']},
+            {self.by_author.id, self.both.id, self.in_group.id})
@@ -0,0 +1,163 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.pagination import count_generation
+
+from .. import follow_graph
+from ..models import Follow, Group, Mute, Post
+from ..mutes import MutedFeed, excluded_authors, mutes_key, toggle
+from ..views import POSTS_COUNT, index
+
+User = get_user_model()
+
+
+@override_settings(MUTE_CHUNK_SIZE=4)
+class MuteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.noisy = User.objects.create_user(username='noisy')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        # Посты шумного автора идут вперемешку с обычными.
+        for i in range(POSTS_COUNT + 5):
+            for author in (cls.author, cls.noisy):
+                Post.objects.create(author=author, group=cls.group,
+                                    text=f'{author.username} {i}')
+
+    def setUp(self):
+        cache.clear()
+        follow_graph.reset()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def page_authors(self, url, **params):
+        response = self.client.get(url, params)
+        return {post.author.username
+                for post in response.context['page_obj']}, response
+
+    def test_toggle_switches_and_removes(self):
+        self.assertEqual(toggle(self.reader.id, self.noisy.id, Mute.MUTE),
+                         Mute.MUTE)
+        self.assertEqual(excluded_authors(self.reader), {self.noisy.id})
+        self.assertEqual(toggle(self.reader.id, self.noisy.id, Mute.BLOCK),
+                         Mute.BLOCK)
+        self.assertIsNone(toggle(self.reader.id, self.noisy.id, Mute.BLOCK))
+        self.assertEqual(excluded_authors(self.reader), frozenset())
+
+    def test_feed_skips_muted_and_backfills(self):
+        toggle(self.reader.id, self.noisy.id, Mute.MUTE)
+        for url in (reverse('posts:index'),
+                    reverse('posts:group_posts', kwargs={'slug': 'group'})):
+            with self.subTest(url=url):
+                authors, response = self.page_authors(url)
+                self.assertEqual(authors, {'author'})
+                self.assertEqual(len(response.context['page_obj']),
+                                 POSTS_COUNT)
+                authors, response = self.page_authors(url, page=2)
+                self.assertEqual(len(response.context['page_obj']), 5)
+                self.assertFalse(response.context['page_obj'].has_next())
+
+    def test_others_share_unfiltered_page(self):
+        toggle(self.reader.id, self.noisy.id, Mute.MUTE)
+        self.page_authors(reverse('posts:index'))
+        other = Client()
+        other.force_login(self.author)
+        response = other.get(reverse('posts:index'))
+        self.assertEqual(
+            {post.author.username for post in response.context['page_obj']},
+            {'author', 'noisy'})
+        self.assertFalse(response.context['muted'])
+
+    def test_muted_page_reuses_shared_post_fragments(self):
+        other = Client()
+        other.force_login(self.author)
+        other.get(reverse('posts:index'))
+        Post.objects.update(text='изменён')
+        toggle(self.reader.id, self.noisy.id, Mute.MUTE)
+        authors, response = self.page_authors(reverse('posts:index'))
+        self.assertEqual(authors, {'author'})
+        self.assertTrue(response.context['muted'])
+        # Посты, уже показанные другим, берутся из общего кеша.
+        self.assertContains(response, f'author {POSTS_COUNT + 4}')
+        self.assertContains(response, 'изменён')
+
+    def test_slices_match_filtered_feed(self):
+        posts = Post.objects.select_related('author', 'group')
+        for excluded in ({self.noisy.id}, {self.author.id, self.noisy.id}):
+            expected = list(posts.exclude(author_id__in=excluded))
+            feed = MutedFeed(posts, excluded)
+            for start in range(len(expected) + 2):
+                with self.subTest(excluded=excluded, start=start):
+                    self.assertEqual(feed[start:start + 3],
+                                     expected[start:start + 3])
+
+    def test_deep_slice_skips_earlier_chunks(self):
+        posts = Post.objects.select_related('author', 'group')
+        feed = MutedFeed(posts, {self.noisy.id})
+        self.assertEqual(
+            [post.text for post in feed[10:12]],
+            [f'author {i}' for i in (POSTS_COUNT + 4 - 10,
+                                     POSTS_COUNT + 4 - 11)])
+        self.assertIsNone(cache.get(
+            f'feed-chunk:{feed.digest}:{count_generation()}:0'))
+
+    def test_chunks_are_shared_between_users(self):
+        posts = Post.objects.select_related('author', 'group')
+        list(MutedFeed(posts, {self.noisy.id})[:POSTS_COUNT])
+        with self.assertNumQueries(0):
+            feed = MutedFeed(posts, {self.author.id})[:POSTS_COUNT]
+        self.assertEqual({post.author_id for post in feed}, {self.noisy.id})
+
+    @override_settings(MUTE_CHUNK_SIZE=50)
+    def test_muted_index_fits_budget(self):
+        toggle(self.reader.id, self.noisy.id, Mute.MUTE)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:index'))
+        self.assertLessEqual(len(queries), index.query_budget)
+
+    def test_follow_feed_skips_muted(self):
+        for author in (self.author, self.noisy):
+            Follow.objects.create(user=self.reader, author=author)
+        self.client.post(reverse('posts:profile_mute',
+                                 kwargs={'username': 'noisy'}))
+        authors, _ = self.page_authors(reverse('posts:follow_index'))
+        self.assertEqual(authors, {'author'})
+
+    def test_get_does_not_toggle(self):
+        for name in ('posts:profile_mute', 'posts:profile_block'):
+            with self.subTest(view=name):
+                response = self.client.get(
+                    reverse(name, kwargs={'username': 'author'}))
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.METHOD_NOT_ALLOWED)
+        self.assertFalse(Mute.objects.exists())
+
+    def test_block_drops_follows_and_forbids_following(self):
+        Follow.objects.create(user=self.author, author=self.reader)
+        self.client.post(reverse('posts:profile_block',
+                                 kwargs={'username': 'author'}))
+        self.assertFalse(Follow.objects.exists())
+        blocked = Client()
+        blocked.force_login(self.author)
+        blocked.get(reverse('posts:profile_follow',
+                            kwargs={'username': 'reader'}))
+        self.assertFalse(Follow.objects.exists())
+
+    def test_block_applies_despite_stale_mute_cache(self):
+        self.client.post(reverse('posts:profile_block',
+                                 kwargs={'username': 'author'}))
+        # Другой процесс ещё помнит список без блокировки.
+        cache.set(mutes_key(self.reader.id), {})
+        blocked = Client()
+        blocked.force_login(self.author)
+        blocked.get(reverse('posts:profile_follow',
+                            kwargs={'username': 'reader'}))
+        self.assertFalse(Follow.objects.exists())
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import post_views
+from ..hyperloglog import HyperLogLog
+from ..models import Post, PostViews
+
+User = get_user_model()
+
+
+class HyperLogLogTests(TestCase):
+    def test_estimate_is_close(self):
+        sketch = HyperLogLog(10)
+        for value in range(20000):
+            sketch.add(value)
+            sketch.add(value)
+        self.assertAlmostEqual(sketch.count(), 20000, delta=20000 * 0.1)
+
+    def test_small_counts_are_exact(self):
+        sketch = HyperLogLog(10)
+        for value in range(5):
+            sketch.add(value)
+        self.assertEqual(sketch.count(), 5)
+
+    def test_merge_counts_union(self):
+        first, second = HyperLogLog(10), HyperLogLog(10)
+        for value in range(3000):
+            first.add(value)
+        for value in range(2000, 5000):
+            second.add(value)
+        first.merge(second)
+        self.assertAlmostEqual(first.count(), 5000, delta=500)
+        self.assertEqual(HyperLogLog(10, bytes(first)).count(),
+                         first.count())
+
+
+@override_settings(POST_VIEWS_FLUSH_SECONDS=60 * 60)
+class PostViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        post_views.take()
+
+    def test_views_wait_in_buffer(self):
+        for viewer in ('a', 'b', 'a'):
+            post_views.record(self.post.id, viewer)
+        self.assertFalse(PostViews.objects.exists())
+        self.assertEqual(post_views.counts(self.post.id), (3, 2))
+
+    def test_flush_adds_to_stored_counts(self):
+        for viewers in (('a', 'b'), ('b', 'c', 'c')):
+            for viewer in viewers:
+                post_views.record(self.post.id, viewer)
+            post_views.flush(force=True)
+        stored = PostViews.objects.get(post_id=self.post.id)
+        self.assertEqual(stored.views, 5)
+        self.assertEqual(post_views.counts(self.post.id), (5, 3))
+
+    @override_settings(POST_VIEWS_BUFFER_SIZE=2)
+    def test_full_buffer_is_flushed(self):
+        post_views.record(self.post.id, 'a')
+        post_views.record(self.post.id + 1, 'a')
+        self.assertEqual(PostViews.objects.count(), 2)
+        self.assertEqual(post_views.take(), {})
+
+    def test_post_page_counts_views(self):
+        client = Client()
+        client.force_login(self.user)
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        client.get(url)
+        response = Client().get(url)
+        self.assertEqual(response.context['views'], 2)
+        self.assertEqual(response.context['viewers'], 2)
@@ -0,0 +1,177 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from core import memory
+from notifications import buffer
+
+from .. import post_views, tags, trending
+from ..models import Bookmark, Comment, Follow, Group, Post
+from ..urls import urlpatterns
+
+User = get_user_model()
+
+
+# Размеры данных: (число постов автора, число комментариев к посту).
+DATA_SIZES = (
+    (1, 0),
+    (10, 50),
+    (30, 500),
+)
+
+
+# Буфер уведомлений сбрасывается сразу, чтобы запись в очередь
+# попадала в замер того запроса, который её вызвал. Просмотры пишутся
+# пачкой за многие запросы и в замеры не входят.
+@override_settings(NOTIFICATION_FLUSH_SECONDS=0,
+                   POST_VIEWS_FLUSH_SECONDS=60 * 60)
+class ViewBudgetTestCase(TestCase):
+    def seed(self, posts_count, comments_count):
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        User.objects.create_user(username='stranger')
+        group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(author=author, text=f'Пост {i} #tag @reader', group=group)
+            for i in range(posts_count)
+        )
+        post = Post.objects.filter(author=author).first()
+        Comment.objects.bulk_create(
+            Comment(post=post, author=reader, text=f'Комментарий {i}')
+            for i in range(comments_count)
+        )
+        Follow.objects.create(user=reader, author=author)
+        Bookmark.objects.bulk_create(
+            Bookmark(user=reader, post_id=post_id)
+            for post_id in Post.objects.values_list('id', flat=True)
+        )
+        trending.save(trending.rank(['default']))
+        tags.backfill(['default'])
+        return {
+            'author': author,
+            'reader': reader,
+            'group': group,
+            'post': post,
+        }
+
+    def requests(self, data):
+        post_id = data['post'].id
+        today = timezone.localdate()
+        month = {'year': today.year, 'month': today.month}
+        return {
+            'posts:index': ('get', 'reader', reverse('posts:index')),
+            'posts:group_posts': ('get', 'reader', reverse(
+                'posts:group_posts', kwargs={'slug': data['group'].slug})),
+            'posts:profile': ('get', 'reader', reverse(
+                'posts:profile', kwargs={'username': 'author'})),
+            'posts:post_detail': ('get', 'reader', reverse(
+                'posts:post_detail', kwargs={'post_id': post_id})),
+            'posts:post_comments': ('get', 'reader', reverse(
+                'posts:post_comments', kwargs={'post_id': post_id})),
+            'posts:post_create': ('get', 'author', reverse(
+                'posts:post_create')),
+            'posts:post_edit': ('get', 'author', reverse(
+                'posts:post_edit', kwargs={'post_id': post_id})),
+            'posts:add_comment': ('post', 'reader', reverse(
+                'posts:add_comment', kwargs={'post_id': post_id})),
+            'posts:month_posts': ('get', 'reader', reverse(
+                'posts:month_posts', kwargs=month)),
+            'posts:group_month_posts': ('get', 'reader', reverse(
+                'posts:group_month_posts',
+                kwargs={'slug': data['group'].slug, **month})),
+            'posts:profile_month_posts': ('get', 'reader', reverse(
+                'posts:profile_month_posts',
+                kwargs={'username': 'author', **month})),
+            'posts:post_react': ('post', 'reader', reverse(
+                'posts:post_react', kwargs={'post_id': post_id})),
+            'posts:post_bookmark': ('post', 'reader', reverse(
+                'posts:post_bookmark', kwargs={'post_id': post_id})),
+            'posts:saved': ('get', 'reader', reverse('posts:saved')),
+            'posts:tag_posts': ('get', 'reader', reverse(
+                'posts:tag_posts', kwargs={'name': 'tag'})),
+            'posts:mentions': ('get', 'reader', reverse('posts:mentions')),
+            'posts:trending': ('get', 'reader', reverse('posts:trending')),
+            'posts:trending_groups': ('get', 'reader', reverse(
+                'posts:trending_groups')),
+            'posts:group_follow': ('post', 'reader', reverse(
+                'posts:group_follow', kwargs={'slug': data['group'].slug})),
+            'posts:group_unfollow': ('post', 'reader', reverse(
+                'posts:group_unfollow', kwargs={'slug': data['group'].slug})),
+            'posts:profile_mute': ('post', 'reader', reverse(
+                'posts:profile_mute', kwargs={'username': 'stranger'})),
+            'posts:profile_block': ('post', 'reader', reverse(
+                'posts:profile_block', kwargs={'username': 'author'})),
+            'posts:follow_index': ('get', 'reader', reverse(
+                'posts:follow_index')),
+            'posts:profile_follow': ('get', 'reader', reverse(
+                'posts:profile_follow', kwargs={'username': 'stranger'})),
+            'posts:profile_unfollow': ('get', 'reader', reverse(
+                'posts:profile_unfollow', kwargs={'username': 'author'})),
+        }
+
+    def count_queries(self, client, method, url):
+        with CaptureQueriesContext(connection) as queries:
+            getattr(client, method)(url, {'text': 'Комментарий'})
+        return len(queries)
+
+    def measure(self, view_name, size):
+        """Возвращает число запросов с холодным и, для GET, с тёплым кешем."""
+        buffer.take()
+        post_views.take()
+        with transaction.atomic():
+            data = self.seed(*size)
+            method, username, url = self.requests(data)[view_name]
+            client = Client()
+            client.force_login(data[username])
+            cache.clear()
+            counts = [self.count_queries(client, method, url)]
+            if method == 'get':
+                counts.append(self.count_queries(client, method, url))
+            transaction.set_rollback(True)
+        return counts, resolve(url).func
+
+
+class QueryBudgetTests(ViewBudgetTestCase):
+    def test_every_view_declares_budget(self):
+        for pattern in urlpatterns:
+            with self.subTest(view=pattern.name):
+                self.assertTrue(hasattr(pattern.callback, 'query_budget'))
+
+    def test_views_fit_budget_at_any_size(self):
+        for pattern in urlpatterns:
+            view_name = f'posts:{pattern.name}'
+            warm_counts = []
+            for size in DATA_SIZES:
+                with self.subTest(view=view_name, size=size):
+                    counts, view = self.measure(view_name, size)
+                    warm_counts.append(counts[-1])
+                    self.assertLessEqual(max(counts), view.query_budget)
+            with self.subTest(view=view_name):
+                self.assertEqual(
+                    len(set(warm_counts)), 1,
+                    f'Число запросов растёт с данными: {warm_counts}')
+
+
+@override_settings(MEMORY_TRACKING_SAMPLE_RATE=1)
+class MemoryBudgetTests(ViewBudgetTestCase):
+    def setUp(self):
+        memory.reset()
+
+    def test_every_view_declares_budget(self):
+        for pattern in urlpatterns:
+            with self.subTest(view=pattern.name):
+                self.assertTrue(hasattr(pattern.callback, 'memory_budget'))
+
+    def test_views_fit_budget_at_any_size(self):
+        for pattern in urlpatterns:
+            for size in DATA_SIZES:
+                self.measure(f'posts:{pattern.name}', size)
+        self.assertEqual(memory.over_budget(), {})
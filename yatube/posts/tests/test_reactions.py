@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Sum
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Group, Post, Reaction, ReactionCounter
+from ..reactions import prefetch_reactions, react
+
+User = get_user_model()
+
+
+class ReactionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(author=cls.user, text='Пост',
+                                       group=cls.group)
+        cls.other = Post.objects.create(author=cls.user, text='Другой',
+                                        group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def total(self, kind, post=None):
+        return ReactionCounter.objects.filter(
+            target=Reaction.POST, target_id=(post or self.post).id,
+            kind=kind,
+        ).aggregate(total=Sum('count'))['total'] or 0
+
+    def test_react_toggles_and_switches(self):
+        post_id = self.post.id
+        self.assertEqual(
+            react(self.user.id, Reaction.POST, post_id, Reaction.LIKE),
+            Reaction.LIKE)
+        self.assertEqual(
+            react(self.user.id, Reaction.POST, post_id, Reaction.HEART),
+            Reaction.HEART)
+        self.assertEqual((self.total(Reaction.LIKE),
+                          self.total(Reaction.HEART)), (0, 1))
+        self.assertIsNone(
+            react(self.user.id, Reaction.POST, post_id, Reaction.HEART))
+        self.assertEqual(self.total(Reaction.HEART), 0)
+        self.assertFalse(Reaction.objects.exists())
+
+    @override_settings(REACTION_COUNTER_SHARDS=4)
+    def test_counter_spreads_over_rows(self):
+        users = [User.objects.create_user(username=f'user{i}')
+                 for i in range(40)]
+        for user in users:
+            react(user.id, Reaction.POST, self.post.id, Reaction.LIKE)
+        self.assertEqual(self.total(Reaction.LIKE), 40)
+        rows = ReactionCounter.objects.filter(target_id=self.post.id)
+        self.assertGreater(rows.count(), 1)
+        self.assertLessEqual(rows.count(), 4)
+
+    def test_prefetch_marks_own_reactions(self):
+        reader = User.objects.create_user(username='reader')
+        react(reader.id, Reaction.POST, self.post.id, Reaction.LIKE)
+        react(self.user.id, Reaction.POST, self.post.id, Reaction.LIKE)
+        react(self.user.id, Reaction.POST, self.other.id, Reaction.LAUGH)
+        with self.assertNumQueries(2):
+            posts = prefetch_reactions([self.post, self.other], reader)
+        self.assertIn((Reaction.LIKE, '👍', 2, True), posts[0].reactions)
+        self.assertIn((Reaction.LAUGH, '😂', 1, False), posts[1].reactions)
+
+    def test_view_reacts_and_redirects_back(self):
+        url = reverse('posts:group_posts', kwargs={'slug': 'group'})
+        response = self.client.post(
+            reverse('posts:post_react', kwargs={'post_id': self.post.id}),
+            {'kind': Reaction.HEART, 'next': url})
+        self.assertRedirects(response, url)
+        self.assertEqual(self.total(Reaction.HEART), 1)
+        response = self.client.get(url)
+        post = next(post for post in response.context['page_obj']
+                    if post.id == self.post.id)
+        self.assertIn((Reaction.HEART, '❤️', 1, True), post.reactions)
+
+    def test_view_rejects_unknown_kind_and_foreign_redirect(self):
+        url = reverse('posts:post_react', kwargs={'post_id': self.post.id})
+        response = self.client.post(url, {'kind': 'angry'})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(url, {'next': 'https://evil.example/'})
+        self.assertRedirects(response, reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id}))
+
+    def test_view_requires_post(self):
+        response = self.client.get(reverse(
+            'posts:post_react', kwargs={'post_id': self.post.id}))
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(self.total(Reaction.LIKE), 0)
@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post, Recommendation
+
+User = get_user_model()
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('reader', 'friend', 'writer', 'neighbour', 'lurker',
+                         'host')
+        }
+        for name in ('friend', 'writer', 'neighbour', 'host'):
+            Post.objects.create(author=cls.users[name], text=f'Пост {name}')
+        cls.follow('reader', 'friend')
+        cls.follow('friend', 'writer')
+        cls.follow('friend', 'lurker')
+        post = Post.objects.get(author=cls.users['host'])
+        for name in ('reader', 'neighbour', 'lurker'):
+            Comment.objects.create(post=post, author=cls.users[name],
+                                   text='Комментарий')
+
+    @classmethod
+    def follow(cls, user, author):
+        Follow.objects.create(user=cls.users[user], author=cls.users[author])
+
+    def setUp(self):
+        cache.clear()
+
+    def recommend(self, *args):
+        call_command('recommend_authors', *args, stdout=StringIO())
+        return [
+            (row.author.username, row.score)
+            for row in Recommendation.objects.filter(
+                user=self.users['reader'])
+        ]
+
+    def test_friends_of_friends_and_co_commenters(self):
+        # lurker без постов не рекомендуется, friend уже в подписках.
+        self.assertEqual(self.recommend(),
+                         [('writer', 1.0), ('neighbour', 0.5)])
+
+    def test_process_pool_gives_same_result(self):
+        self.assertEqual(
+            self.recommend('--processes', '2', '--chunk-size', '2'),
+            [('writer', 1.0), ('neighbour', 0.5)])
+
+    def test_no_follows(self):
+        Follow.objects.all().delete()
+        self.assertEqual(self.recommend(), [('neighbour', 0.5)])
+
+    def test_pages_show_recommendations(self):
+        self.recommend()
+        client = Client()
+        client.force_login(self.users['reader'])
+        for url in (
+            reverse('posts:follow_index'),
+            reverse('posts:profile', kwargs={'username': 'host'}),
+        ):
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(
+                    [user.username
+                     for user in response.context['recommended_authors']],
+                    ['writer', 'neighbour'])
+        self.follow('reader', 'writer')
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['recommended_authors'],
+                         [self.users['neighbour']])
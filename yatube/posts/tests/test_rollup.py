@@ -0,0 +1,123 @@
+import datetime
+
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import rollup
+from ..models import Group, Post, PostMonth
+
+User = get_user_model()
+
+
+class PostMonthTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Другое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.today = timezone.localdate()
+        self.month = self.today.replace(day=1)
+
+    def counts(self):
+        return {
+            (row.scope, row.key): row.posts
+            for row in PostMonth.objects.filter(month=self.month)
+        }
+
+    def archive_url(self, name, month=None, **kwargs):
+        month = month or self.month
+        return reverse(name, kwargs={'year': month.year,
+                                     'month': month.month, **kwargs})
+
+    def test_post_save_and_delete_update_counts(self):
+        post = Post.objects.create(author=self.user, text='Пост',
+                                   group=self.group)
+        self.assertEqual(self.counts(), {
+            (PostMonth.SITE, 0): 1,
+            (PostMonth.AUTHOR, self.user.id): 1,
+            (PostMonth.GROUP, self.group.id): 1,
+        })
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(self.counts()[PostMonth.GROUP, self.group.id], 0)
+        self.assertEqual(
+            self.counts()[PostMonth.GROUP, self.other_group.id], 1)
+        post.delete()
+        self.assertEqual(set(self.counts().values()), {0})
+
+    def test_rebuild_matches_incremental_counts(self):
+        for group in (self.group, None, self.other_group):
+            Post.objects.create(author=self.user, text='Пост', group=group)
+        counted = self.counts()
+        PostMonth.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_post_months', stdout=out)
+        self.assertEqual(self.counts(), counted)
+        self.assertIn('Счётчиков месяцев: 4', out.getvalue())
+
+    def test_months_skip_empty(self):
+        post = Post.objects.create(author=self.user, text='Пост')
+        post.delete()
+        self.assertEqual(rollup.months(PostMonth.SITE), [])
+
+    def test_month_pages_list_posts_of_month(self):
+        post = Post.objects.create(author=self.user, text='Пост месяца',
+                                   group=self.group)
+        old_date = timezone.now() - datetime.timedelta(days=62)
+        old_post = Post.objects.create(author=self.user, text='Старый пост')
+        Post.objects.filter(pk=old_post.pk).update(pub_date=old_date)
+        for url in (
+            self.archive_url('posts:month_posts'),
+            self.archive_url('posts:group_month_posts', slug='test-slug'),
+            self.archive_url('posts:profile_month_posts', username='auth'),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(list(response.context['page_obj']), [post])
+                self.assertEqual(response.context['months'][0]['url'], url)
+
+    def test_month_navigation_from_rollup(self):
+        Post.objects.create(author=self.user, text='Пост')
+        response = self.client.get(self.archive_url('posts:month_posts'))
+        self.assertEqual(response.context['months'], [{
+            'month': self.month,
+            'posts': 1,
+            'url': self.archive_url('posts:month_posts'),
+        }])
+
+    def test_invalid_month_is_not_found(self):
+        response = self.client.get(
+            reverse('posts:month_posts', kwargs={'year': 2024, 'month': 13}))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_calendar_boundary_months(self):
+        for year, month, status in (
+            (1, 1, HTTPStatus.OK),
+            (9999, 11, HTTPStatus.OK),
+            (9999, 12, HTTPStatus.NOT_FOUND),
+        ):
+            with self.subTest(year=year, month=month):
+                response = self.client.get(reverse(
+                    'posts:month_posts',
+                    kwargs={'year': year, 'month': month}))
+                self.assertEqual(response.status_code, status)
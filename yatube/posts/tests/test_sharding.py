@@ -0,0 +1,215 @@
+import datetime
+import os
+import shutil
+import tempfile
+
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from django.utils import timezone
+
+from core.sharding import bucket_for, bucket_from_id
+
+from ..archive import month_start, partition_models
+from ..models import ArchivedPost, Comment, Post, ShardBucket
+from ..sharding import PostShardRouter, shard_for_author, shard_for_post
+
+User = get_user_model()
+
+
+# Второй шард только объявлен: бакеты без записи в справочнике
+# остаются в основной базе, поэтому тесты обходятся без неё.
+@override_settings(POST_SHARDS=['default', 'shard_1'], SHARD_DIRECTORY_TTL=0)
+class PostShardingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.bucket = bucket_for(cls.user.id)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def move_bucket(self, locked=False):
+        ShardBucket.objects.create(bucket=self.bucket, database='shard_1',
+                                   locked=locked)
+
+    def test_new_post_id_contains_author_bucket(self):
+        post = Post.objects.create(author=self.user, text='Тестовый пост')
+        self.assertEqual(bucket_from_id(post.id), self.bucket)
+        self.assertEqual(shard_for_post(post.id), 'default')
+
+    def test_comment_shares_bucket_with_post(self):
+        post = Post.objects.create(author=self.user, text='Тестовый пост')
+        comment = Comment.objects.create(post=post, author=self.user,
+                                         text='Комментарий')
+        self.assertEqual(bucket_from_id(comment.id), self.bucket)
+
+    def test_old_post_ids_are_found_by_lookup(self):
+        Post.objects.bulk_create([Post(author=self.user, text='Старый пост')])
+        post = Post.objects.get(text='Старый пост')
+        self.assertIsNone(bucket_from_id(post.id))
+        self.assertEqual(shard_for_post(post.id), 'default')
+
+    def test_directory_routes_author_to_shard(self):
+        self.move_bucket()
+        router = PostShardRouter()
+        self.assertEqual(shard_for_author(self.user.id), 'shard_1')
+        self.assertEqual(
+            router.db_for_write(Post, instance=Post(author=self.user)),
+            'shard_1')
+        self.assertEqual(router.db_for_read(Post, instance=self.user),
+                         'shard_1')
+
+    def test_pages_of_sharded_post_open(self):
+        post = Post.objects.create(author=self.user, text='Тестовый пост')
+        for url in (
+            reverse('posts:post_detail', kwargs={'post_id': post.id}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+        ):
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertContains(response, 'Тестовый пост')
+
+    def test_moving_bucket_rejects_writes(self):
+        post = Post.objects.create(author=self.user, text='Тестовый пост')
+        ShardBucket.objects.create(bucket=self.bucket, database='default',
+                                   locked=True)
+        response = self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.id}),
+            {'text': 'Комментарий'})
+        self.assertEqual(response.status_code,
+                         HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_rebalance_rejects_unknown_database(self):
+        with self.assertRaises(CommandError):
+            call_command('rebalance_shards', '--author=auth', '--to=nope')
+
+    def test_rebalance_skips_bucket_in_place(self):
+        out = StringIO()
+        call_command('rebalance_shards', '--author=auth', '--to=default',
+                     stdout=out)
+        self.assertIn('уже в базе default', out.getvalue())
+        self.assertFalse(ShardBucket.objects.exists())
+
+
+@override_settings(POST_SHARDS=['default', 'shard_1'], SHARD_DIRECTORY_TTL=0)
+class SecondShardTests(TransactionTestCase):
+    """Тесты с настоящей базой shard_1 во временном файле SQLite,
+    настроенной как в settings для YATUBE_SHARD_DBS."""
+
+    databases = {'default', 'shard_1'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.shard_dir = tempfile.mkdtemp()
+        path = os.path.join(cls.shard_dir, 'shard_1.sqlite3')
+        connections.databases['shard_1'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': path,
+            'PRAGMAS': {'foreign_keys': 'OFF'},
+            'TEST': {'NAME': path},
+        }
+        call_command('migrate', database='shard_1', verbosity=0)
+        # Миграции включают foreign_keys на соединении; новое соединение
+        # снова получит PRAGMAS шарда.
+        connections['shard_1'].close()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['shard_1'].close()
+        del connections.databases['shard_1']
+        delattr(connections._connections, 'shard_1')
+        shutil.rmtree(cls.shard_dir)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='alice')
+        self.reader = User.objects.create_user(username='bob')
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.old_date = timezone.now() - datetime.timedelta(days=400)
+        self.month = month_start(self.old_date)
+
+    def tearDown(self):
+        post_model = partition_models(self.month)
+        for database in ('default', 'shard_1'):
+            with connections[database].cursor() as cursor:
+                for model in (post_model.comment_model, post_model):
+                    cursor.execute(
+                        f'DROP TABLE IF EXISTS {model._meta.db_table}')
+
+    def post(self, text, date=None):
+        # Как в формах: save() без using, базу выбирает роутер.
+        post = Post(author=self.author, text=text)
+        post.save()
+        Comment(post=post, author=self.reader,
+                text=f'Комментарий к {text}').save()
+        if date is not None:
+            Post.objects.using(post._state.db).filter(pk=post.pk).update(
+                pub_date=date)
+        return post
+
+    def test_archive_posts_on_shard(self):
+        ShardBucket.objects.create(bucket=bucket_for(self.author.id),
+                                   database='shard_1')
+        old = self.post('Старый пост', self.old_date)
+        self.assertEqual(old._state.db, 'shard_1')
+        call_command('archive_posts', stdout=StringIO())
+        self.assertFalse(Post.objects.using('shard_1').exists())
+        self.assertTrue(ArchivedPost.objects.using('shard_1').filter(
+            post_id=old.id).exists())
+        response = self.client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': old.id}))
+        self.assertContains(response, 'Старый пост')
+        self.assertContains(response, 'Комментарий к Старый пост')
+
+    def test_rebalance_moves_bucket_end_to_end(self):
+        hot = self.post('Новый пост')
+        old = self.post('Старый пост', self.old_date)
+        stay = Post(author=self.reader, text='Пост bob')
+        stay.save()
+        call_command('archive_posts', stdout=StringIO())
+        call_command('rebalance_shards', '--author=alice', '--to=shard_1',
+                     stdout=StringIO())
+        self.assertEqual(shard_for_author(self.author.id), 'shard_1')
+        self.assertEqual(list(Post.objects.using('shard_1')), [hot])
+        self.assertEqual(list(Post.objects.using('default')), [stay])
+        post_model = partition_models(self.month)
+        self.assertEqual(
+            list(post_model.objects.using('shard_1')
+                 .values_list('id', flat=True)), [old.id])
+        self.assertFalse(post_model.objects.using('default').exists())
+        self.assertEqual(Comment.objects.using('shard_1').get().post_id,
+                         hot.id)
+
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(list(response.context['page_obj']), [stay, hot])
+        self.assertContains(response, 'bob</a>:')
+        self.assertContains(response, 'Комментарий к Новый пост')
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'alice'}))
+        self.assertEqual([post.text for post in response.context['page_obj']],
+                         ['Новый пост', 'Старый пост'])
+        response = self.client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': old.id}))
+        self.assertContains(response, 'Комментарий к Старый пост')
+
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': hot.id}),
+            {'text': 'После переноса'})
+        self.assertEqual(Comment.objects.using('shard_1').filter(
+            text='После переноса').count(), 1)
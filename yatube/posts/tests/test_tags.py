@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, PostMention, PostTag
+from ..tags import backfill, extract, linkify
+
+User = get_user_model()
+
+
+class TagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def tags(self, post):
+        return set(PostTag.objects.filter(post_id=post.id)
+                   .values_list('tag', flat=True))
+
+    def test_extract(self):
+        tags, names = extract('#Django и #django, а не a#b и &#39; '
+                              '— @reader и @nobody. mail@reader.ru')
+        self.assertEqual(tags, {'django'})
+        self.assertEqual(names, {'reader', 'nobody'})
+
+    def test_index_follows_post_changes(self):
+        post = Post.objects.create(author=self.author,
+                                   text='#Один @reader @nobody')
+        self.assertEqual(self.tags(post), {'один'})
+        self.assertEqual(list(self.reader.mentions.values_list(
+            'post_id', flat=True)), [post.id])
+        post.text = '#два'
+        post.save()
+        self.assertEqual(self.tags(post), {'два'})
+        self.assertFalse(PostMention.objects.exists())
+        post.delete()
+        self.assertFalse(PostTag.objects.exists())
+
+    def test_tag_page_keyset(self):
+        posts = [Post.objects.create(author=self.author, text=f'{i} #Tag')
+                 for i in range(12)]
+        Post.objects.create(author=self.author, text='без тега')
+        url = reverse('posts:tag_posts', kwargs={'name': 'TAG'})
+        response = self.client.get(url)
+        page_obj = response.context['page_obj']
+        self.assertEqual(response.context['tag'], 'tag')
+        self.assertEqual(list(page_obj), posts[:1:-1])
+        self.assertTrue(page_obj.has_next)
+        response = self.client.get(url, {'after': page_obj.next_cursor})
+        self.assertEqual(list(response.context['page_obj']),
+                         posts[1::-1])
+
+    def test_mentions_feed(self):
+        mention = Post.objects.create(author=self.author,
+                                      text='Привет, @reader!')
+        Post.objects.create(author=self.author, text='Привет, @author!')
+        response = self.client.get(reverse('posts:mentions'))
+        self.assertEqual(list(response.context['page_obj']), [mention])
+        self.assertContains(response, '<a href="{}">@reader</a>'.format(
+            reverse('posts:profile', kwargs={'username': 'reader'})))
+
+    def test_profile_links_tags_and_mentions(self):
+        Post.objects.create(author=self.author, text='#Тег для @reader')
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'author'}))
+        self.assertContains(response, '<a href="{}">#Тег</a>'.format(
+            reverse('posts:tag_posts', kwargs={'name': 'тег'})))
+        self.assertContains(response, '<a href="{}">@reader</a>'.format(
+            reverse('posts:profile', kwargs={'username': 'reader'})))
+
+    def test_linkify_escapes_text(self):
+        html = linkify('<b>#Тег</b> @reader', {'reader'})
+        self.assertEqual(html, (
+            '&lt;b&gt;<a href="{}">#Тег</a>&lt;/b&gt; '
+            '<a href="{}">@reader</a>'.format(
+                reverse('posts:tag_posts', kwargs={'name': 'тег'}),
+                reverse('posts:profile', kwargs={'username': 'reader'}))))
+
+    def test_linkify_skips_unindexed(self):
+        text = f'#{"x" * 51} @nobody'
+        self.assertEqual(linkify(text, {'reader'}), text)
+
+    def test_backfill(self):
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'#t{i % 3} @reader')
+            for i in range(6)
+        )
+        # Уже проиндексирован сигналом, и одна строка индекса устарела.
+        indexed = Post.objects.create(author=self.author,
+                                      text='#t0 @reader')
+        PostTag.objects.filter(post_id=indexed.id).update(tag='old')
+        for processes in (1, 2):
+            with self.subTest(processes=processes):
+                self.assertEqual(backfill(['default'], processes, 2), 7)
+                self.assertEqual(PostTag.objects.count(), 7)
+                self.assertEqual(self.tags(indexed), {'t0'})
+                self.assertEqual(self.reader.mentions.count(), 7)
@@ -0,0 +1,79 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Group, Post, Trending
+
+User = get_user_model()
+
+
+@override_settings(TRENDING_HALF_LIFE=3600, TRENDING_WINDOW=24 * 3600)
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.quiet = Group.objects.create(title='Тихая', slug='quiet')
+        cls.busy = Group.objects.create(title='Шумная', slug='busy')
+        now = timezone.now()
+        cls.old = cls.create_post('Старый', cls.busy, now, hours=5)
+        cls.fresh = cls.create_post('Свежий', cls.quiet, now)
+        cls.stale = cls.create_post('Забытый', None, now, hours=48)
+        cls.commented = cls.create_post('Обсуждаемый', cls.busy, now,
+                                        hours=2)
+        for hours in (0, 0, 1):
+            comment = Comment.objects.create(
+                post=cls.commented, author=cls.user, text='Комментарий')
+            Comment.objects.filter(pk=comment.pk).update(
+                pub_date=now - datetime.timedelta(hours=hours))
+
+    @classmethod
+    def create_post(cls, text, group, now, hours=0):
+        post = Post.objects.create(author=cls.user, text=text, group=group)
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=now - datetime.timedelta(hours=hours))
+        return post
+
+    def setUp(self):
+        cache.clear()
+        call_command('update_trending', stdout=StringIO())
+
+    def ranking(self, kind):
+        return list(Trending.objects.filter(kind=kind)
+                    .values_list('object_id', flat=True))
+
+    def test_posts_ranked_by_decayed_activity(self):
+        # Посты вне окна в рейтинг не попадают.
+        self.assertEqual(
+            self.ranking(Trending.POST),
+            [self.commented.id, self.fresh.id, self.old.id])
+
+    def test_groups_sum_their_posts(self):
+        self.assertEqual(self.ranking(Trending.GROUP),
+                         [self.busy.id, self.quiet.id])
+
+    def test_scores_halve_every_half_life(self):
+        old = Trending.objects.get(kind=Trending.POST,
+                                   object_id=self.old.id)
+        self.assertAlmostEqual(old.score, 2 ** -5, places=3)
+
+    def test_update_replaces_rankings(self):
+        Post.objects.filter(pk=self.commented.pk).delete()
+        call_command('update_trending', stdout=StringIO())
+        self.assertEqual(self.ranking(Trending.POST),
+                         [self.fresh.id, self.old.id])
+
+    def test_pages_show_rankings(self):
+        client = Client()
+        response = client.get(reverse('posts:trending'))
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']],
+            ['Обсуждаемый', 'Свежий', 'Старый'])
+        response = client.get(reverse('posts:trending_groups'))
+        self.assertEqual(list(response.context['groups']),
+                         [self.busy, self.quiet])
@@ -11,13 +11,16 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from ..models import Follow, Group, Post
+from ..models import Comment, Follow, Group, Post
+from ..utils import COMMENT_PREVIEWS_COUNT
+from ..views import COMMENTS_COUNT
 
 User = get_user_model()
 
 
 POSTS_QUANTITY_PAGE_ONE = 10
 POSTS_QUANTITY_PAGE_TWO = 3
+COMMENTS_QUANTITY_PAGE_TWO = 5
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
@@ -329,3 +332,97 @@ class PostPaginatorTest(TestCase):
             kwargs={'slug': 'test-slug'}) + '?page=2')
         self.assertEqual(len(response.context['page_obj']),
                          POSTS_QUANTITY_PAGE_TWO)
+
+
+class CommentPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Комментарий {i}')
+            for i in range(COMMENTS_COUNT + COMMENTS_QUANTITY_PAGE_TWO)
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_post_detail_shows_first_comments_page(self):
+        response = self.guest_client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id}))
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_COUNT)
+        self.assertEqual(comments[0], Comment.objects.first())
+        self.assertTrue(comments.has_next)
+
+    def test_load_more_returns_next_comments(self):
+        first_page = self.guest_client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id}))
+        cursor = first_page.context['comments'].next_cursor
+        response = self.guest_client.get(reverse(
+            'posts:post_comments',
+            kwargs={'post_id': self.post.id}), {'after': cursor})
+        self.assertTemplateUsed(response, 'includes/comment_list.html')
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_QUANTITY_PAGE_TWO)
+        self.assertFalse(comments.has_next)
+        shown = set(first_page.context['comments']) | set(comments)
+        self.assertEqual(len(shown),
+                         COMMENTS_COUNT + COMMENTS_QUANTITY_PAGE_TWO)
+
+    def test_comments_oldest_first(self):
+        response = self.guest_client.get(reverse(
+            'posts:post_comments',
+            kwargs={'post_id': self.post.id}), {'order': 'oldest'})
+        self.assertEqual(response.context['comments'][0],
+                         Comment.objects.last())
+
+
+class CommentPreviewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост',
+                                       group=cls.group)
+        cls.quiet_post = Post.objects.create(author=cls.user,
+                                             text='Без комментариев')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Комментарий {i}')
+            for i in range(COMMENTS_QUANTITY_PAGE_TWO)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_list_pages_show_latest_comments(self):
+        expected = list(Comment.objects.all()[:COMMENT_PREVIEWS_COUNT])
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                posts = {post.id: post for post in response.context[
+                    'page_obj']}
+                post = posts[self.post.id]
+                self.assertEqual(post.comments_count,
+                                 COMMENTS_QUANTITY_PAGE_TWO)
+                self.assertEqual(post.comment_previews, expected)
+                self.assertEqual(
+                    post.comment_previews[0].author.username, 'auth')
+
+    def test_post_without_comments_has_empty_preview(self):
+        response = self.guest_client.get(reverse('posts:index'))
+        posts = {post.id: post for post in response.context['page_obj']}
+        self.assertEqual(posts[self.quiet_post.id].comments_count, 0)
+        self.assertEqual(posts[self.quiet_post.id].comment_previews, [])
@@ -0,0 +1,86 @@
+import math
+
+import numpy as np
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from core.pagination import invalidate_counts
+
+from .models import Comment, Post, Trending
+from .sharding import posts_in_order
+
+
+def activity(databases, since):
+    """Свежие посты и комментарии всех баз массивами:
+    id поста, id группы (-1 без группы), время в секундах и вес."""
+    weights = settings.TRENDING_WEIGHTS
+    rows = []
+    for database in databases:
+        for queryset, fields, weight in (
+            (Post.objects.using(database).filter(pub_date__gte=since),
+             ('id', 'group_id', 'pub_date'), weights['post']),
+            (Comment.objects.using(database).filter(
+                pub_date__gte=since, post__isnull=False),
+             ('post_id', 'post__group_id', 'pub_date'), weights['comment']),
+        ):
+            rows.extend(
+                (post_id, -1 if group_id is None else group_id,
+                 date.timestamp(), weight)
+                for post_id, group_id, date in
+                queryset.values_list(*fields).order_by().iterator()
+            )
+    if not rows:
+        empty = np.empty(0)
+        return empty.astype(np.int64), empty.astype(np.int64), empty, empty
+    post_ids, group_ids, times, weights = zip(*rows)
+    return (np.array(post_ids, dtype=np.int64),
+            np.array(group_ids, dtype=np.int64),
+            np.array(times), np.array(weights))
+
+
+def top(ids, scores, size):
+    """Суммы оценок по id и size лучших id по убыванию суммы."""
+    unique, inverse = np.unique(ids, return_inverse=True)
+    totals = np.bincount(inverse, weights=scores)
+    order = np.lexsort((unique, -totals))[:size]
+    return unique[order], totals[order]
+
+
+def rank(databases, now=None):
+    """Рейтинги постов и групп с экспоненциальным затуханием.
+
+    Каждое событие весит weight * 2 ** (-возраст / TRENDING_HALF_LIFE);
+    события старше TRENDING_WINDOW не читаются.
+    """
+    now = now or timezone.now()
+    since = now - timezone.timedelta(seconds=settings.TRENDING_WINDOW)
+    post_ids, group_ids, times, weights = activity(databases, since)
+    decay = math.log(2) / settings.TRENDING_HALF_LIFE
+    scores = weights * np.exp(-decay * (now.timestamp() - times))
+    grouped = group_ids >= 0
+    return {
+        Trending.POST: top(post_ids, scores, settings.TRENDING_SIZE),
+        Trending.GROUP: top(group_ids[grouped], scores[grouped],
+                            settings.TRENDING_SIZE),
+    }
+
+
+def save(rankings):
+    """Заменяет рейтинги в одной транзакции."""
+    trending = Trending.objects.using(DEFAULT_DB_ALIAS)
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        trending.all().delete()
+        trending.bulk_create(
+            Trending(kind=kind, rank=place, object_id=object_id,
+                     score=score)
+            for kind, (ids, scores) in rankings.items()
+            for place, (object_id, score) in enumerate(
+                zip(ids.tolist(), scores.tolist()))
+        )
+    invalidate_counts()
+
+
+def trending_posts(rankings):
+    """Посты рейтинга в его порядке."""
+    return posts_in_order([ranking.object_id for ranking in rankings])
@@ -10,14 +10,39 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('create/', views.post_create, name='post_create'),
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
+    path('group/<slug:slug>/follow/', views.group_follow,
+         name='group_follow'),
+    path('group/<slug:slug>/unfollow/', views.group_unfollow,
+         name='group_unfollow'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('trending/', views.trending, name='trending'),
+    path('trending/groups/', views.trending_groups, name='trending_groups'),
+    path('archive/<int:year>/<int:month>/', views.month_posts,
+         name='month_posts'),
+    path('group/<slug:slug>/archive/<int:year>/<int:month>/',
+         views.group_month_posts, name='group_month_posts'),
+    path('profile/<str:username>/archive/<int:year>/<int:month>/',
+         views.profile_month_posts, name='profile_month_posts'),
     path('follow/', views.follow_index, name='follow_index'),
     path('profile/<str:username>/follow/', views.profile_follow,
          name='profile_follow'),
     path('profile/<str:username>/unfollow/', views.profile_unfollow,
          name='profile_unfollow'),
+    path('profile/<str:username>/mute/', views.profile_mute,
+         name='profile_mute'),
+    path('profile/<str:username>/block/', views.profile_block,
+         name='profile_block'),
     path('posts/<int:post_id>/comment/', views.add_comment,
          name='add_comment'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('posts/<int:post_id>/comments/', views.post_comments,
+         name='post_comments'),
+    path('posts/<int:post_id>/react/', views.post_react,
+         name='post_react'),
+    path('posts/<int:post_id>/bookmark/', views.post_bookmark,
+         name='post_bookmark'),
+    path('saved/', views.saved, name='saved'),
+    path('tag/<str:name>/', views.tag_posts, name='tag_posts'),
+    path('mentions/', views.mentions, name='mentions'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
 ]
@@ -0,0 +1,72 @@
+from collections import defaultdict
+
+from django.db import connections
+
+from .models import Comment, User
+
+COMMENT_PREVIEWS_COUNT = 3
+
+COMMENT_PREVIEWS_SQL = '''
+    SELECT comment.id, comment.post_id, comment.author_id, comment.text,
+           comment.pub_date, comment.total, author.username AS author_name
+    FROM (
+        SELECT id, post_id, author_id, text, pub_date,
+               ROW_NUMBER() OVER (
+                   PARTITION BY post_id ORDER BY pub_date DESC, id DESC
+               ) AS position,
+               COUNT(*) OVER (PARTITION BY post_id) AS total
+        FROM {comments}
+        WHERE post_id IN ({placeholders})
+    ) AS comment
+    LEFT JOIN {users} AS author ON author.id = comment.author_id
+    WHERE comment.position <= %s
+    ORDER BY comment.post_id, comment.position
+'''
+
+
+def prefetch_comment_previews(page_obj, limit=COMMENT_PREVIEWS_COUNT):
+    """Подгружает к постам страницы последние комментарии и их число.
+
+    Посты каждой таблицы обслуживает один запрос с оконными функциями:
+    у каждого поста появляются comment_previews и comments_count.
+    """
+    posts = list(page_obj.object_list)
+    page_obj.object_list = posts
+    previews = {post.id: [] for post in posts}
+    totals = {}
+    # Архивные посты хранят комментарии в таблицах своей партиции.
+    sources = defaultdict(list)
+    for post in posts:
+        comment_model = getattr(post, 'comment_model', Comment)
+        sources[post._state.db, comment_model].append(post.id)
+    comments = []
+    for (database, comment_model), post_ids in sources.items():
+        comments.extend(
+            comment_previews(database, comment_model, post_ids, limit))
+    # В дополнительных шардах нет пользователей: имена берутся
+    # из основной базы.
+    missing = {comment.author_id for comment in comments
+               if comment.author_name is None}
+    names = dict(User.objects.filter(id__in=missing)
+                 .values_list('id', 'username')) if missing else {}
+    for comment in comments:
+        comment.author = User(
+            id=comment.author_id,
+            username=comment.author_name or names.get(comment.author_id))
+        previews[comment.post_id].append(comment)
+        totals[comment.post_id] = comment.total
+    for post in posts:
+        post.comment_previews = previews[post.id]
+        post.comments_count = totals.get(post.id, 0)
+    return page_obj
+
+
+def comment_previews(database, comment_model, post_ids, limit):
+    operations = connections[database].ops
+    sql = COMMENT_PREVIEWS_SQL.format(
+        comments=operations.quote_name(comment_model._meta.db_table),
+        users=operations.quote_name(User._meta.db_table),
+        placeholders=', '.join(['%s'] * len(post_ids)),
+    )
+    return comment_model.objects.db_manager(database).raw(
+        sql, [*post_ids, limit])
@@ -1,74 +1,309 @@
+import datetime
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.http import is_safe_url
+from django.views.decorators.http import require_POST
+from django.urls import reverse
+
+from core.decorators import memory_budget, query_budget
+from core.pagination import (ChainedQuerySet, WindowedPaginator,
+                             keyset_paginate)
+from core.sharding import enabled as sharding_enabled, on_database, scatter
+from notifications.buffer import notify
+from notifications.models import Notification
 
+from . import (bookmarks, follow_graph, group_follows, mutes, post_views,
+               rollup)
+from .archive import (archived_month, author_archive, get_post_or_404,
+                      month_archive, month_bounds, partition_models)
+from .bookmarks import prefetch_bookmarks
+from .feed_ranking import ranked_feed
 from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post, User
+from .models import (Comment, Follow, Group, Mute, Post, PostMonth, PostTag,
+                     Reaction, Trending, User)
+from .reactions import prefetch_reactions, react
+from .sharding import (post_queryset, posts_in_order, shard_for_author,
+                       shard_for_post, shards_for_feed)
+from .tags import prefetch_mentions
+from .trending import trending_posts
+from .utils import prefetch_comment_previews
 
 POSTS_COUNT = 10
+COMMENTS_COUNT = 20
+PAGE_MEMORY_BUDGET = 2 * 1024 * 1024
+REDIRECT_MEMORY_BUDGET = 256 * 1024
 
 
+@query_budget(8)
+@memory_budget(PAGE_MEMORY_BUDGET)
 def index(request):
-    posts = Post.objects.select_related('author', 'group').all()
-    paginator = Paginator(posts, POSTS_COUNT)
+    excluded = mutes.excluded_authors(request.user)
+    posts = scatter(Post.objects.select_related('author', 'group'))
+    if excluded:
+        posts = mutes.MutedFeed(posts, excluded)
+    paginator = WindowedPaginator(posts, POSTS_COUNT)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    prefetch_comment_previews(page_obj)
+    prefetch_mentions(page_obj.object_list)
     context = {
         'page_obj': page_obj,
+        # Общий фрагмент страницы годится только без исключений;
+        # иначе страница собирается из общих фрагментов постов.
+        'muted': bool(excluded),
     }
     return render(request, 'posts/index.html', context)
 
 
+@query_budget(13)
+@memory_budget(PAGE_MEMORY_BUDGET)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('group').all()
-    paginator = Paginator(posts, POSTS_COUNT)
+    excluded = mutes.excluded_authors(request.user)
+    posts = scatter(group.posts.select_related('author', 'group'))
+    if excluded:
+        posts = mutes.MutedFeed(posts, excluded)
+    paginator = WindowedPaginator(posts, POSTS_COUNT)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    prefetch_comment_previews(page_obj)
+    prefetch_mentions(page_obj.object_list)
+    prefetch_reactions(page_obj.object_list, request.user)
+    prefetch_bookmarks(page_obj.object_list, request.user)
+    subscribed = (request.user.is_authenticated
+                  and group.id in group_follows.followed_groups(
+                      request.user.id))
     context = {
         'page_obj': page_obj,
-        'group': group
+        'group': group,
+        'subscribed': subscribed,
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@query_budget(16)
+@memory_budget(PAGE_MEMORY_BUDGET)
 def profile(request, username):
     author_username = get_object_or_404(User, username=username)
-    posts = author_username.posts.select_related('author', 'group').all()
-    posts_count = posts.count()
-    paginator = Paginator(posts, POSTS_COUNT)
+    posts = author_posts(author_username)
+    paginator = WindowedPaginator(posts, POSTS_COUNT)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
-    if request.user.is_authenticated:
-        following = Follow.objects.filter(user=request.user,
-                                          author=author_username
-                                          ).exists()
-    else:
-        following = False
+    prefetch_comment_previews(page_obj)
+    prefetch_mentions(page_obj.object_list)
+    prefetch_reactions(page_obj.object_list, request.user)
+    prefetch_bookmarks(page_obj.object_list, request.user)
+    posts_count = paginator.count
+    followed = (follow_graph.own_following(request.user.id)
+                if request.user.is_authenticated else set())
+    muted = (request.user.is_authenticated
+             and mutes.mutes(request.user.id).get(author_username.id))
     context = {
         'page_obj': page_obj,
         'count': posts_count,
         'author': author_username,
-        'following': following
+        'following': author_username.id in followed,
+        'muted': muted,
+        'followers_count': follow_graph.followers_count(author_username.id),
+        'following_count': follow_graph.following_count(author_username.id),
+        'recommended_authors': recommended_authors(request.user, followed),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@query_budget(12)
+@memory_budget(PAGE_MEMORY_BUDGET)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_post_or_404(
+        post_queryset(Post.objects.select_related('author', 'group'),
+                      post_id),
+        post_id)
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post=post)
     author = post.author
-    posts_count = Post.objects.filter(author=author).count()
+    posts_count = author_posts(author).count()
+    comment_model = getattr(post, 'comment_model', Comment)
+    post_views.record(post.id, viewer(request))
+    prefetch_reactions([post], request.user)
+    prefetch_bookmarks([post], request.user)
+    prefetch_mentions([post])
+    views, viewers = post_views.counts(post.id)
     context = {
         'post': post,
         'posts': posts_count,
+        'views': views,
+        'viewers': viewers,
         'form': form,
-        'comments': comments
+        'archived': comment_model is not Comment,
+        **comments_context(request, post.id, comment_model)
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def viewer(request):
+    """Зритель для подсчёта уникальных просмотров: пользователь или,
+    для анонимов, адрес."""
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'addr:{request.META.get("REMOTE_ADDR", "")}'
+
+
+def author_posts(author):
+    """Посты автора из его шарда, а за ними — из архива."""
+    posts = on_database(author.posts.select_related('author', 'group'),
+                        shard_for_author(author.id))
+    archive = author_archive(posts, author.id)
+    if archive:
+        return ChainedQuerySet([posts, *archive])
+    return posts
+
+
+def recommended_authors(user, followed):
+    """Рекомендованные авторы одним запросом по индексу (user, rank),
+    без тех, на кого пользователь уже подписан (followed)."""
+    if not user.is_authenticated:
+        return []
+    excluded = mutes.excluded_authors(user)
+    return [
+        recommendation.author
+        for recommendation in user.recommendations.select_related('author')
+        if recommendation.author_id not in followed
+        and recommendation.author_id not in excluded
+    ]
+
+
+def comments_context(request, post_id, comment_model=Comment):
+    order = 'oldest' if request.GET.get('order') == 'oldest' else 'newest'
+    comments = keyset_paginate(
+        post_queryset(comment_model.objects.filter(post_id=post_id)
+                      .select_related('author'), post_id),
+        request.GET.get('after'),
+        COMMENTS_COUNT,
+        descending=order == 'newest',
+    )
+    return {
+        'post_id': post_id,
+        'comments': comments,
+        'order': order,
+    }
+
+
+@query_budget(4)
+@memory_budget(PAGE_MEMORY_BUDGET)
+def post_comments(request, post_id):
+    context = comments_context(request, post_id)
+    if not context['comments']:
+        month = archived_month(post_id, shard_for_post(post_id))
+        if month is not None:
+            context = comments_context(
+                request, post_id, partition_models(month).comment_model)
+    return render(request, 'includes/comment_list.html', context)
+
+
+@query_budget(11)
+@memory_budget(PAGE_MEMORY_BUDGET)
+def trending(request):
+    paginator = WindowedPaginator(
+        Trending.objects.filter(kind=Trending.POST), POSTS_COUNT)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    page_obj.object_list = trending_posts(page_obj.object_list)
+    prefetch_comment_previews(page_obj)
+    prefetch_mentions(page_obj.object_list)
+    prefetch_reactions(page_obj.object_list, request.user)
+    prefetch_bookmarks(page_obj.object_list, request.user)
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+@query_budget(5)
+@memory_budget(PAGE_MEMORY_BUDGET)
+def trending_groups(request):
+    rankings = list(Trending.objects.filter(kind=Trending.GROUP))
+    groups = Group.objects.in_bulk(
+        [ranking.object_id for ranking in rankings])
+    context = {
+        'groups': [groups[ranking.object_id] for ranking in rankings
+                   if ranking.object_id in groups],
+    }
+    return render(request, 'posts/trending_groups.html', context)
+
+
+def month_or_404(year, month):
+    try:
+        month = datetime.date(year, month, 1)
+        # У декабря 9999 года нет конца, представимого в datetime.
+        month_bounds(month)
+    except (ValueError, OverflowError):
+        raise Http404('Такого месяца нет.')
+    return month
+
+
+def all_shards():
+    return settings.POST_SHARDS if sharding_enabled() else None
+
+
+def archive_page(request, posts, month, scope, key=0, **context):
+    """Страница постов за месяц с навигацией по месяцам из PostMonth."""
+    paginator = WindowedPaginator(posts, POSTS_COUNT)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    prefetch_comment_previews(page_obj)
+    prefetch_mentions(page_obj.object_list)
+    match = request.resolver_match
+    url_kwargs = {name: value for name, value in match.kwargs.items()
+                  if name not in ('year', 'month')}
+    months = [
+        {
+            'month': nav_month,
+            'posts': posts_count,
+            'url': reverse(match.view_name, kwargs={
+                **url_kwargs, 'year': nav_month.year,
+                'month': nav_month.month}),
+        }
+        for nav_month, posts_count in rollup.months(scope, key)
+    ]
+    context.update({
+        'page_obj': page_obj,
+        'month': month,
+        'months': months,
+    })
+    return render(request, 'posts/archive.html', context)
+
+
+@query_budget(9)
+@memory_budget(PAGE_MEMORY_BUDGET)
+def month_posts(request, year, month):
+    month = month_or_404(year, month)
+    posts = month_archive(month, all_shards())
+    return archive_page(request, posts, month, PostMonth.SITE)
+
+
+@query_budget(10)
+@memory_budget(PAGE_MEMORY_BUDGET)
+def group_month_posts(request, slug, year, month):
+    month = month_or_404(year, month)
+    group = get_object_or_404(Group, slug=slug)
+    posts = month_archive(month, all_shards(), group_id=group.id)
+    return archive_page(request, posts, month, PostMonth.GROUP, group.id,
+                        group=group)
+
+
+@query_budget(10)
+@memory_budget(PAGE_MEMORY_BUDGET)
+def profile_month_posts(request, username, year, month):
+    month = month_or_404(year, month)
+    author = get_object_or_404(User, username=username)
+    posts = month_archive(month, [shard_for_author(author.id)],
+                          author_id=author.id)
+    return archive_page(request, posts, month, PostMonth.AUTHOR, author.id,
+                        author=author)
+
+
+@query_budget(4)
+@memory_budget(PAGE_MEMORY_BUDGET)
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -86,8 +321,11 @@ def post_create(request):
     return render(request, 'posts/create_post.html', context)
 
 
+@query_budget(6)
+@memory_budget(PAGE_MEMORY_BUDGET)
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.using(shard_for_post(post_id)),
+                             id=post_id)
     form = PostForm(request.POST or None, instance=post,
                     files=request.FILES or None)
     if post.author != request.user:
@@ -103,50 +341,201 @@ def post_edit(request, post_id):
     return render(request, 'posts/create_post.html', context)
 
 
+@query_budget(5)
+@memory_budget(REDIRECT_MEMORY_BUDGET)
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.using(shard_for_post(post_id)),
+                             id=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
         comment.save()
+        if post.author_id != request.user.id:
+            notify(post.author_id, Notification.COMMENT, post.id,
+                   request.user.username)
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def redirect_back(request, post_id):
+    """Возврат на страницу из поля next или к посту."""
+    next_url = request.POST.get('next')
+    if next_url and is_safe_url(next_url, {request.get_host()},
+                                request.is_secure()):
+        return redirect(next_url)
+    return redirect('posts:post_detail', post_id=post_id)
+
+
+@query_budget(8)
+@memory_budget(REDIRECT_MEMORY_BUDGET)
+@login_required
+@require_POST
+def post_react(request, post_id):
+    get_post_or_404(post_queryset(Post.objects.all(), post_id), post_id)
+    kind = request.POST.get('kind', Reaction.LIKE)
+    if kind not in dict(Reaction.KINDS):
+        raise Http404
+    react(request.user.id, Reaction.POST, post_id, kind)
+    return redirect_back(request, post_id)
+
+
+@query_budget(6)
+@memory_budget(REDIRECT_MEMORY_BUDGET)
+@login_required
+@require_POST
+def post_bookmark(request, post_id):
+    bookmarks.toggle(request.user.id, post_id, check=lambda: get_post_or_404(
+        post_queryset(Post.objects.all(), post_id), post_id))
+    return redirect_back(request, post_id)
+
+
+@query_budget(9)
+@memory_budget(PAGE_MEMORY_BUDGET)
+@login_required
+def saved(request):
+    page_obj = indexed_posts(request, request.user.bookmarks.all(),
+                             field='created')
+    for post in page_obj:
+        post.bookmarked = True
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/saved.html', context)
+
+
+def indexed_posts(request, rows, field='pub_date'):
+    """Страница постов по строкам индекса с post_id: keyset по
+    (field, id) с курсором из параметра after."""
+    page_obj = keyset_paginate(rows, request.GET.get('after'), POSTS_COUNT,
+                               field=field)
+    page_obj.object_list = posts_in_order([row.post_id for row in page_obj])
+    prefetch_comment_previews(page_obj)
+    prefetch_mentions(page_obj.object_list)
+    prefetch_reactions(page_obj.object_list, request.user)
+    return page_obj
+
+
+@query_budget(10)
+@memory_budget(PAGE_MEMORY_BUDGET)
+def tag_posts(request, name):
+    name = name.lower()
+    page_obj = indexed_posts(request, PostTag.objects.filter(tag=name))
+    prefetch_bookmarks(page_obj.object_list, request.user)
+    context = {
+        'page_obj': page_obj,
+        'tag': name,
+    }
+    return render(request, 'posts/tag.html', context)
+
+
+@query_budget(10)
+@memory_budget(PAGE_MEMORY_BUDGET)
+@login_required
+def mentions(request):
+    page_obj = indexed_posts(request, request.user.mentions.all())
+    prefetch_bookmarks(page_obj.object_list, request.user)
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/mentions.html', context)
+
+
+@query_budget(10)
+@memory_budget(PAGE_MEMORY_BUDGET)
 @login_required
 def follow_index(request):
-    authors = request.user.follower.values('author')
-    posts = Post.objects.filter(author__in=authors)
-    paginator = Paginator(posts, POSTS_COUNT)
+    excluded = mutes.excluded_authors(request.user)
+    followed = follow_graph.own_following(request.user.id)
+    authors = sorted(followed - excluded)
+    groups = group_follows.followed_groups(request.user.id)
+    feed = group_follows.follow_feed(authors, groups, excluded)
+    databases = shards_for_feed(authors, groups)
+    ranked = request.GET.get('order') == 'ranked'
+    if ranked:
+        posts = ranked_feed(request.user.id, feed, databases)
+    else:
+        posts = scatter(feed.select_related('author', 'group'), databases)
+    paginator = WindowedPaginator(posts, POSTS_COUNT)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    if ranked:
+        page_obj.object_list = posts_in_order(page_obj.object_list)
+    page_obj.object_list = prefetch_mentions(page_obj.object_list)
     context = {
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'ranked': ranked,
+        'recommended_authors': recommended_authors(request.user, followed),
     }
     return render(request, 'posts/follows.html', context)
 
 
+@query_budget(9)
+@memory_budget(REDIRECT_MEMORY_BUDGET)
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    if author == request.user:
+    if author == request.user or mutes.is_blocked(author.id,
+                                                  request.user.id):
         return redirect('posts:profile', username)
     following, created = Follow.objects.get_or_create(
         user=request.user,
         author=author
     )
-    if not created and following:
-        pass
+    if created:
+        notify(author.id, Notification.FOLLOW,
+               actor=request.user.username)
     return redirect('posts:profile', username)
 
 
+@query_budget(5)
+@memory_budget(REDIRECT_MEMORY_BUDGET)
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    following = Follow.objects.filter(user=request.user,
-                                      author=author)
-    if following.exists():
-        following.delete()
+    # Граф может отставать от соседнего процесса: удаляем по базе.
+    Follow.objects.filter(user=request.user, author=author).delete()
+    return redirect('posts:profile', username)
+
+
+@query_budget(7)
+@memory_budget(REDIRECT_MEMORY_BUDGET)
+@login_required
+@require_POST
+def group_follow(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    group_follows.follow(request.user.id, group.id)
+    return redirect('posts:group_posts', slug)
+
+
+@query_budget(6)
+@memory_budget(REDIRECT_MEMORY_BUDGET)
+@login_required
+@require_POST
+def group_unfollow(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    group_follows.unfollow(request.user.id, group.id)
+    return redirect('posts:group_posts', slug)
+
+
+@query_budget(7)
+@memory_budget(REDIRECT_MEMORY_BUDGET)
+@login_required
+@require_POST
+def profile_mute(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        mutes.toggle(request.user.id, author.id, Mute.MUTE)
+    return redirect('posts:profile', username)
+
+
+@query_budget(9)
+@memory_budget(REDIRECT_MEMORY_BUDGET)
+@login_required
+@require_POST
+def profile_block(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        mutes.toggle(request.user.id, author.id, Mute.BLOCK)
     return redirect('posts:profile', username)
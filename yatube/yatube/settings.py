@@ -43,6 +43,8 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'jobs.apps.JobsConfig',
+    'notifications.apps.NotificationsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -54,10 +56,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.slow_queries.SlowQueryLogMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.replicas.ReplicaRoutingMiddleware',
+    'core.middleware.sharding.ShardMovingMiddleware',
+    'core.middleware.profiler.ProfilerMiddleware',
+    'core.middleware.memory.MemoryTrackingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -76,6 +83,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.notifications.notifications',
             ],
         },
     },
@@ -91,9 +99,68 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {
+            'timeout': 5,
+        },
     }
 }
 
+# Выполняются при каждом новом соединении с SQLite (core.db).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'auto_vacuum': 'INCREMENTAL',
+}
+DB_HEALTH_CHECK_INTERVAL = 30
+
+# Реплики только для чтения; локально файл реплики обновляет
+# manage.py sync_replica --interval N.
+DATABASE_REPLICAS = []
+if os.environ.get('YATUBE_REPLICA_DB'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['YATUBE_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append('replica')
+REPLICA_PIN_SECONDS = 10
+
+# Шардирование постов и комментариев по бакетам авторов. Основная база —
+# первый шард; дополнительные задаются путями к файлам SQLite через запятую
+# в YATUBE_SHARD_DBS, создаются командой manage.py migrate --database shard_N
+# и заполняются командой rebalance_shards.
+POST_SHARDS = ['default']
+SHARD_PATHS = os.environ.get('YATUBE_SHARD_DBS', '')
+for number, path in enumerate(filter(None, SHARD_PATHS.split(',')), 1):
+    DATABASES[f'shard_{number}'] = {
+        **DATABASES['default'],
+        'NAME': path,
+        # Пользователи и группы остаются в основной базе.
+        'PRAGMAS': {'foreign_keys': 'OFF'},
+    }
+    POST_SHARDS.append(f'shard_{number}')
+SHARD_DIRECTORY_TTL = 5
+
+# Посты старше этого числа дней manage.py archive_posts переносит
+# в месячные архивные таблицы.
+POST_ARCHIVE_AFTER_DAYS = 365
+
+# Граф подписок в памяти процесса (posts.follow_graph): перечитывается
+# не реже раза в FOLLOW_GRAPH_TTL секунд, а накопленные изменения
+# сворачиваются в CSR после FOLLOW_GRAPH_MAX_DELTA рёбер.
+FOLLOW_GRAPH_TTL = 5 * 60
+FOLLOW_GRAPH_MAX_DELTA = 10000
+
+DATABASE_ROUTERS = [
+    'posts.sharding.PostShardRouter',
+    'core.db_router.ReadReplicaRouter',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -143,3 +210,135 @@ CACHES = {
 }
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+# Профилирование запросов сотрудников: ?profile или заголовок X-Profile.
+PROFILER_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILER_QUERY_PARAM = 'profile'
+PROFILER_HEADER = 'HTTP_X_PROFILE'
+PROFILER_INTERVAL = 0.001
+PROFILER_KEEP = 50
+
+# Журнал медленных запросов к БД; None отключает журнал.
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_LOG_FILE = os.path.join(BASE_DIR, 'logs', 'slow_queries.log')
+SLOW_QUERY_LOG_MAX_BYTES = 10 * 1024 * 1024
+SLOW_QUERY_LOG_BACKUP_COUNT = 5
+
+# Замеры памяти через tracemalloc для доли запросов от 0 до 1.
+MEMORY_TRACKING_SAMPLE_RATE = 0.01
+MEMORY_TRACKING_FRAMES = 1
+MEMORY_TRACKING_TOP_SITES = 10
+
+# Навигация по страницам: число соседних страниц и кеш общего числа постов.
+PAGINATOR_WINDOW = 2
+PAGINATOR_COUNT_TTL = 60
+PAGINATOR_COUNT_MAX_AGE = 24 * 60 * 60
+
+# Очередь фоновых задач в основной базе: manage.py run_workers --processes N.
+JOB_BATCH_SIZE = 10
+JOB_POLL_INTERVAL = 1
+JOB_LEASE_SECONDS = 5 * 60
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BASE_SECONDS = 10
+JOB_RETRY_MAX_SECONDS = 60 * 60
+
+# Периодические задачи: расписание в формате cron по TIME_ZONE.
+JOB_SCHEDULE = {
+    'send_outbox': {
+        'cron': '* * * * *',
+        'task': 'jobs.tasks.send_outbox',
+    },
+    'archive_posts': {
+        'cron': '30 3 * * *',
+        'task': 'jobs.tasks.run_command',
+        'args': ['archive_posts'],
+    },
+    'update_trending': {
+        'cron': '*/5 * * * *',
+        'task': 'jobs.tasks.run_command',
+        'args': ['update_trending'],
+    },
+    'recommend_authors': {
+        'cron': '0 5 * * *',
+        'task': 'jobs.tasks.run_command',
+        'args': ['recommend_authors'],
+    },
+    'dbmaintain': {
+        'cron': '0 4 * * 0',
+        'task': 'jobs.tasks.run_command',
+        'args': ['dbmaintain'],
+    },
+}
+
+# Письма пишутся в outbox и уходят через OUTBOX_EMAIL_BACKEND в фоне.
+# Локально письма сохраняются файлами в EMAIL_FILE_PATH.
+EMAIL_BACKEND = 'jobs.mail.OutboxBackend'
+OUTBOX_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 8
+
+# Уведомления: события копятся в буфере процесса и уходят в очередь
+# пачкой; однотипные события за окно сворачиваются в одно уведомление.
+NOTIFICATION_WINDOW = 60 * 60
+NOTIFICATION_FLUSH_SECONDS = 5
+NOTIFICATION_BUFFER_SIZE = 100
+NOTIFICATION_UNREAD_TTL = 30
+
+# Рекомендации авторов (manage.py recommend_authors): сколько хранить
+# на пользователя и вес пути через подписку и через общий пост.
+RECOMMENDATIONS_COUNT = 5
+RECOMMENDATION_WEIGHTS = {
+    'friends': 1.0,
+    'co_commenters': 0.5,
+}
+
+# Популярное (manage.py update_trending): вес события падает вдвое
+# за TRENDING_HALF_LIFE секунд, события старше TRENDING_WINDOW
+# не учитываются.
+TRENDING_HALF_LIFE = 6 * 60 * 60
+TRENDING_WINDOW = 3 * 24 * 60 * 60
+TRENDING_SIZE = 100
+TRENDING_WEIGHTS = {
+    'post': 1.0,
+    'comment': 1.0,
+}
+
+# Ранжированная лента подписок (?order=ranked): не больше
+# FEED_RANKING_CANDIDATES постов за FEED_RANKING_WINDOW секунд,
+# близость к автору — по FEED_RANKING_HISTORY последним комментариям
+# пользователя; порядок кешируется на FEED_RANKING_TTL секунд.
+FEED_RANKING_CANDIDATES = 300
+FEED_RANKING_WINDOW = 7 * 24 * 60 * 60
+FEED_RANKING_HISTORY = 500
+FEED_RANKING_HALF_LIFE = 12 * 60 * 60
+FEED_RANKING_TTL = 60
+FEED_RANKING_WEIGHTS = {
+    'recency': 3.0,
+    'affinity': 1.0,
+    'comments': 0.5,
+    'image': 0.3,
+}
+
+# Просмотры постов копятся в буфере процесса и пишутся в базу пачкой
+# раз в POST_VIEWS_FLUSH_SECONDS секунд или по POST_VIEWS_BUFFER_SIZE
+# постам. Скетч зрителей — 2 ** POST_VIEWS_PRECISION байт, ошибка
+# около 3%.
+POST_VIEWS_FLUSH_SECONDS = 5
+POST_VIEWS_BUFFER_SIZE = 1000
+POST_VIEWS_PRECISION = 10
+
+# Счётчик реакций на объект разложен на столько строк.
+REACTION_COUNTER_SHARDS = 16
+
+# Скрытые авторы: список пользователя кешируется на MUTES_TTL секунд
+# (кеш локален для процесса, поэтому срок короткий), а лента для него
+# собирается из общих кусков по MUTE_CHUNK_SIZE постов.
+MUTES_TTL = 10
+MUTE_CHUNK_SIZE = 50
+MUTE_CHUNK_TTL = 20
+MUTE_BACKFILL_CHUNKS = 5
+
+# Список групп, на которые подписан пользователь, кешируется
+# на столько секунд.
+GROUP_FOLLOWS_TTL = 60 * 60
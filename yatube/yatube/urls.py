@@ -20,7 +20,10 @@ from django.conf.urls.static import static
 
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
+    path('admin/', include('core.urls', namespace='core')),
     path('admin/', admin.site.urls),
+    path('notifications/',
+         include('notifications.urls', namespace='notifications')),
     path('about/', include('about.urls', namespace='about')),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),